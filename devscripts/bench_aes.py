@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+from __future__ import unicode_literals
+
+import optparse
+import os
+import sys
+import time
+
+
+# Import yt_dlp
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT_DIR)
+from yt_dlp.aes import (
+    aes_cbc_decrypt,
+    aes_ctr_decrypt,
+    _aes_cbc_decrypt_fast,
+    _aes_ctr_encrypt_fast,
+    _get_numpy,
+)
+from yt_dlp.compat import compat_pycrypto_AES
+from yt_dlp.utils import bytes_to_intlist, intlist_to_bytes
+
+# Same key and data as in test/test_aes.py
+KEY = IV = intlist_to_bytes([0x20, 0x15] + 14 * [0])
+CBC_DATA = b'\x97\x92+\xe5\x0b\xc3\x18\x91ky9m&\xb3\xb5@\xe6\x27\xc2\x96.\xc8u\x88\xab9-[\x9e|\xf1\xcd'
+CTR_DATA = b'\x03\xc7\xdd\xd4\x8e\xb3\xbc\x1a*O\xdc1\x12+8Aio\xd1z\xb5#\xaf\x08'
+
+
+def gen_implementations(mode):
+    """Yield (name, function of (data, key, iv)) for each implementation of mode"""
+    if mode == 'cbc':
+        yield 'reference', lambda *args: intlist_to_bytes(aes_cbc_decrypt(*map(bytes_to_intlist, args)))
+        yield 't-tables', lambda *args: _aes_cbc_decrypt_fast(*args, use_numpy=False)
+        if _get_numpy():
+            yield 'numpy', _aes_cbc_decrypt_fast
+        if compat_pycrypto_AES:
+            yield 'pycryptodome', lambda data, key, iv: compat_pycrypto_AES.new(
+                key, compat_pycrypto_AES.MODE_CBC, iv).decrypt(data)
+    else:
+        yield 'reference', lambda *args: intlist_to_bytes(aes_ctr_decrypt(*map(bytes_to_intlist, args)))
+        yield 't-tables', _aes_ctr_encrypt_fast
+        if compat_pycrypto_AES:
+            yield 'pycryptodome', lambda data, key, iv: compat_pycrypto_AES.new(
+                key, compat_pycrypto_AES.MODE_CTR, nonce=b'', initial_value=iv).decrypt(data)
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog [OPTIONS]',
+        description=(
+            'Measure the throughput of the AES implementations of yt_dlp.aes '
+            'on the encrypted data of test/test_aes.py, repeated to the given size'))
+    parser.add_option(
+        '-s', '--size', type=int, default=256,
+        help='Size of the data to decrypt, in KiB (default: %default)')
+    options, args = parser.parse_args()
+
+    mismatches = 0
+    for mode, sample in (('cbc', CBC_DATA), ('ctr', CTR_DATA)):
+        # CBC needs whole blocks to be decrypted in one go
+        data = sample * (options.size * 1024 // len(sample) + 1)
+        data = data[:len(data) - len(data) % 32]
+        expected = None
+        for name, func in gen_implementations(mode):
+            start = time.time()
+            result = func(data, KEY, IV)
+            elapsed = time.time() - start
+            print('%s %-14s %10.3f MiB/s' % (mode, name, len(data) / 1024 / 1024 / max(elapsed, 1e-9)))
+            if expected is None:
+                expected = result
+            elif result != expected:
+                mismatches += 1
+                print('MISMATCH %s %s' % (mode, name))
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
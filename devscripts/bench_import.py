@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+from __future__ import unicode_literals
+
+import optparse
+import os
+import re
+import subprocess
+import sys
+
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Modules that are only needed by some of the runs, and so must not be imported at startup
+DEFERRED_MODULES = (
+    'yt_dlp.cookies',
+    'yt_dlp.websocket',
+    'yt_dlp.downloader.external',
+    'yt_dlp.downloader.f4m',
+    'yt_dlp.downloader.niconico',
+    'yt_dlp.downloader.rtmp',
+    'yt_dlp.downloader.youtube_live_chat',
+    'yt_dlp.extractor.adobepass',
+    'yt_dlp.extractor.openload',
+    'yt_dlp.postprocessor.embedthumbnail',
+    'yt_dlp.postprocessor.exec',
+    'yt_dlp.postprocessor.ffmpeg',
+    'yt_dlp.postprocessor.metadataparser',
+    'yt_dlp.postprocessor.modify_chapters',
+    'yt_dlp.postprocessor.movefilesafterdownload',
+    'yt_dlp.postprocessor.sponsorblock',
+    'yt_dlp.postprocessor.xattrpp',
+)
+
+# Creating a YoutubeDL from the API, and the startup of "yt-dlp -J" up to the download
+STATEMENTS = (
+    'from yt_dlp import YoutubeDL; YoutubeDL()',
+    'import yt_dlp; yt_dlp.YoutubeDL.download = lambda self, url_list: 0\n'
+    'try:\n'
+    '    yt_dlp._real_main(["--ignore-config", "-J", "https://example.com/video"])\n'
+    'except SystemExit:\n'
+    '    pass',
+)
+
+
+def import_times(statement):
+    """
+    Run the statement in a new interpreter and return ({module: (self, cumulative)}, total)
+    in seconds, where total is the time spent importing the modules of yt_dlp
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', statement],
+        cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True)
+    if proc.returncode:
+        sys.exit(proc.stderr)
+    times, total = {}, 0
+    for line in proc.stderr.splitlines():
+        mobj = re.match(r'import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)', line)
+        if mobj:
+            self_time, cumulative = int(mobj.group(1)) / 1e6, int(mobj.group(2)) / 1e6
+            times[mobj.group(4)] = (self_time, cumulative)
+            # Nested imports are indented; modules imported by the statement itself are not
+            if len(mobj.group(3)) == 1 and mobj.group(4).split('.')[0] == 'yt_dlp':
+                total += cumulative
+    return times, total
+
+
+def measure(statement, options):
+    """Print the import times of the statement, and return whether it passes the checks"""
+    # The first run writes the bytecode caches
+    import_times(statement)
+    best, best_total = {}, None
+    for _ in range(options.rounds):
+        times, total = import_times(statement)
+        for module, module_times in times.items():
+            best[module] = min(best.get(module, module_times), module_times)
+        best_total = total if best_total is None else min(best_total, total)
+
+    print('\n%s' % statement)
+    print('%9s %9s  module' % ('self', 'total'))
+    for module, (self_time, total) in sorted(best.items(), key=lambda x: x[1][1], reverse=True)[:options.top]:
+        print('%8.1fms %8.1fms  %s' % (self_time * 1000, total * 1000, module))
+    print('Total: %.1fms for %d modules' % (best_total * 1000, len(best)))
+
+    passed = True
+    deferred = DEFERRED_MODULES
+    if 'yt_dlp.extractor.extractors' in best:
+        print('Lazy extractors are not available (run devscripts/make_lazy_extractors.py); '
+              'all the extractors are imported')
+        deferred = [module for module in deferred if not module.startswith('yt_dlp.extractor.')]
+    for module in deferred:
+        if module in best:
+            print('REGRESSION %s is imported at startup' % module)
+            passed = False
+    if options.max_time is not None and best_total > options.max_time:
+        print('REGRESSION the import time is above %.1fms' % (options.max_time * 1000))
+        passed = False
+    return passed
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog [OPTIONS]',
+        description=(
+            'Measure the import time of yt-dlp with "python -X importtime", '
+            'and check that the modules that are not needed at startup are not imported'))
+    parser.add_option(
+        '-s', '--statement', action='append', dest='statements',
+        help='Statement to measure; can be used multiple times (default: the creation of a YoutubeDL, and "yt-dlp -J")')
+    parser.add_option(
+        '-r', '--rounds', type=int, default=5,
+        help='Number of runs; the fastest time of each module is reported (default: %default)')
+    parser.add_option(
+        '-n', '--top', type=int, default=15,
+        help='Number of the slowest modules to show (default: %default)')
+    parser.add_option(
+        '--max-time', type=float, metavar='SECONDS',
+        help='Fail if the total import time of a statement is above this')
+    options, args = parser.parse_args()
+
+    results = [measure(statement, options) for statement in options.statements or STATEMENTS]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
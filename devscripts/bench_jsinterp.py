@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+from __future__ import unicode_literals
+
+import io
+import optparse
+import os
+import re
+import string
+import sys
+import time
+
+
+# Import yt_dlp
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT_DIR)
+from test.helper import FakeYDL
+from test.test_jsinterp import NSIG_CODE
+from test.test_youtube_signature import _NSIG_TESTS, _SIG_TESTS
+from yt_dlp.compat import compat_urlretrieve
+from yt_dlp.extractor import YoutubeIE
+from yt_dlp.jsinterp import JSInterpreter
+
+TESTDATA_DIR = os.path.join(ROOT_DIR, 'test', 'testdata')
+# Same file names as in test/test_youtube_signature.py
+PLAYER_PATTERNS = {
+    'signature': re.compile(r'.*-(?P<id>[a-zA-Z0-9_-]+)(?:/watch_as3|/html5player)?\.[a-z]+$'),
+    'nsig': re.compile(r'.+/player/(?P<id>[a-zA-Z0-9_-]+)/.+.js$'),
+}
+
+
+def load_player(name, url, download):
+    fn = os.path.join(TESTDATA_DIR, 'player-%s-%s.js' % (name, PLAYER_PATTERNS[name].match(url).group('id')))
+    if not os.path.exists(fn):
+        if not download:
+            return None
+        compat_urlretrieve(url, fn)
+    with io.open(fn, encoding='utf-8') as f:
+        return f.read()
+
+
+def gen_cases(download):
+    """Yield (name, jscode, funcname, inputs) for each function to run"""
+    yield 'jsinterp nsig', NSIG_CODE, 'nsig', ['SLp9F5bwjAdhE9F-', 'oBo2h5euWy6osrUt', 'cu3wyu6LQn2hse']
+
+    ie = YoutubeIE(FakeYDL())
+    for name, tests, extract_function_name in (
+            ('signature', _SIG_TESTS, ie._extract_sig_function_name),
+            ('nsig', _NSIG_TESTS, ie._extract_n_function_name)):
+        for url, sig_input, _ in tests:
+            jscode = load_player(name, url, download)
+            if jscode is None:
+                continue
+            if isinstance(sig_input, int):
+                sig_input = string.printable[:sig_input]
+            yield '%s %s' % (name, PLAYER_PATTERNS[name].match(url).group('id')), jscode, extract_function_name(jscode), [sig_input]
+
+
+def build_function(jscode, funcname, compile_functions):
+    func = JSInterpreter(jscode, compile_functions=compile_functions).extract_function(funcname)
+    return lambda s: func([s])
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog [OPTIONS]',
+        description=(
+            'Compare the interpreted and the compiled functions of yt_dlp.jsinterp on the functions of '
+            'test/test_jsinterp.py and on the YouTube players of test/test_youtube_signature.py'))
+    parser.add_option(
+        '-r', '--rounds', type=int, default=20,
+        help='Number of calls of each function with each input (default: %default)')
+    parser.add_option(
+        '--download', action='store_true', default=False,
+        help='Download the players that are not in test/testdata yet')
+    options, args = parser.parse_args()
+
+    mismatches = 0
+    for name, jscode, funcname, inputs in gen_cases(options.download):
+        results, line = {}, []
+        for compile_functions in (False, True):
+            start = time.time()
+            func = build_function(jscode, funcname, compile_functions)
+            built = time.time()
+            for _ in range(options.rounds):
+                results[compile_functions] = [func(s) for s in inputs]
+            per_call = (time.time() - built) / options.rounds / len(inputs)
+            line.append('%s: build %7.2fms, %8.3fms/call' % (
+                'compiled' if compile_functions else 'interpreted', (built - start) * 1e3, per_call * 1e3))
+        print('%-32s %s' % (name, '  '.join(line)))
+        if results[False] != results[True]:
+            mismatches += 1
+            print('MISMATCH %s: %r (interpreted) != %r (compiled)' % (name, results[False], results[True]))
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
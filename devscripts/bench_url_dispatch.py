@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+from __future__ import unicode_literals
+
+import optparse
+import os
+import sys
+import time
+
+
+# Import yt_dlp
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT_DIR)
+from test.helper import gettestcases
+from yt_dlp.extractor import _LAZY_LOADER, gen_extractor_classes, gen_url_index
+from yt_dlp.extractor.urlindex import URLDispatcher, build_url_index
+
+
+def first_match(candidates, url):
+    for ie_key, ie in candidates:
+        if ie.suitable(url):
+            return ie_key
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog [OPTIONS]',
+        description=(
+            'Compare the extractor matching of the linear scan and of the URL index '
+            'on the URLs of the extractor tests (the corpus of test/test_all_urls.py)'))
+    parser.add_option(
+        '-r', '--rounds', type=int, default=3,
+        help='Number of times each dispatch is run over the corpus (default: %default)')
+    options, args = parser.parse_args()
+
+    ies = {ie.ie_key(): ie for ie in gen_extractor_classes()}
+    url_index = gen_url_index()
+    if not url_index:
+        print('Lazy extractors are not available%s; building the URL index now' % (
+            '' if _LAZY_LOADER else ' (run devscripts/make_lazy_extractors.py)'))
+        start = time.time()
+        url_index = build_url_index(ies.values())
+        print('Built the index in %.2fs' % (time.time() - start))
+    dispatcher = URLDispatcher(ies, url_index)
+    print('%d of %d extractors are indexed' % (
+        sum(URLDispatcher.indexed_suffixes(ie, url_index) is not None for ie in ies.values()), len(ies)))
+
+    urls = [tc['url'] for tc in gettestcases(include_onlymatching=True)]
+    # Compile all the regexes beforehand, so that only the dispatch is measured
+    for url in urls:
+        first_match(ies.items(), url)
+
+    results = {}
+    for name, get_candidates in (
+            ('linear', lambda url: ies.items()),
+            ('indexed', dispatcher.candidates)):
+        start = time.time()
+        for _ in range(options.rounds):
+            results[name] = [first_match(get_candidates(url), url) for url in urls]
+        elapsed = (time.time() - start) / options.rounds
+        print('%-8s %8.3fs for %d URLs (%.1f us/URL)' % (name, elapsed, len(urls), elapsed / len(urls) * 1e6))
+
+    mismatches = [
+        (url, linear, indexed) for url, linear, indexed in zip(urls, results['linear'], results['indexed'])
+        if linear != indexed]
+    for url, linear, indexed in mismatches:
+        print('MISMATCH %s: %s (linear) != %s (indexed)' % (url, linear, indexed))
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+from __future__ import unicode_literals
+
+import optparse
+import os
+import sys
+
+
+# Import yt_dlp
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT_DIR)
+from yt_dlp.archive import convert_download_archive
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog SOURCE DEST',
+        description=(
+            'Copy a download archive, dropping duplicate and blank entries. '
+            'Archives with a .db, .sqlite or .sqlite3 extension are SQLite databases, others are text files. '
+            'Use the same text file as SOURCE and DEST to compact it in place'))
+    options, args = parser.parse_args()
+    if len(args) != 2:
+        parser.error('Expected a source and a destination archive')
+
+    src, dest = args
+    if not os.path.exists(src):
+        parser.error('%s does not exist' % src)
+    count = convert_download_archive(src, dest)
+    print('Wrote %d entries to %s' % (count, dest))
+
+
+if __name__ == '__main__':
+    main()
@@ -22,6 +22,7 @@ if os.path.exists(plugins_dirname):
 
 from yt_dlp.extractor import _ALL_CLASSES
 from yt_dlp.extractor.common import InfoExtractor, SearchInfoExtractor
+from yt_dlp.extractor.urlindex import build_url_index
 
 if os.path.exists(plugins_blocked_dirname):
     os.rename(plugins_blocked_dirname, plugins_dirname)
@@ -80,7 +81,10 @@ def build_lazy_ie(ie, name):
         s += f'    _VALID_URL = {valid_url!r}\n'
     if not ie._WORKING:
         s += '    _WORKING = False\n'
-    if ie.suitable.__func__ is not InfoExtractor.suitable.__func__:
+    if getattr(ie, '_SELF_HOSTED', False):
+        # suitable() of self-hosted extractors needs their instance lists
+        s += '\n    @classmethod\n    def suitable(cls, url):\n        return cls._get_real_class().suitable(url)\n'
+    elif ie.suitable.__func__ is not InfoExtractor.suitable.__func__:
         s += f'\n{getsource(ie.suitable)}'
     return s
 
@@ -118,6 +122,11 @@ for ie in ordered_cls:
 module_contents.append(
     '\n_ALL_CLASSES = [{0}]'.format(', '.join(names)))
 
+url_index = build_url_index(_ALL_CLASSES)
+module_contents.append(
+    '\n_URL_INDEX = {%s}' % ', '.join(
+        '%r: %r' % (name, url_index[name]) for name in names if name in url_index))
+
 module_src = '\n'.join(module_contents) + '\n'
 
 with io.open(lazy_extractors_filename, 'wt', encoding='utf-8') as f:
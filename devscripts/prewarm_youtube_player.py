@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+from __future__ import unicode_literals
+
+import optparse
+import os
+import sys
+
+
+# Import yt_dlp
+ROOT_DIR = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT_DIR)
+from yt_dlp import YoutubeDL
+
+
+def main():
+    parser = optparse.OptionParser(
+        usage='%prog [OPTIONS] [PLAYER_URL...]',
+        description=(
+            'Store the n parameter functions of YouTube players in the cache directory, so that '
+            'yt-dlp processes sharing it do not need to download the players. '
+            'Without PLAYER_URL, the current player is used'))
+    parser.add_option(
+        '--cache-dir', metavar='DIR', dest='cachedir',
+        help='Cache directory to fill (default: the default cache directory of yt-dlp)')
+    parser.add_option(
+        '-v', '--verbose', action='store_true', default=False,
+        help='Print debugging information')
+    options, args = parser.parse_args()
+
+    with YoutubeDL({'cachedir': options.cachedir, 'verbose': options.verbose}) as ydl:
+        ie = ydl.get_info_extractor('Youtube')
+        player_urls = args or [ie._download_player_url('prewarm', fatal=True)]
+        for player_url in player_urls:
+            if ie._prewarm_player('prewarm', player_url):
+                ydl.to_screen('Stored the n function of %s' % ie._extract_player_info(player_url))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,13 +5,14 @@ from __future__ import unicode_literals
 # Allow direct execution
 import io
 import os
+import shutil
 import sys
 import unittest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from test.helper import FakeYDL, expect_dict, expect_value, http_server_port
-from yt_dlp.compat import compat_etree_fromstring, compat_http_server
-from yt_dlp.extractor.common import InfoExtractor
+from yt_dlp.compat import compat_etree_fromstring, compat_http_server, compat_urllib_error
+from yt_dlp.extractor.common import InfoExtractor, SelfHostedInfoExtractor
 from yt_dlp.extractor import YoutubeIE, get_info_extractor
 from yt_dlp.utils import encode_data_uri, strip_jsonp, ExtractorError, RegexNotFoundError
 import threading
@@ -1568,5 +1569,83 @@ jwplayer("mediaplayer").setup({"abouttext":"Visit Indie DB","aboutlink":"http:\/
         self.assertEqual(content, TEAPOT_RESPONSE_BODY)
 
 
+class DummySelfHostedIE(SelfHostedInfoExtractor):
+    _INSTANCE_LIST = ('listed.example', )
+    _DYNAMIC_INSTANCE_LIST = set()
+    _NODEINFO_SOFTWARE = ('dummy', )
+    _SOFTWARE_NAME = 'Dummy'
+
+    def __init__(self, downloader, nodeinfo):
+        super().__init__(downloader)
+        self._nodeinfo = nodeinfo
+        self.requests = []
+
+    def _download_json(self, url, video_id, *args, **kwargs):
+        self.requests.append(url)
+        hostname = video_id
+        if hostname not in self._nodeinfo:
+            raise ExtractorError('Unable to download JSON metadata', cause=compat_urllib_error.HTTPError(
+                url, 404, 'Not Found', {}, None))
+        if self._nodeinfo[hostname] is None:
+            raise ExtractorError('Unable to download JSON metadata', cause=compat_urllib_error.URLError('timed out'))
+        if url.endswith('/.well-known/nodeinfo'):
+            return {'links': [{'href': 'https://%s/nodeinfo/2.0' % hostname}]}
+        return {'software': {'name': self._nodeinfo[hostname]}}
+
+
+class TestSelfHostedInfoExtractor(unittest.TestCase):
+    def setUp(self):
+        self.cachedir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'testdata', 'selfhosted_cache')
+        self.tearDown()
+
+    def tearDown(self):
+        SelfHostedInfoExtractor._NODEINFO_CACHE.clear()
+        SelfHostedInfoExtractor._NODEINFO_CACHE_LOADED.clear()
+        DummySelfHostedIE._DYNAMIC_INSTANCE_LIST.clear()
+        if os.path.exists(self.cachedir):
+            shutil.rmtree(self.cachedir)
+
+    def _test(self, ie, hostname):
+        return DummySelfHostedIE._test_selfhosted_instance(ie, hostname, False, None)
+
+    def test_nodeinfo_cache(self):
+        ydl = FakeYDL({'cachedir': self.cachedir})
+        ie = DummySelfHostedIE(ydl, {'good.example': 'dummy', 'other.example': 'mastodon'})
+        self.assertTrue(self._test(ie, 'listed.example'))
+        self.assertEqual(ie.requests, [])
+
+        self.assertTrue(self._test(ie, 'good.example'))
+        self.assertFalse(self._test(ie, 'other.example'))
+        self.assertFalse(self._test(ie, 'none.example'))
+        self.assertEqual(len(ie.requests), 5)
+        self.assertTrue(self._test(ie, 'good.example'))
+        self.assertFalse(self._test(ie, 'other.example'))
+        self.assertFalse(self._test(ie, 'none.example'))
+        self.assertEqual(len(ie.requests), 5)
+
+        # Both positive and negative results are loaded from the cache directory
+        SelfHostedInfoExtractor._NODEINFO_CACHE.clear()
+        SelfHostedInfoExtractor._NODEINFO_CACHE_LOADED.clear()
+        DummySelfHostedIE._DYNAMIC_INSTANCE_LIST.clear()
+        ie = DummySelfHostedIE(ydl, {})
+        self.assertTrue(self._test(ie, 'good.example'))
+        self.assertFalse(self._test(ie, 'other.example'))
+        self.assertFalse(self._test(ie, 'none.example'))
+        self.assertEqual(ie.requests, [])
+        self.assertEqual(DummySelfHostedIE._fetch_nodeinfo_software(ie, 'other.example'), 'mastodon')
+
+    def test_nodeinfo_transient_error(self):
+        ydl = FakeYDL({'cachedir': self.cachedir})
+        ie = DummySelfHostedIE(ydl, {'down.example': None})
+        self.assertFalse(self._test(ie, 'down.example'))
+        self.assertFalse(self._test(ie, 'down.example'))
+        # The failure is neither remembered nor stored
+        self.assertEqual(len(ie.requests), 2)
+        self.assertNotIn('down.example', ydl.cache.load_section(SelfHostedInfoExtractor._NODEINFO_CACHE_SECTION))
+
+        ie._nodeinfo['down.example'] = 'dummy'
+        self.assertTrue(self._test(ie, 'down.example'))
+
+
 if __name__ == '__main__':
     unittest.main()
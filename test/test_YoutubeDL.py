@@ -12,14 +12,18 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import copy
 import json
+import shutil
+import tempfile
+import threading
+import time
 
-from test.helper import FakeYDL, assertRegexpMatches
+from test.helper import FakeYDL, assertRegexpMatches, http_server_port
 from yt_dlp import YoutubeDL
-from yt_dlp.compat import compat_os_name, compat_setenv, compat_str, compat_urllib_error
+from yt_dlp.compat import compat_http_server, compat_os_name, compat_setenv, compat_str, compat_urllib_error
 from yt_dlp.extractor import YoutubeIE
 from yt_dlp.extractor.common import InfoExtractor
 from yt_dlp.postprocessor.common import PostProcessor
-from yt_dlp.utils import ExtractorError, int_or_none, match_filter_func, LazyList
+from yt_dlp.utils import ExtractorError, MaxDownloadsReached, int_or_none, match_filter_func, LazyList
 
 TEST_URL = 'http://localhost/sample.mp4'
 
@@ -548,6 +552,234 @@ class TestFormatSelection(unittest.TestCase):
         self.assertEqual(ydl._default_format_spec({'is_live': True}), 'best/bestvideo+bestaudio')
 
 
+class FormatsRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append((self.path, self.headers.get('Range')))
+        if self.path.startswith('/slow/'):
+            time.sleep(1)
+        if not self.path.startswith('/ok/'):
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(206)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Range', 'bytes 0-0/1000')
+        self.send_header('Content-Length', '1')
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(b'\0')
+
+    do_HEAD = do_GET
+
+
+class FormatsServerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.httpd = compat_http_server.ThreadingHTTPServer(('127.0.0.1', 0), FormatsRequestHandler)
+        cls.httpd.daemon_threads = True
+        cls.base_url = 'http://127.0.0.1:%d' % http_server_port(cls.httpd)
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def requests(self):
+        # Checks that were not needed may still be running from the previous tests
+        return [r for r in FormatsRequestHandler.requests if '/%s/' % self._testMethodName in r[0]]
+
+
+class TestCheckFormats(FormatsServerTestCase):
+    def make_formats(self, *kinds):
+        return [{
+            'format_id': str(i), 'url': '%s/%s/%s/%d' % (self.base_url, kind, self._testMethodName, i),
+            'protocol': 'http', 'ext': 'mp4', 'quality': i,
+        } for i, kind in enumerate(kinds)]
+
+    def test_check_formats(self):
+        ydl = YDL()
+        formats = self.make_formats('missing', 'ok', 'missing', 'ok', 'ok')
+        self.assertEqual([f['format_id'] for f in ydl._check_formats(formats)], ['1', '3', '4'])
+        self.assertTrue(all(r == 'bytes=0-0' for _, r in self.requests()))
+        self.assertEqual(len(self.requests()), 5)
+
+        # The results are kept for the rest of the run
+        self.assertEqual([f['format_id'] for f in ydl._check_formats(formats[:2])], ['1'])
+        self.assertEqual(len(self.requests()), 5)
+
+    def test_early_cutoff(self):
+        ydl = YDL({'check_formats': 'selected', 'format': 'best'})
+        formats = self.make_formats(*['ok'] * 20 + ['missing'] * 2)
+        ydl.process_ie_result(_make_result(formats))
+        self.assertEqual(ydl.downloaded_info_dicts[0]['format_id'], '19')
+        # Only the formats within the window of concurrent checks are requested
+        self.assertLessEqual(len(self.requests()), ydl._FORMAT_CHECK_WORKERS + 2)
+
+    def test_test_download(self):
+        tested = []
+
+        class TestDownloadYDL(YDL):
+            def _test_download_format(self, f):
+                tested.append(f['format_id'])
+                return f['format_id'] != '0'
+
+        ydl = TestDownloadYDL()
+        formats = self.make_formats('ok', 'ok')
+        formats[0]['protocol'] = 'm3u8_native'
+        self.assertEqual([f['format_id'] for f in ydl._check_formats(formats)], ['1'])
+        self.assertEqual(tested, ['0'])
+        self.assertEqual(len(self.requests()), 1)
+
+
+class TestCheckThumbnails(FormatsServerTestCase):
+    def make_thumbnails(self, *urls):
+        return [{'id': str(i), 'url': url, 'preference': i} for i, url in enumerate(urls)]
+
+    def test_check_thumbnails(self):
+        ydl = YDL({'check_formats': True})
+        url = '%s/%%s/%s/%%d.jpg' % (self.base_url, self._testMethodName)
+        info = {'thumbnails': self.make_thumbnails(*(url % ('ok', i) for i in range(30)), url % ('missing', 30))}
+        ydl._sanitize_thumbnails(info)
+        self.assertEqual(info['thumbnails'][-1]['id'], '29')
+        # Only the best thumbnails within the window of concurrent checks are requested
+        self.assertLessEqual(len(self.requests()), ydl._THUMBNAIL_CHECK_WORKERS + 1)
+        self.assertTrue(all(r[0].endswith('.jpg') for r in self.requests()))
+
+        info = {'thumbnails': self.make_thumbnails(url % ('ok', 29), url % ('ok', 28))}
+        ydl._sanitize_thumbnails(info)
+        self.assertEqual([t['id'] for t in info['thumbnails']], ['0', '1'])
+        self.assertLessEqual(len(self.requests()), ydl._THUMBNAIL_CHECK_WORKERS + 1)
+
+    def test_dead_host(self):
+        ydl = YDL({'check_formats': True})
+        # Nothing listens on the port of a closed server
+        httpd = compat_http_server.HTTPServer(('127.0.0.1', 0), FormatsRequestHandler)
+        dead_host = '127.0.0.1:%d' % http_server_port(httpd)
+        httpd.server_close()
+        dead_url = 'http://%s/%%d.jpg' % dead_host
+        ok_url = '%s/ok/%s/0.jpg' % (self.base_url, self._testMethodName)
+
+        info = {'thumbnails': self.make_thumbnails(ok_url, dead_url % 1)}
+        ydl._sanitize_thumbnails(info)
+        self.assertEqual([t['id'] for t in info['thumbnails']], ['0'])
+        self.assertEqual(ydl._dead_thumbnail_hosts, {dead_host})
+
+        info = {'thumbnails': self.make_thumbnails(ok_url, dead_url % 2)}
+        ydl._sanitize_thumbnails(info)
+        self.assertEqual([t['id'] for t in info['thumbnails']], ['0'])
+        self.assertIn('[info] Skipping thumbnail 1 since %s could not be connected to' % dead_host, ydl.msgs)
+
+    def test_timeout(self):
+        ydl = YDL({'check_formats': True, 'socket_timeout': 0.2})
+        url = '%s/%%s/%s/%%d.jpg' % (self.base_url, self._testMethodName)
+        info = {'thumbnails': self.make_thumbnails(url % ('ok', 0), url % ('slow', 1))}
+        ydl._sanitize_thumbnails(info)
+        self.assertEqual([t['id'] for t in info['thumbnails']], ['0'])
+        # A single timeout does not mark the host as dead
+        self.assertEqual(ydl._dead_thumbnail_hosts, set())
+        info = {'thumbnails': self.make_thumbnails(url % ('ok', 2))}
+        ydl._sanitize_thumbnails(info)
+        self.assertEqual([t['id'] for t in info['thumbnails']], ['0'])
+
+
+class TestPlaylistPipeline(unittest.TestCase):
+    def setUp(self):
+        self.main_thread = threading.current_thread()
+        self.events = []
+        self.extractors = []
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def add_extractors(self, ydl, video_ids):
+        test = self
+
+        class VideoIE(InfoExtractor):
+            _VALID_URL = r'video:(?P<id>\d+)'
+
+            def _real_extract(self, url):
+                video_id = self._match_id(url)
+                test.events.append(('extract', video_id, threading.current_thread() is test.main_thread))
+                test.extractors.append(self)
+                return {'id': video_id, 'title': 'Video %s' % video_id, 'url': TEST_URL, 'ext': 'mp4'}
+
+        class PlaylistIE(InfoExtractor):
+            _VALID_URL = r'playlist:'
+
+            def _real_extract(self, url):
+                return self.playlist_result(
+                    self.url_result('video:%s' % i, VideoIE.ie_key(), i) for i in video_ids)
+
+        ydl.add_info_extractor(VideoIE(ydl))
+        ydl.add_info_extractor(PlaylistIE(ydl))
+
+    def test_prefetch(self):
+        ydl = YDL({'playlist_prefetch': 2})
+        self.add_extractors(ydl, '12345')
+        ydl.extract_info('playlist:')
+
+        self.assertEqual(
+            [(info['id'], info['playlist_index']) for info in ydl.downloaded_info_dicts],
+            [(compat_str(i), i) for i in range(1, 6)])
+        self.assertEqual(sorted(video_id for _, video_id, _ in self.events), list('12345'))
+        # Only the first video is not extracted ahead of time
+        self.assertEqual([video_id for _, video_id, in_main in self.events if in_main], ['1'])
+        self.assertEqual(ydl._prefetched_extractions, {})
+        # The extractions in the background do not share the extractor instance
+        self.assertEqual(len(set(map(id, self.extractors))), 5)
+        self.assertTrue(any(ie is ydl.get_info_extractor('Video') for ie in self.extractors))
+
+    def test_postprocess_in_background(self):
+        test = self
+
+        class _YDL(FakeYDL):
+            def dl(self, name, info, *args, **kwargs):
+                test.events.append(('download', info['id'], threading.current_thread() is test.main_thread))
+                with open(name, 'w') as f:
+                    f.write('video')
+                return True, True
+
+        class SlowPP(PostProcessor):
+            def run(self, info):
+                time.sleep(0.2)
+                # The video must not be recorded before it has been post-processed
+                test.assertNotIn(ydl._make_archive_id(info), ydl.archive)
+                test.events.append(('postprocess', info['id'], threading.current_thread() is test.main_thread))
+                return [], info
+
+        archive = os.path.join(self.tmpdir, 'archive.txt')
+        ydl = _YDL({
+            'playlist_prefetch': 1,
+            'outtmpl': os.path.join(self.tmpdir, '%(id)s.%(ext)s'),
+            'download_archive': archive,
+            'max_downloads': 3,
+        })
+        ydl.add_post_processor(SlowPP(ydl))
+        self.add_extractors(ydl, '12134')
+        with self.assertRaises(MaxDownloadsReached):
+            ydl.extract_info('playlist:')
+
+        events = [event for event in self.events if event[0] != 'extract']
+        # The second occurrence of video 1 is skipped once it has been recorded in the archive
+        self.assertEqual(sorted(events), [
+            ('download', '1', True), ('download', '2', True), ('download', '3', True),
+            ('postprocess', '1', False), ('postprocess', '2', False), ('postprocess', '3', False)])
+        self.assertLess(events.index(('download', '2', True)), events.index(('postprocess', '1', False)))
+        self.assertIsNone(ydl._postprocessing_worker)
+        self.assertEqual(ydl._postprocessing_jobs, [])
+        ydl.archive.close()
+        with open(archive) as f:
+            self.assertEqual(f.read().split('\n'), ['video 1', 'video 2', 'video 3', ''])
+        self.assertFalse(any(os.path.exists('video_%s.lock' % i) for i in '1234'))
+
+
 class TestYoutubeDL(unittest.TestCase):
     def test_subtitles(self):
         def s_formats(lang, autocaption=False):
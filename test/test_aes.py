@@ -16,15 +16,20 @@ from yt_dlp.aes import (
     aes_cbc_decrypt_bytes,
     aes_cbc_encrypt,
     aes_ctr_decrypt,
+    aes_ctr_decrypt_bytes,
     aes_ctr_encrypt,
     aes_gcm_decrypt_and_verify,
     aes_gcm_decrypt_and_verify_bytes,
     aes_decrypt_text,
     BLOCK_SIZE_BYTES,
+    _aes_cbc_decrypt_fast,
+    _aes_ctr_encrypt_fast,
+    _aes_gcm_decrypt_and_verify_fast,
+    _get_numpy,
 )
-from yt_dlp.compat import compat_pycrypto_AES
 from yt_dlp.utils import bytes_to_intlist, intlist_to_bytes
 import base64
+import random
 
 # the encrypted data can be generate with 'devscripts/generate_aes_testdata.py'
 
@@ -45,9 +50,10 @@ class TestAES(unittest.TestCase):
         data = b'\x97\x92+\xe5\x0b\xc3\x18\x91ky9m&\xb3\xb5@\xe6\x27\xc2\x96.\xc8u\x88\xab9-[\x9e|\xf1\xcd'
         decrypted = intlist_to_bytes(aes_cbc_decrypt(bytes_to_intlist(data), self.key, self.iv))
         self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
-        if compat_pycrypto_AES:
-            decrypted = aes_cbc_decrypt_bytes(data, intlist_to_bytes(self.key), intlist_to_bytes(self.iv))
-            self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
+        decrypted = aes_cbc_decrypt_bytes(data, intlist_to_bytes(self.key), intlist_to_bytes(self.iv))
+        self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
+        decrypted = _aes_cbc_decrypt_fast(data, intlist_to_bytes(self.key), intlist_to_bytes(self.iv))
+        self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
 
     def test_cbc_encrypt(self):
         data = bytes_to_intlist(self.secret_msg)
@@ -57,8 +63,10 @@ class TestAES(unittest.TestCase):
             b'\x97\x92+\xe5\x0b\xc3\x18\x91ky9m&\xb3\xb5@\xe6\'\xc2\x96.\xc8u\x88\xab9-[\x9e|\xf1\xcd')
 
     def test_ctr_decrypt(self):
-        data = bytes_to_intlist(b'\x03\xc7\xdd\xd4\x8e\xb3\xbc\x1a*O\xdc1\x12+8Aio\xd1z\xb5#\xaf\x08')
-        decrypted = intlist_to_bytes(aes_ctr_decrypt(data, self.key, self.iv))
+        data = b'\x03\xc7\xdd\xd4\x8e\xb3\xbc\x1a*O\xdc1\x12+8Aio\xd1z\xb5#\xaf\x08'
+        decrypted = intlist_to_bytes(aes_ctr_decrypt(bytes_to_intlist(data), self.key, self.iv))
+        self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
+        decrypted = aes_ctr_decrypt_bytes(data, intlist_to_bytes(self.key), intlist_to_bytes(self.iv))
         self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
 
     def test_ctr_encrypt(self):
@@ -75,10 +83,15 @@ class TestAES(unittest.TestCase):
         decrypted = intlist_to_bytes(aes_gcm_decrypt_and_verify(
             bytes_to_intlist(data), self.key, bytes_to_intlist(authentication_tag), self.iv[:12]))
         self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
-        if compat_pycrypto_AES:
-            decrypted = aes_gcm_decrypt_and_verify_bytes(
-                data, intlist_to_bytes(self.key), authentication_tag, intlist_to_bytes(self.iv[:12]))
-            self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
+        decrypted = aes_gcm_decrypt_and_verify_bytes(
+            data, intlist_to_bytes(self.key), authentication_tag, intlist_to_bytes(self.iv[:12]))
+        self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
+        decrypted = _aes_gcm_decrypt_and_verify_fast(
+            data, intlist_to_bytes(self.key), authentication_tag, intlist_to_bytes(self.iv[:12]))
+        self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
+        self.assertRaises(
+            ValueError, _aes_gcm_decrypt_and_verify_fast,
+            data, intlist_to_bytes(self.key), authentication_tag[::-1], intlist_to_bytes(self.iv[:12]))
 
     def test_decrypt_text(self):
         password = intlist_to_bytes(self.key).decode('utf-8')
@@ -110,6 +123,48 @@ class TestAES(unittest.TestCase):
         decrypted = intlist_to_bytes(aes_ecb_decrypt(data, self.key, self.iv))
         self.assertEqual(decrypted.rstrip(b'\x08'), self.secret_msg)
 
+    def test_fast_implementation(self):
+        rng = random.Random(0)
+        for key_size in (16, 24, 32):
+            key = [rng.randrange(256) for _ in range(key_size)]
+            iv = [rng.randrange(256) for _ in range(BLOCK_SIZE_BYTES)]
+            # Data ending with a partial block
+            data = [rng.randrange(256) for _ in range(5 * BLOCK_SIZE_BYTES + 3)]
+            args = tuple(map(intlist_to_bytes, (data, key, iv)))
+            self.assertEqual(
+                _aes_cbc_decrypt_fast(*args, use_numpy=False), intlist_to_bytes(aes_cbc_decrypt(data, key, iv)))
+            self.assertEqual(_aes_ctr_encrypt_fast(*args), intlist_to_bytes(aes_ctr_encrypt(data, key, iv)))
+            # Counter overflow
+            iv = [0xFF] * BLOCK_SIZE_BYTES
+            self.assertEqual(
+                _aes_ctr_encrypt_fast(*args[:2], intlist_to_bytes(iv)),
+                intlist_to_bytes(aes_ctr_encrypt(data, key, iv)))
+
+    def test_gcm_decrypt_long_nonce(self):
+        # Generated with pycryptodome
+        data = (
+            b'X\xaf\xc4a\xa4K\x15\xe8>Ct\xab/O8\x92\xe5\xea$R4\xef\xa1\x01\xe1D")\x8a\xac\xd3\xf7\xe5\xb4F\x99'
+            b'\x85S\x95/n\xf25\xd3\xfd\xfel\xd0\x1b\x1a~\x1f\x14\xb4{\x1f\xe1\xf7^&\xc8\xe7E-\x1d\xa8\x01<\xad\x00\xaeP')
+        authentication_tag = b'`\xed\xd4\xb8QI\xcbUm&\xda\xc0\x13\x1a\xf8+'
+        nonce = list(range(16))
+
+        decrypted = intlist_to_bytes(aes_gcm_decrypt_and_verify(
+            bytes_to_intlist(data), self.key, bytes_to_intlist(authentication_tag), nonce))
+        self.assertEqual(decrypted, self.secret_msg * 3)
+        decrypted = _aes_gcm_decrypt_and_verify_fast(
+            data, intlist_to_bytes(self.key), authentication_tag, intlist_to_bytes(nonce))
+        self.assertEqual(decrypted, self.secret_msg * 3)
+
+    @unittest.skipUnless(_get_numpy(), 'numpy is not available')
+    def test_cbc_decrypt_numpy(self):
+        rng = random.Random(0)
+        for key_size in (16, 24, 32):
+            key = bytes(rng.randrange(256) for _ in range(key_size))
+            iv = bytes(rng.randrange(256) for _ in range(BLOCK_SIZE_BYTES))
+            data = bytes(rng.randrange(256) for _ in range(1000 * BLOCK_SIZE_BYTES + 7))
+            self.assertEqual(
+                _aes_cbc_decrypt_fast(data, key, iv), _aes_cbc_decrypt_fast(data, key, iv, use_numpy=False))
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -14,9 +14,11 @@ from test.helper import gettestcases
 
 from yt_dlp.extractor import (
     FacebookIE,
+    gen_extractor_classes,
     gen_extractors,
     YoutubeIE,
 )
+from yt_dlp.extractor.urlindex import URLDispatcher, build_url_index, hostname_suffixes
 
 
 class TestAllURLsMatching(unittest.TestCase):
@@ -122,6 +124,25 @@ class TestAllURLsMatching(unittest.TestCase):
                 len(ie_list), 1,
                 'Multiple extractors with the same IE_NAME "%s" (%s)' % (ie_name, ', '.join(ie_list)))
 
+    def test_hostname_suffixes(self):
+        self.assertEqual(hostname_suffixes(r'https?://(?:www\.)?example\.(?:com|org)/(?P<id>\d+)'), (
+            'example.com', 'example.org', 'www.example.com', 'www.example.org'))
+        self.assertEqual(hostname_suffixes(r'https?://[^/]+\.example\.com/'), ('.example.com', ))
+        self.assertEqual(hostname_suffixes(r'examplesearch(?P<prefix>\d*):(?P<query>.+)'), ())
+        # The hostname may continue after the end of the pattern
+        self.assertIsNone(hostname_suffixes(r'https?://example\.com'))
+        self.assertIsNone(hostname_suffixes(r'https?://example.com/'))
+        self.assertIsNone(hostname_suffixes(r'(?:https?://)?.*example\.com/'))
+
+    def test_url_index(self):
+        ies = {ie.ie_key(): ie for ie in gen_extractor_classes()}
+        dispatcher = URLDispatcher(ies, build_url_index(ies.values()))
+        for tc in gettestcases(include_onlymatching=True):
+            url = tc['url']
+            self.assertEqual(
+                [ie_key for ie_key, ie in dispatcher.candidates(url) if ie.suitable(url)],
+                [ie_key for ie_key, ie in ies.items() if ie.suitable(url)], url)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# coding: utf-8
+
+from __future__ import unicode_literals
+
+import gc
+import shutil
+
+# Allow direct execution
+import os
+import sys
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+from test.helper import FakeYDL
+from yt_dlp import YoutubeDL
+from yt_dlp.archive import (
+    SQLITE_AVAILABLE,
+    SQLiteDownloadArchive,
+    TextDownloadArchive,
+    convert_download_archive,
+    open_download_archive,
+)
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'testdata', 'archive_test')
+
+
+class TestDownloadArchive(unittest.TestCase):
+    def setUp(self):
+        self.tearDown()
+        os.makedirs(TEST_DIR)
+
+    def tearDown(self):
+        if os.path.exists(TEST_DIR):
+            shutil.rmtree(TEST_DIR)
+
+    def _path(self, name):
+        return os.path.join(TEST_DIR, name)
+
+    def _read(self, name):
+        with open(self._path(name), encoding='utf-8') as f:
+            return f.read()
+
+    def test_text(self):
+        archive = open_download_archive(self._path('archive.txt'))
+        self.assertIsInstance(archive, TextDownloadArchive)
+        archive.add('youtube a')
+        self.assertEqual(self._read('archive.txt'), 'youtube a\n')
+        archive.close()
+        archive = open_download_archive(self._path('archive.txt'), batch_size=2)
+        self.assertIn('youtube a', archive)
+        archive.add('youtube b')
+        self.assertIn('youtube b', archive)
+        self.assertEqual(self._read('archive.txt'), 'youtube a\n')
+        archive.close()
+        self.assertEqual(self._read('archive.txt'), 'youtube a\nyoutube b\n')
+
+    @unittest.skipUnless(SQLITE_AVAILABLE, 'sqlite3 is not available')
+    def test_sqlite(self):
+        archive = open_download_archive(self._path('archive.sqlite'), batch_size=2)
+        self.assertIsInstance(archive, SQLiteDownloadArchive)
+        archive.add('youtube a')
+        self.assertIn('youtube a', archive)
+        archive.add('youtube b')
+        archive.add('youtube c')
+        archive.close()
+        archive = open_download_archive(self._path('archive.sqlite'))
+        self.assertEqual(sorted(archive), ['youtube a', 'youtube b', 'youtube c'])
+        self.assertNotIn('youtube d', archive)
+        archive.close()
+        # Databases are recognized regardless of their extension
+        os.rename(self._path('archive.sqlite'), self._path('archive'))
+        archive = open_download_archive(self._path('archive'))
+        self.assertIsInstance(archive, SQLiteDownloadArchive)
+        archive.close()
+
+    @unittest.skipUnless(SQLITE_AVAILABLE, 'sqlite3 is not available')
+    def test_convert(self):
+        with open(self._path('archive.txt'), 'w', encoding='utf-8') as f:
+            f.write('youtube b\nyoutube a\n\nyoutube b\n')
+        self.assertEqual(convert_download_archive(self._path('archive.txt'), self._path('archive.db')), 2)
+        self.assertEqual(convert_download_archive(self._path('archive.txt'), self._path('archive.txt')), 2)
+        self.assertEqual(self._read('archive.txt'), 'youtube a\nyoutube b\n')
+        self.assertEqual(convert_download_archive(self._path('archive.db'), self._path('back.txt')), 2)
+        self.assertEqual(self._read('back.txt'), 'youtube a\nyoutube b\n')
+
+    @unittest.skipUnless(SQLITE_AVAILABLE, 'sqlite3 is not available')
+    def test_youtubedl(self):
+        params = {'download_archive': self._path('archive.sqlite')}
+        with FakeYDL(params) as ydl:
+            info = {'id': 'a', 'extractor_key': 'Youtube'}
+            self.assertFalse(ydl.in_download_archive(info))
+            ydl.record_download_archive(info)
+            self.assertTrue(ydl.in_download_archive(info))
+        with FakeYDL(params) as ydl:
+            self.assertTrue(ydl.in_download_archive({'id': 'a', 'ie_key': 'Youtube'}))
+
+    def test_youtubedl_batch(self):
+        ydl = YoutubeDL({
+            'download_archive': self._path('archive.txt'),
+            'download_archive_batch_size': 10,
+            'quiet': True,
+        })
+        ydl.record_download_archive({'id': 'a', 'extractor_key': 'Youtube'})
+        self.assertFalse(os.path.exists(self._path('archive.txt')))
+        # Written when download() returns
+        ydl.download([])
+        self.assertEqual(self._read('archive.txt'), 'youtube a\n')
+        # or when the object is collected without having been closed
+        ydl.record_download_archive({'id': 'b', 'extractor_key': 'Youtube'})
+        del ydl
+        gc.collect()
+        self.assertEqual(self._read('archive.txt'), 'youtube a\nyoutube b\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@
 from __future__ import unicode_literals
 
 import shutil
+import time
 
 # Allow direct execution
 import os
@@ -13,7 +14,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
 from test.helper import FakeYDL
-from yt_dlp.cache import Cache
+from yt_dlp.cache import SQLITE_AVAILABLE, Cache
+from yt_dlp.utils import write_json_file
 
 
 def _is_empty(d):
@@ -54,6 +56,70 @@ class TestCache(unittest.TestCase):
         self.assertFalse(os.path.exists(self.test_dir))
         self.assertEqual(c.load('test_cache', 'k.'), None)
 
+    @unittest.skipUnless(SQLITE_AVAILABLE, 'sqlite3 is not available')
+    def test_ttl(self):
+        c = Cache(FakeYDL({'cachedir': self.test_dir}))
+        c.store('test_cache', 'short', 1, ttl=-1)
+        c.store('test_cache', 'long', 2, ttl=3600)
+        Cache._close(self.test_dir)
+        self.assertEqual(c.load('test_cache', 'short'), None)
+        self.assertEqual(c.load('test_cache', 'long'), 2)
+        c.remove()
+
+    @unittest.skipUnless(SQLITE_AVAILABLE, 'sqlite3 is not available')
+    def test_eviction(self):
+        c = Cache(FakeYDL({'cachedir': self.test_dir, 'cache_max_size': 100}))
+        # Replacing an entry does not count its old size
+        c.store('test_cache', 'a', 'x' * 40)
+        c.store('test_cache', 'a', 'y' * 40)
+        c.store('test_cache', 'b', 'x' * 40)
+        self.assertEqual(c.load_section('test_cache'), {'a': 'y' * 40, 'b': 'x' * 40})
+        self.assertEqual(Cache._total_sizes[self.test_dir], 84)
+        Cache._close(self.test_dir)
+        for key in ('a', 'b', 'c'):
+            c.store('test_cache', key, 'x' * 40)
+            time.sleep(0.01)
+        Cache._close(self.test_dir)
+        self.assertEqual(c.load('test_cache', 'a'), None)
+        self.assertEqual(c.load('test_cache', 'b'), 'x' * 40)
+        self.assertEqual(c.load('test_cache', 'c'), 'x' * 40)
+        c.remove()
+
+    @unittest.skipUnless(SQLITE_AVAILABLE, 'sqlite3 is not available')
+    def test_json_files(self):
+        ydl = FakeYDL({'cachedir': self.test_dir})
+        os.makedirs(os.path.join(self.test_dir, 'test_cache'))
+        old_fn = os.path.join(self.test_dir, 'test_cache', 'old.json')
+        write_json_file({'x': 1}, old_fn)
+        c = Cache(ydl)
+        self.assertEqual(c.load('test_cache', 'old'), {'x': 1})
+        # The entry is moved to the database
+        self.assertTrue(os.path.exists(os.path.join(self.test_dir, Cache._DB_NAME)))
+        self.assertFalse(os.path.exists(old_fn))
+        Cache._close(self.test_dir)
+        self.assertEqual(c.load('test_cache', 'old'), {'x': 1})
+        c.remove()
+
+    def test_load_section(self):
+        c = Cache(FakeYDL({'cachedir': self.test_dir}))
+        self.assertEqual(c.load_section('test_cache'), {})
+        c.store('test_cache', 'a', 1)
+        c.store('test_cache', 'b', [2])
+        c.store('test_cache2', 'c', 3)
+        if SQLITE_AVAILABLE:
+            c.store('test_cache', 'expired', 4, ttl=-1)
+        self.assertEqual(c.load_section('test_cache'), {'a': 1, 'b': [2]})
+        c.remove()
+
+    def test_memory(self):
+        c = Cache(FakeYDL({'cachedir': self.test_dir}))
+        obj = {'x': [1]}
+        c.store('test_cache', 'k', obj)
+        loaded = c.load('test_cache', 'k')
+        loaded['x'].append(2)
+        self.assertEqual(c.load('test_cache', 'k'), obj)
+        c.remove()
+
 
 if __name__ == '__main__':
     unittest.main()
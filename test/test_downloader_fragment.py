@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+# coding: utf-8
+from __future__ import unicode_literals
+
+# Allow direct execution
+import concurrent.futures
+import os
+import random
+import re
+import sys
+import time
+import unittest
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from test.helper import http_server_port, try_rm
+from yt_dlp import YoutubeDL
+from yt_dlp.aes import aes_cbc_encrypt
+from yt_dlp.compat import compat_http_server
+from yt_dlp.downloader.async_fragment import AsyncFragmentEngine
+from yt_dlp.downloader.dash import DashSegmentsFD
+from yt_dlp.downloader.fragment import (
+    FragmentDecryptionStage,
+    FragmentProgress,
+    FragmentScheduler,
+    FragmentSpool,
+)
+from yt_dlp.utils import bytes_to_intlist, encodeFilename, intlist_to_bytes
+import threading
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+FRAGMENT_COUNT = 8
+FRAGMENT_SIZE = 4 * 1024
+KEY = IV = [0x20, 0x15] + 14 * [0]
+_ENCRYPTED = {}
+
+
+def fragment_data(index):
+    return bytes([index]) * FRAGMENT_SIZE
+
+
+def encrypted_fragment_data(index):
+    if index not in _ENCRYPTED:
+        # aes_cbc_encrypt does not add a padding block to whole blocks
+        padded = fragment_data(index) + bytes([16]) * 16
+        _ENCRYPTED[index] = intlist_to_bytes(aes_cbc_encrypt(bytes_to_intlist(padded), KEY, IV))
+    return _ENCRYPTED[index]
+
+
+class HTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    # Paths that were requested already; the first response of the "broken" kinds is broken
+    served = set()
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        mobj = re.match(r'^/(?P<kind>frag|enc|stall|chunked|garbage|whole)/(?P<index>\d+)$', self.path)
+        assert mobj
+        kind, index = mobj.group('kind', 'index')
+        data = encrypted_fragment_data(int(index)) if kind == 'enc' else fragment_data(int(index))
+        if kind == 'whole':
+            # The Range header is ignored
+            data = b''.join(fragment_data(i) for i in range(FRAGMENT_COUNT))
+        broken = self.path not in self.served
+        self.served.add(self.path)
+        if kind == 'garbage' and broken:
+            self.wfile.write(b'HTTP/1.1 2OO OK\r\n\r\n')
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        if kind == 'chunked':
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            body = b'%x\r\n%s\r\n0\r\n\r\n' % (len(data), data)
+            # The connection is closed in the middle of the chunk
+            self.wfile.write(body[:len(body) // 2] if broken else body)
+            return
+        self.send_header('Content-Length', len(data))
+        self.end_headers()
+        if kind == 'stall' and broken:
+            # The first response stalls halfway; the Range header of the retry is ignored
+            self.wfile.write(data[:len(data) // 2])
+            self.wfile.flush()
+            time.sleep(1)
+            return
+        self.wfile.write(data)
+
+
+class FakeLogger(object):
+    def debug(self, msg):
+        pass
+
+    def warning(self, msg):
+        pass
+
+    def error(self, msg):
+        pass
+
+
+class TestFragmentSpool(unittest.TestCase):
+    def test_spill(self):
+        spool = FragmentSpool(10)
+        first, second = spool.buffer(), spool.buffer()
+        first.write(b'12345678')
+        self.assertFalse(first.spilled)
+        second.write(b'abc')
+        second.write(b'def')
+        self.assertTrue(second.spilled)
+        self.assertEqual(first.read(), b'12345678')
+        self.assertEqual(second.read(), b'abcdef')
+        # The whole budget is available again once the buffers are read
+        third = spool.buffer()
+        third.write(b'0123456789')
+        self.assertFalse(third.spilled)
+        third.close()
+
+    def test_reset(self):
+        spool = FragmentSpool(10)
+        for size in (8, 20):
+            buf = spool.buffer()
+            buf.write(b'x' * size)
+            buf.reset()
+            buf.write(b'abcdefgh')
+            self.assertEqual(buf.spilled, size > 10)
+            self.assertEqual(buf.read(), b'abcdefgh')
+
+
+class TestFragmentScheduler(unittest.TestCase):
+    def test_order(self):
+        def func(item):
+            time.sleep(random.random() / 100)
+            return item
+
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            scheduler = FragmentScheduler(pool, func, 4)
+            self.assertEqual(list(scheduler.map(range(50))), list(range(50)))
+            self.assertGreaterEqual(scheduler.window, 4)
+            self.assertLessEqual(scheduler.window, 16)
+
+    def test_hedge(self):
+        class QuickFragmentScheduler(FragmentScheduler):
+            _HEDGE_MIN_DELAY = 0.1
+
+        calls = []
+        release = threading.Event()
+
+        def func(item):
+            calls.append(item)
+            if item == 0 and calls.count(0) == 1:
+                # The first request of the head fragment is stuck
+                release.wait(10)
+                return None
+            return item
+
+        start = time.time()
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            self.addCleanup(release.set)
+            scheduler = QuickFragmentScheduler(
+                pool, func, 4, hedge=True, is_success=lambda result: result is not None)
+            self.assertEqual(list(scheduler.map(range(10))), list(range(10)))
+            self.assertEqual(calls.count(0), 2)
+            self.assertLess(time.time() - start, 5)
+            release.set()
+
+
+class TestFragmentDecryptionStage(unittest.TestCase):
+    def test_order(self):
+        taken = []
+
+        def items():
+            for i in range(50):
+                taken.append(i)
+                yield i
+
+        def func(item):
+            time.sleep(random.random() / 100)
+            return item * 2
+
+        with concurrent.futures.ThreadPoolExecutor(4) as pool:
+            stage = FragmentDecryptionStage(pool, func, 8, needs_work=lambda item: item % 3)
+            for i, result in enumerate(stage.map(items())):
+                self.assertEqual(result, i * 2)
+                # Backpressure
+                self.assertLessEqual(len(taken), i + 8)
+            self.assertEqual(i, 49)
+
+
+class TestFragmentProgress(unittest.TestCase):
+    def test_aggregate(self):
+        progress = FragmentProgress(0, 0, 4)
+        progress.begin('a')
+        progress.begin('b')
+        progress.update('a', 'downloading', 100, 1000)
+        state = progress.update('b', 'downloading', 300, 1000)
+        self.assertEqual(state['downloaded_bytes'], 400)
+        self.assertEqual(state['active_fragments'], 2)
+        self.assertEqual(state['total_bytes_estimate'], 4000)
+        state = progress.update('a', 'finished', 1000, 1000)
+        self.assertEqual(state['downloaded_bytes'], 1300)
+        self.assertEqual(state['fragment_index'], 1)
+        self.assertEqual(state['active_fragments'], 1)
+        self.assertIsNotNone(state['eta'])
+        progress.end('b')
+        self.assertEqual(progress.update('c', 'finished', 500, 500)['downloaded_bytes'], 1500)
+        self.assertEqual(sorted(progress.latency_percentiles()), ['p50', 'p90', 'p99'])
+        progress.add_decryption_time(0.5)
+        self.assertEqual(progress.decryption_time, 0.5)
+
+
+class TestFragmentFD(unittest.TestCase):
+    def setUp(self):
+        self.httpd = compat_http_server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), HTTPTestRequestHandler)
+        self.port = http_server_port(self.httpd)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+    def download(self, params, encrypted=False, kind='frag'):
+        params['logger'] = FakeLogger()
+        ydl = YoutubeDL(params)
+
+        class TestDashSegmentsFD(DashSegmentsFD):
+            def _get_fragments(self, fmt, ctx):
+                for i, fragment in enumerate(super()._get_fragments(fmt, ctx)):
+                    if encrypted:
+                        fragment['url'] = fragment['url'].replace('/frag/', '/enc/')
+                        fragment['decrypt_info'] = {
+                            'METHOD': 'AES-128', 'KEY': intlist_to_bytes(KEY), 'IV': intlist_to_bytes(IV)}
+                    if kind == 'whole':
+                        fragment['byte_range'] = {'start': i * FRAGMENT_SIZE, 'end': (i + 1) * FRAGMENT_SIZE}
+                    yield fragment
+
+        downloader = TestDashSegmentsFD(ydl, params)
+        statuses = []
+        downloader.add_progress_hook(lambda s: statuses.append(dict(s)))
+        filename = 'testfile.mp4'
+        try_rm(encodeFilename(filename))
+        self.assertTrue(downloader.real_download(filename, {
+            'url': 'http://127.0.0.1:%d/manifest.mpd' % self.port,
+            'protocol': 'http_dash_segments',
+            'fragments': [
+                {'url': 'http://127.0.0.1:%d/%s/%d' % (self.port, kind, i)} for i in range(FRAGMENT_COUNT)],
+        }))
+        with open(encodeFilename(filename), 'rb') as f:
+            self.assertEqual(f.read(), b''.join(fragment_data(i) for i in range(FRAGMENT_COUNT)))
+        self.assertEqual([f for f in os.listdir('.') if f.startswith(filename + '.part-Frag')], [])
+        try_rm(encodeFilename(filename))
+        downloading = [s for s in statuses if s['status'] == 'downloading']
+        self.assertEqual(downloading[-1]['fragment_index'], FRAGMENT_COUNT)
+        if kind != 'frag':
+            return
+        self.assertEqual(
+            downloading[-1]['downloaded_bytes'],
+            sum(len(encrypted_fragment_data(i)) for i in range(FRAGMENT_COUNT)) if encrypted
+            else FRAGMENT_COUNT * FRAGMENT_SIZE)
+        self.assertIn('p50', statuses[-1]['fragment_latency'])
+        self.assertEqual(statuses[-1]['decryption_time'] > 0, encrypted)
+
+    def test_sequential(self):
+        self.download({})
+
+    def test_fragment_files(self):
+        self.download({'fragment_memory_limit': 0})
+        self.download({'fragment_memory_limit': 0, 'concurrent_fragment_downloads': 4})
+
+    def test_concurrent(self):
+        self.download({'concurrent_fragment_downloads': 4})
+
+    def test_concurrent_spill(self):
+        self.download({'concurrent_fragment_downloads': 4, 'fragment_memory_limit': FRAGMENT_SIZE})
+
+    def test_decryption(self):
+        self.download({}, encrypted=True)
+        self.download({'concurrent_fragment_downloads': 4}, encrypted=True)
+        self.download({'fragment_memory_limit': 0, 'concurrent_fragment_downloads': 4}, encrypted=True)
+
+    def test_restart_in_memory(self):
+        HTTPTestRequestHandler.served.clear()
+        self.download({
+            'concurrent_fragment_downloads': 4, 'socket_timeout': 0.3, 'retries': 1}, kind='stall')
+
+    def test_asyncio(self):
+        self.download({'fragment_engine': 'asyncio', 'proxy': ''})
+        self.download({'fragment_engine': 'asyncio', 'proxy': '', 'concurrent_fragment_downloads': 4})
+
+    def test_asyncio_byte_range(self):
+        self.download({'fragment_engine': 'asyncio', 'proxy': '', 'concurrent_fragment_downloads': 4}, kind='whole')
+
+    def test_asyncio_ratelimit(self):
+        start = time.time()
+        # Each fragment takes half a second
+        self.download({
+            'fragment_engine': 'asyncio', 'proxy': '', 'concurrent_fragment_downloads': 4,
+            'ratelimit': FRAGMENT_SIZE * 2})
+        self.assertGreater(time.time() - start, 0.9)
+
+    def test_asyncio_connection_params(self):
+        engine = AsyncFragmentEngine.get()
+        # Keep the connections alive
+        HTTPTestRequestHandler.protocol_version = 'HTTP/1.1'
+        self.addCleanup(setattr, HTTPTestRequestHandler, 'protocol_version', 'HTTP/1.0')
+        self.download({'fragment_engine': 'asyncio', 'proxy': '', 'nocheckcertificate': True})
+        key = ('http', '127.0.0.1', self.port)
+        self.assertTrue(engine._idle[key + engine._connection_key({'nocheckcertificate': True})])
+        # The connections are not used by instances with other connection parameters
+        self.assertFalse(engine._idle[key + engine._connection_key({})])
+
+    def test_asyncio_retry(self):
+        HTTPTestRequestHandler.served.clear()
+        for kind in ('chunked', 'garbage'):
+            self.download({
+                'fragment_engine': 'asyncio', 'proxy': '', 'concurrent_fragment_downloads': 4,
+                'fragment_retries': 1}, kind=kind)
+
+
+if __name__ == '__main__':
+    unittest.main()
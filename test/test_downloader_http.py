@@ -3,6 +3,7 @@
 from __future__ import unicode_literals
 
 # Allow direct execution
+import json
 import os
 import re
 import sys
@@ -20,9 +21,13 @@ TEST_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
 TEST_SIZE = 10 * 1024
+LARGE_TEST_DATA = bytes(range(256)) * (12 * 1024)
 
 
 class HTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    # Range headers of the requests to /large
+    ranges = []
+
     def log_message(self, format, *args):
         pass
 
@@ -53,8 +58,24 @@ class HTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
         self.end_headers()
         self.wfile.write(b'#' * size)
 
+    def serve_large(self):
+        start, end = 0, len(LARGE_TEST_DATA) - 1
+        mobj = re.search(r'^bytes=(\d+)-(\d+)', self.headers.get('Range') or '')
+        self.ranges.append(self.headers.get('Range'))
+        if mobj:
+            start, end = int(mobj.group(1)), int(mobj.group(2))
+        self.send_response(206 if mobj else 200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Content-Length', end - start + 1)
+        if mobj:
+            self.send_header('Content-Range', 'bytes %d-%d/%d' % (start, end, len(LARGE_TEST_DATA)))
+        self.end_headers()
+        self.wfile.write(LARGE_TEST_DATA[start:end + 1])
+
     def do_GET(self):
-        if self.path == '/regular':
+        if self.path == '/large':
+            self.serve_large()
+        elif self.path == '/regular':
             self.serve()
         elif self.path == '/no-content-length':
             self.serve(content_length=False)
@@ -110,6 +131,84 @@ class TestHttpFD(unittest.TestCase):
             'http_chunk_size': 1000,
         })
 
+    def test_multi_connection(self):
+        self.download_all({
+            'http_connections': 4,
+        })
+
+        params = {'http_connections': 4, 'logger': FakeLogger()}
+        downloader = HttpFD(YoutubeDL(params), params)
+        filename = 'testfile.mp4'
+        try_rm(encodeFilename(filename))
+        self.assertTrue(downloader.real_download(filename, {
+            'url': 'http://127.0.0.1:%d/large' % self.port,
+        }))
+        with open(encodeFilename(filename), 'rb') as f:
+            self.assertEqual(f.read(), LARGE_TEST_DATA)
+        try_rm(encodeFilename(filename))
+
+    def test_multi_connection_resume(self):
+        params = {'http_connections': 2, 'logger': FakeLogger()}
+        downloader = HttpFD(YoutubeDL(params), params)
+        filename = 'testfile.mp4'
+        try_rm(encodeFilename(filename))
+        total, half = len(LARGE_TEST_DATA), len(LARGE_TEST_DATA) // 2
+        # Simulate an interrupted download with half of each range done
+        with open(encodeFilename(filename + '.part'), 'wb') as f:
+            f.write(LARGE_TEST_DATA[:half // 2])
+            f.write(b'\0' * (half - half // 2))
+            f.write(LARGE_TEST_DATA[half:half + half // 2])
+            f.truncate(total)
+        with open(encodeFilename(filename + '.ytdl'), 'w') as f:
+            json.dump({'downloader': {'http_ranges': {
+                'total': total,
+                'ranges': [[0, half - 1, half // 2], [half, total - 1, half // 2]],
+            }}}, f)
+        self.assertTrue(downloader.real_download(filename, {
+            'url': 'http://127.0.0.1:%d/large' % self.port,
+        }))
+        with open(encodeFilename(filename), 'rb') as f:
+            self.assertEqual(f.read(), LARGE_TEST_DATA)
+        self.assertFalse(os.path.exists(encodeFilename(filename + '.ytdl')))
+        try_rm(encodeFilename(filename))
+
+    def download_large(self, params, info_dict={}):
+        params['logger'] = FakeLogger()
+        downloader = HttpFD(YoutubeDL(params), params)
+        HTTPTestRequestHandler.ranges = []
+        self.assertTrue(downloader.real_download('testfile.mp4', dict(info_dict, **{
+            'url': 'http://127.0.0.1:%d/large' % self.port,
+        })))
+        with open(encodeFilename('testfile.mp4'), 'rb') as f:
+            self.assertEqual(f.read(), LARGE_TEST_DATA)
+        self.assertFalse(os.path.exists(encodeFilename('testfile.mp4.ytdl')))
+        try_rm(encodeFilename('testfile.mp4'))
+
+    def write_preallocated_part(self, state=True):
+        total = len(LARGE_TEST_DATA)
+        try_rm(encodeFilename('testfile.mp4'))
+        with open(encodeFilename('testfile.mp4.part'), 'wb') as f:
+            f.truncate(total)
+        if state:
+            with open(encodeFilename('testfile.mp4.ytdl'), 'w') as f:
+                json.dump({'downloader': {'http_ranges': {'total': total, 'ranges': [[0, total - 1, 0]]}}}, f)
+
+    def test_multi_connection_resume_without_state(self):
+        # The .part file looks complete, but was only preallocated
+        self.write_preallocated_part(state=False)
+        self.download_large({'http_connections': 2})
+
+    def test_single_connection_after_preallocation(self):
+        self.write_preallocated_part()
+        self.download_large({'http_connections': 1})
+        self.assertEqual(HTTPTestRequestHandler.ranges, [None])
+
+    def test_connections_from_downloader_options(self):
+        self.download_large({}, {'downloader_options': {'http_connections': 2}})
+        self.assertEqual(HTTPTestRequestHandler.ranges[0], 'bytes=0-0')
+        self.download_large({'http_connections': 1}, {'downloader_options': {'http_connections': 2}})
+        self.assertEqual(HTTPTestRequestHandler.ranges, [None])
+
 
 if __name__ == '__main__':
     unittest.main()
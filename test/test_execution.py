@@ -10,6 +10,7 @@ import os
 import subprocess
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from yt_dlp.extractor import _LAZY_LOADER
 from yt_dlp.utils import encodeArgument
 
 rootDir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -39,6 +40,40 @@ class TestExecution(unittest.TestCase):
         _, stderr = p.communicate()
         self.assertFalse(stderr)
 
+    def test_deferred_imports(self):
+        deferred = [
+            'yt_dlp.cookies', 'yt_dlp.websocket',
+            'yt_dlp.downloader.external', 'yt_dlp.downloader.f4m', 'yt_dlp.downloader.niconico',
+            'yt_dlp.downloader.rtmp', 'yt_dlp.downloader.youtube_live_chat',
+            'yt_dlp.postprocessor.embedthumbnail', 'yt_dlp.postprocessor.exec', 'yt_dlp.postprocessor.ffmpeg',
+            'yt_dlp.postprocessor.metadataparser', 'yt_dlp.postprocessor.modify_chapters',
+            'yt_dlp.postprocessor.movefilesafterdownload', 'yt_dlp.postprocessor.sponsorblock']
+        if _LAZY_LOADER:
+            # Otherwise all the extractors are imported anyway
+            deferred.extend(('yt_dlp.extractor.adobepass', 'yt_dlp.extractor.openload'))
+        # Creating a YoutubeDL, and the startup of "yt-dlp -J" up to the download
+        for statement in (
+                'from yt_dlp import YoutubeDL; YoutubeDL()',
+                'import yt_dlp; yt_dlp.YoutubeDL.download = lambda self, url_list: 0\n'
+                'try:\n    yt_dlp._real_main(["--ignore-config", "-J", "https://example.com/video"])\n'
+                'except SystemExit:\n    pass'):
+            modules = subprocess.check_output([
+                sys.executable, '-c', statement + '\nimport sys; sys.stderr.write(" ".join(sys.modules))'],
+                cwd=rootDir, stderr=subprocess.STDOUT).decode().split()
+            self.assertFalse([module for module in deferred if module in modules], statement)
+
+        # The deferred attributes must still be importable
+        subprocess.check_call([
+            sys.executable, '-c',
+            'import inspect; from yt_dlp.downloader import PROTOCOL_MAP; assert all(map(inspect.isclass, PROTOCOL_MAP.values()));'
+            'from yt_dlp.postprocessor import *; from yt_dlp.postprocessor import __all__; [globals()[pp] for pp in __all__]'],
+            cwd=rootDir)
+
+    def test_external_downloaders(self):
+        from yt_dlp.downloader import EXTERNAL_DOWNLOADERS
+        from yt_dlp.downloader.external import list_external_downloaders
+        self.assertEqual(sorted(EXTERNAL_DOWNLOADERS), list_external_downloaders())
+
     def test_lazy_extractors(self):
         try:
             subprocess.check_call([sys.executable, 'devscripts/make_lazy_extractors.py', 'yt_dlp/extractor/lazy_extractors.py'], cwd=rootDir, stdout=_DEV_NULL)
@@ -106,6 +106,48 @@ class TestHTTPS(unittest.TestCase):
         self.assertEqual(r['entries'][0]['url'], 'https://127.0.0.1:%d/vid.mp4' % self.port)
 
 
+class KeepAliveRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        # Reply with the client port so that reused connections can be told apart
+        body = str(self.client_address[1]).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; charset=utf-8')
+        self.send_header('Content-Length', len(body))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.httpd = compat_http_server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), KeepAliveRequestHandler)
+        self.port = http_server_port(self.httpd)
+        self.server_thread = threading.Thread(target=self.httpd.serve_forever)
+        self.server_thread.daemon = True
+        self.server_thread.start()
+
+    def test_keep_alive(self):
+        ydl = YoutubeDL({'logger': FakeLogger()})
+        url = 'http://127.0.0.1:%d/' % self.port
+        ports = [ydl.urlopen(url).read() for _ in range(3)]
+        self.assertEqual(len(set(ports)), 1)
+        self.assertEqual((ydl._connection_pool.hits, ydl._connection_pool.misses), (2, 1))
+
+        # A response that is not read completely can not give back its connection
+        ydl.urlopen(url).close()
+        self.assertNotEqual(ydl.urlopen(url).read(), ports[0])
+
+    def test_no_keep_alive(self):
+        ydl = YoutubeDL({'logger': FakeLogger(), 'http_keep_alive': False})
+        url = 'http://127.0.0.1:%d/' % self.port
+        self.assertEqual(len(set(ydl.urlopen(url).read() for _ in range(3))), 3)
+
+
 def _build_proxy_handler(name):
     class HTTPTestRequestHandler(compat_http_server.BaseHTTPRequestHandler):
         proxy_name = name
@@ -9,6 +9,16 @@ import unittest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from yt_dlp.jsinterp import JSInterpreter
+from yt_dlp.utils import ExtractorError
+
+# Similar to the n parameter functions of the YouTube player
+NSIG_CODE = '''
+var nsig = function(a){var b=a.split(""),c=[function(d,e){e=(e%d.length+d.length)%d.length;d.splice(-e).reverse().forEach(function(f){d.unshift(f)})},
+-1316700157,function(d,e){d.push(e)},function(d){d.reverse()},function(d,e){e=(e%d.length+d.length)%d.length;var f=d[0];d[0]=d[e];d[e]=f},
+b,"ab",function(d,e){for(var f=64,h=[];++f-h.length-32;){switch(f){case 58:f-=14;case 91:case 92:case 93:continue;case 123:f=47;case 94:case 95:case 96:continue;case 46:f=95;default:h.push(String.fromCharCode(f))}}d.forEach(function(l,m,n){n[m]=h[(h.indexOf(l)-h.indexOf(e[m])+m-32+f--)%h.length]})},
+function(d,e){e=(e%d.length+d.length)%d.length;d.splice(e,1)}];
+c[6]=c;try{c[4](c[5],3),c[3](c[5]),c[0](c[5],7),c[4](c[5],c[1]),c[7](c[5],"abcdefghijklmnopqrstuvwxyz"),c[8](c[5],2),c[3](c[5])}catch(d){return"enhanced_except_"+a}return b.join("")};
+'''
 
 
 class TestJSInterpreter(unittest.TestCase):
@@ -177,6 +187,22 @@ class TestJSInterpreter(unittest.TestCase):
         ''')
         self.assertEqual(jsi.call_function('x'), 7)
 
+    def test_compiled(self):
+        for compile_functions in (False, True):
+            jsi = JSInterpreter(NSIG_CODE, compile_functions=compile_functions)
+            func = jsi.extract_function('nsig')
+            for _ in range(2):
+                self.assertEqual(func(['SLp9F5bwjAdhE9F-']), 'H7Z38gajddsL-e4')
+                self.assertEqual(func(['oBo2h5euWy6osrUt']), 'FuLUDIIyMWiKBeO')
+
+        jsi = JSInterpreter('function f(a){var b = a++, c = ++a; return b * 100 + c * 10 + a;}')
+        self.assertEqual(jsi.call_function('f', 1), 133)
+
+        # Errors are raised when the faulty code is reached, as when interpreting
+        jsi = JSInterpreter('function f(a){b = 1; for (i=0; i-a; i++) {b = y ?? z} b}')
+        self.assertEqual(jsi.call_function('f', 0), 1)
+        self.assertRaises(ExtractorError, jsi.call_function, 'f', 1)
+
     def test_object_literal(self):
         if 0 == 0:
             return
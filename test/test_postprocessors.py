@@ -3,21 +3,37 @@
 from __future__ import unicode_literals
 
 # Allow direct execution
+import hashlib
+import itertools
+import json
 import os
+import re
+import shutil
+import stat
 import sys
+import threading
 import unittest
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from test.helper import http_server_port
 from yt_dlp import YoutubeDL
-from yt_dlp.compat import compat_shlex_quote
+from yt_dlp.compat import compat_http_server, compat_shlex_quote
 from yt_dlp.postprocessor import (
     ExecPP,
+    FFmpegEmbedSubtitlePP,
+    FFmpegFixupStretchedPP,
+    FFmpegMetadataPP,
+    FFmpegPipelinePP,
+    FFmpegPostProcessor,
+    FFmpegSplitChaptersPP,
     FFmpegThumbnailsConvertorPP,
     MetadataFromFieldPP,
     MetadataParserPP,
-    ModifyChaptersPP
+    ModifyChaptersPP,
+    SponsorBlockPP,
 )
+from yt_dlp.postprocessor.ffmpeg import FFmpegPlan
 
 
 class TestMetadataFromField(unittest.TestCase):
@@ -61,6 +77,450 @@ class TestConvertThumbnail(unittest.TestCase):
             os.remove(file.format(out))
 
 
+FAKE_FFMPEG = '''#!/bin/sh
+echo "$0 $*" >> "$(dirname "$0")/calls"
+case "$*" in
+    -bsfs) printf 'ffmpeg version 4.4.1 Copyright (c) 2000-2021\\n  libavformat    58. 76.100 / 58. 76.100\\nsetts\\n' ;;
+    *-filters) printf ' T.. acopy             A->A       Copy the input audio\\n ... null              V->V       Pass\\n' ;;
+esac
+'''
+
+
+@unittest.skipIf(os.name == 'nt', 'Fake executables are shell scripts')
+class FakeFFmpegTestCase(unittest.TestCase):
+    FAKE_FFMPEG = FAKE_FFMPEG
+
+    def setUp(self):
+        self.bin_dir = os.path.join('test', 'testdata', 'ffmpeg-bin')
+        self.cache_dir = os.path.join('test', 'testdata', 'ffmpeg-cache')
+        shutil.rmtree(self.bin_dir, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.bin_dir)
+        for prog in ('ffmpeg', 'ffprobe'):
+            self.write_executable(prog, self.FAKE_FFMPEG)
+        FFmpegPostProcessor._CAPABILITIES.clear()
+        FFmpegPostProcessor._PROBES.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.bin_dir, ignore_errors=True)
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        FFmpegPostProcessor._CAPABILITIES.clear()
+        FFmpegPostProcessor._PROBES.clear()
+
+    def write_executable(self, prog, content):
+        fn = os.path.join(self.bin_dir, prog)
+        with open(fn, 'w') as f:
+            f.write(content)
+        os.chmod(fn, os.stat(fn).st_mode | stat.S_IEXEC)
+
+    def calls(self):
+        try:
+            with open(os.path.join(self.bin_dir, 'calls')) as f:
+                return len(f.readlines())
+        except IOError:
+            return 0
+
+
+class TestFFmpegCapabilities(FakeFFmpegTestCase):
+    def test_cache(self):
+        ydl = YoutubeDL({'ffmpeg_location': self.bin_dir, 'cachedir': self.cache_dir})
+        pp = FFmpegPostProcessor(ydl)
+        self.assertEqual(pp.basename, 'ffmpeg')
+        self.assertEqual(pp.probe_basename, 'ffprobe')
+        self.assertEqual(pp._versions['ffmpeg'], '4.4.1')
+        self.assertEqual(pp._features, {'fdk': False, 'setts': True, 'needs_adtstoasc': False})
+        self.assertEqual(pp.available_filters, ['acopy', 'null'])
+        # -bsfs and -filters for ffmpeg, -bsfs for ffprobe
+        self.assertEqual(self.calls(), 3)
+
+        # Shared by the process
+        FFmpegPostProcessor(ydl)
+        self.assertEqual(FFmpegPostProcessor.get_versions(ydl)['ffprobe'], '4.4.1')
+        self.assertEqual(self.calls(), 3)
+
+        # Kept in the cache directory
+        FFmpegPostProcessor._CAPABILITIES.clear()
+        self.assertEqual(FFmpegPostProcessor(ydl)._features['setts'], True)
+        self.assertEqual(self.calls(), 3)
+
+        # Replacing the executable invalidates its entry
+        FFmpegPostProcessor._CAPABILITIES.clear()
+        self.write_executable('ffmpeg', FAKE_FFMPEG.replace('4.4.1', '5.0'))
+        self.assertEqual(FFmpegPostProcessor(ydl)._versions['ffmpeg'], '5.0')
+        self.assertEqual(self.calls(), 5)
+
+
+class TestFFmpegPlan(unittest.TestCase):
+    STREAMS = [
+        {'index': 0, 'codec_type': 'video'},
+        {'index': 1, 'codec_type': 'audio'},
+        {'index': 2, 'codec_type': 'data'},
+        {'index': 3, 'codec_type': 'subtitle', 'tags': {'language': 'eng'}},
+    ]
+
+    def test_build(self):
+        plan = FFmpegPlan('a.mkv', self.STREAMS)
+        self.assertEqual(plan.build(), (['a.mkv'], ['-c', 'copy', '-map', '0', '-dn']))
+
+        self.assertEqual(plan.find_stream(('tags', 'language'), 'eng')['spec'], '0:3')
+        plan.remove_stream(plan.find_stream(('codec_type', ), 'subtitle'))
+        plan.add_stream('%d:0' % plan.add_input('a.fr.ass'), ('metadata:s', 'language=fra'))
+        plan.attach('a.info.json', ('metadata:s', 'mimetype=application/json'))
+        self.assertTrue(plan.set_option('aspect', '2.000000'))
+        self.assertTrue(plan.set_option('aspect', '2.000000'))
+        self.assertFalse(plan.set_option('aspect', '1.500000'))
+        plan.extra_options.extend(['-metadata', 'title=a'])
+        self.assertEqual(plan.build(), (['a.mkv', 'a.fr.ass'], [
+            '-c', 'copy', '-map', '0', '-dn', '-map', '-0:3', '-map', '1:0',
+            '-aspect', '2.000000', '-metadata', 'title=a',
+            '-metadata:s:2', 'language=fra',
+            '-attach', 'a.info.json', '-metadata:s:3', 'mimetype=application/json']))
+
+    def test_add_stream_options(self):
+        plan = FFmpegPlan('a.mkv', self.STREAMS)
+        plan.remove_stream(plan.streams[0])
+        plan.add_stream('%d:0' % plan.add_input('a.fr.ass'))
+        plan.add_stream_options(0, ('metadata:s', 'language=eng'))
+        plan.add_stream_options(1, ('metadata:s', 'language=ger'))
+        plan.add_stream_options(3, ('metadata:s', 'language=fra'))
+        self.assertEqual(plan.build()[1], [
+            '-c', 'copy', '-map', '0', '-dn', '-map', '-0:0', '-map', '1:0',
+            '-metadata:s:0', 'language=ger'])
+
+        info = {
+            'ext': 'mkv', 'filepath': 'a.mkv',
+            'requested_formats': [
+                {'vcodec': 'h264', 'acodec': 'none', 'language': 'en'},
+                {'vcodec': 'none', 'acodec': 'aac', 'language': 'de'}],
+        }
+        plan = FFmpegPlan('a.mkv', self.STREAMS)
+        plan.remove_stream(plan.streams[0])
+        plan.add_stream('%d:0' % plan.add_input('a.fr.ass'))
+        pp = FFmpegMetadataPP(YoutubeDL(), add_chapters=False, add_infojson=False)
+        self.assertIsNotNone(pp._plan_ffmpeg(info, plan))
+        self.assertEqual(plan.build()[1][-2:], ['-metadata:s:0', 'language=deu'])
+
+    def test_copy(self):
+        plan = FFmpegPlan('a.mp4', self.STREAMS)
+        backup = plan.copy()
+        plan.add_input('b.png')
+        plan.remove_stream(plan.streams[0])
+        self.assertEqual(backup.inputs, ['a.mp4'])
+        self.assertEqual(len(backup.streams), 3)
+
+
+FAKE_FFMPEG_REMUX = '''#!/bin/sh
+dir="$(dirname "$0")"
+echo "$(basename "$0") $*" >> "$dir/calls"
+case "$*" in
+    -bsfs) printf 'ffmpeg version 4.4.1 Copyright (c) 2000-2021\\nsetts\\n'; exit ;;
+    *-filters) exit ;;
+    *-show_streams*) printf '{"streams": [{"index": 0, "codec_type": "video"}, {"index": 1, "codec_type": "audio", "codec_name": "aac"}], "format": {"duration": "10.0"}, "chapters": []}'; exit ;;
+esac
+if [ -e "$dir/fail" ]; then
+    rm "$dir/fail"
+    exit 1
+fi
+for arg; do
+    [ "$prev" = -i ] && [ -z "$input" ] && input="${arg#file:}"
+    [ "$prev" = -segment_times ] && times="$arg"
+    [ "$prev" = -segment_list ] && list="${arg#file:}"
+    prev="$arg"
+done
+if [ -z "$times" ]; then
+    cp "$input" "${prev#file:}"
+    exit
+fi
+# The cut at the time in "nokeyframe" is skipped, like the segment muxer does when there is no keyframe
+i=0
+start=0.000000
+for time in $(echo "$times" | tr ',' ' ') 60.000000; do
+    [ "$time" = "$(cat "$dir/nokeyframe" 2>/dev/null)" ] && continue
+    segment="$(printf "${prev#file:}" $i)"
+    cp "$input" "$segment"
+    echo "$(basename "$segment"),$start,$time" >> "$list"
+    start="$time"
+    i=$((i + 1))
+done
+'''
+
+
+class TestFFmpegPipelinePP(FakeFFmpegTestCase):
+    FAKE_FFMPEG = FAKE_FFMPEG_REMUX
+
+    def setUp(self):
+        super(TestFFmpegPipelinePP, self).setUp()
+        self.filename = os.path.join(self.bin_dir, 'video.mp4')
+        self.sub_filename = os.path.join(self.bin_dir, 'video.en.vtt')
+        for fn in (self.filename, self.sub_filename):
+            with open(fn, 'w') as f:
+                f.write('data')
+        self.ydl = YoutubeDL({'ffmpeg_location': self.bin_dir, 'cachedir': False, 'quiet': True})
+        self.pps = [FFmpegFixupStretchedPP(self.ydl), FFmpegEmbedSubtitlePP(self.ydl)]
+        self.info = {
+            'filepath': self.filename, 'ext': 'mp4', 'vcodec': 'h264', 'acodec': 'aac', 'stretched_ratio': 2,
+            'requested_subtitles': {'en': {'ext': 'vtt', 'filepath': self.sub_filename}},
+            '__files_to_move': {},
+        }
+
+    def ffmpeg_calls(self):
+        with open(os.path.join(self.bin_dir, 'calls')) as f:
+            return [line.split(' ', 1)[1] for line in f if line.startswith('ffmpeg ') and ' -i ' in line]
+
+    def test_fuse(self):
+        fused = FFmpegPipelinePP.fuse(self.ydl, [ExecPP(self.ydl, 'true')] + self.pps)
+        self.assertEqual([pp.pp_key() for pp in fused], ['Exec', 'Pipeline'])
+        self.assertEqual(FFmpegPipelinePP.fuse(self.ydl, self.pps[:1]), self.pps[:1])
+
+        ydl = YoutubeDL({'ffmpeg_location': self.bin_dir, 'postprocessor_args': {'fixupstretched': ['-v']}})
+        pps = [FFmpegFixupStretchedPP(ydl), FFmpegEmbedSubtitlePP(ydl)]
+        self.assertEqual(FFmpegPipelinePP.fuse(ydl, pps), pps)
+
+    def test_single_pass(self):
+        files_to_delete, info = FFmpegPipelinePP(self.ydl, self.pps).run(self.info)
+        calls = self.ffmpeg_calls()
+        self.assertEqual(len(calls), 1)
+        self.assertIn('-aspect 2.000000', calls[0])
+        self.assertIn('-c:s mov_text', calls[0])
+        self.assertIn('-map 1:0', calls[0])
+        self.assertEqual(files_to_delete, [self.sub_filename])
+        self.assertTrue(os.path.exists(self.filename))
+
+    def test_fallback(self):
+        open(os.path.join(self.bin_dir, 'fail'), 'w').close()
+        files_to_delete, info = FFmpegPipelinePP(self.ydl, self.pps).run(self.info)
+        # The fused command, then one command per postprocessor
+        self.assertEqual(len(self.ffmpeg_calls()), 3)
+        self.assertTrue(os.path.exists(self.filename))
+
+    def test_fallback_infojson(self):
+        filename = os.path.join(self.bin_dir, 'video.mkv')
+        shutil.copy(self.filename, filename)
+        ydl = YoutubeDL({
+            'ffmpeg_location': self.bin_dir, 'cachedir': False, 'quiet': True,
+            'outtmpl': {'default': os.path.join(self.bin_dir, '%(id)s.%(ext)s')},
+        })
+        pps = [FFmpegFixupStretchedPP(ydl), FFmpegMetadataPP(ydl, add_infojson=True)]
+        info = dict(self.info, id='video', title='video', filepath=filename, ext='mkv', chapters=[
+            {'start_time': 0, 'end_time': 10, 'title': 'chapter'}])
+        del info['requested_subtitles']
+        open(os.path.join(self.bin_dir, 'fail'), 'w').close()
+        _, info = FFmpegPipelinePP(ydl, pps).run(info)
+        self.assertEqual(len(self.ffmpeg_calls()), 3)
+        self.assertIn('-attach', self.ffmpeg_calls()[-1])
+        # The temporary files written for the fused command are not left behind
+        self.assertEqual(
+            sorted(fn for fn in os.listdir(self.bin_dir) if fn.startswith('video.')),
+            ['video.en.vtt', 'video.mkv', 'video.mp4'])
+
+
+class TestFFprobeCache(FakeFFmpegTestCase):
+    FAKE_FFMPEG = FAKE_FFMPEG_REMUX
+
+    def setUp(self):
+        super(TestFFprobeCache, self).setUp()
+        self.filename = os.path.join(self.bin_dir, 'video.mp4')
+        with open(self.filename, 'w') as f:
+            f.write('data')
+        self.ydl = YoutubeDL({'ffmpeg_location': self.bin_dir, 'cachedir': False})
+
+    def probe_calls(self):
+        with open(os.path.join(self.bin_dir, 'calls')) as f:
+            return len([line for line in f if '-show_streams' in line])
+
+    def test_cache(self):
+        pp = FFmpegPostProcessor(self.ydl)
+        self.assertEqual(pp.get_audio_codec(self.filename), 'aac')
+        self.assertEqual(pp.get_stream_number(self.filename, ('codec_type', ), 'audio'), (1, 2))
+        self.assertEqual(pp._get_real_video_duration(self.filename), 10.0)
+        # Shared by the postprocessors, and not modified by the callers
+        metadata = ModifyChaptersPP(self.ydl).get_metadata_object(self.filename)
+        self.assertEqual(metadata['chapters'], [])
+        metadata['streams'].clear()
+        self.assertEqual(len(pp.get_metadata_object(self.filename)['streams']), 2)
+        self.assertEqual(self.probe_calls(), 1)
+
+        # Replacing the file invalidates its entry, even when its mtime is restored
+        mtime = os.stat(self.filename).st_mtime
+        temp_filename = self.filename + '.temp'
+        shutil.copy(self.filename, temp_filename)
+        os.replace(temp_filename, self.filename)
+        os.utime(self.filename, (mtime, mtime))
+        pp.get_metadata_object(self.filename)
+        self.assertEqual(self.probe_calls(), 2)
+
+        # As does writing it with ffmpeg
+        pp.run_ffmpeg(self.filename, temp_filename, ['-c', 'copy'])
+        pp.get_metadata_object(temp_filename)
+        pp.run_ffmpeg(self.filename, temp_filename, ['-c', 'copy'])
+        pp.get_metadata_object(temp_filename)
+        self.assertEqual(self.probe_calls(), 4)
+
+
+class TestFFmpegSplitChaptersPP(FakeFFmpegTestCase):
+    FAKE_FFMPEG = FAKE_FFMPEG_REMUX
+
+    def setUp(self):
+        super(TestFFmpegSplitChaptersPP, self).setUp()
+        self.filename = os.path.join(self.bin_dir, 'video 100%.mp4')
+        with open(self.filename, 'w') as f:
+            f.write('data')
+        self.ydl = YoutubeDL({
+            'ffmpeg_location': self.bin_dir, 'cachedir': False, 'quiet': True,
+            'outtmpl': {'chapter': os.path.join(self.bin_dir, 'chapter %(section_number)d.%(ext)s')},
+        })
+        self.progress = []
+        self.ydl.add_postprocessor_hook(
+            lambda s: s['status'] == 'processing' and self.progress.append((s['fragment_index'], s['fragment_count'])))
+
+    def split(self, chapters, **kwargs):
+        info = {
+            'id': 'video', 'title': 'video', 'ext': 'mp4', 'filepath': self.filename, 'vcodec': 'h264',
+            'acodec': 'aac', 'chapters': [{'start_time': start, 'end_time': end} for start, end in chapters],
+        }
+        FFmpegSplitChaptersPP(self.ydl, **kwargs).run(info)
+        for i in range(len(chapters)):
+            self.assertTrue(os.path.exists(os.path.join(self.bin_dir, 'chapter %d.mp4' % (i + 1))))
+        self.assertEqual(
+            sorted(fn for fn in os.listdir(self.bin_dir) if fn.endswith('.mp4')),
+            ['chapter %d.mp4' % (i + 1) for i in range(len(chapters))] + ['video 100%.mp4'])
+        with open(os.path.join(self.bin_dir, 'calls')) as f:
+            return [line for line in f if line.startswith('ffmpeg ') and ' -i ' in line]
+
+    def test_segments(self):
+        calls = self.split([(10, 20), (20, 30), (30, 40)])
+        self.assertEqual(len(calls), 1)
+        self.assertIn('-f segment -reset_timestamps 1 -segment_times 10.000000,20.000000,30.000000,40.000000', calls[0])
+        self.assertEqual(self.progress, [(3, 3)])
+        self.assertFalse([fn for fn in os.listdir(self.bin_dir) if '.temp' in fn])
+
+    def test_no_keyframe(self):
+        # The chapters would be shifted by one, and the last one would get the trailing segment
+        with open(os.path.join(self.bin_dir, 'nokeyframe'), 'w') as f:
+            f.write('20.000000')
+        calls = self.split([(10, 20), (20, 30), (30, 40)])
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(self.progress, [(1, 3), (2, 3), (3, 3)])
+        self.assertFalse([fn for fn in os.listdir(self.bin_dir) if '.temp' in fn])
+
+    def test_not_contiguous(self):
+        self.assertEqual(len(self.split([(0, 10), (20, 30)])), 2)
+        self.assertEqual(self.progress, [(1, 2), (2, 2)])
+
+    def test_force_keyframes(self):
+        calls = self.split([(0, 10), (10, 20), (20, 30)], force_keyframes=True, workers=2)
+        self.assertEqual(len(calls), 3)
+        self.assertFalse(any('-c copy' in call for call in calls))
+        self.assertEqual(sorted(self.progress), [(1, 3), (2, 3), (3, 3)])
+
+
+def _hash_prefix(video_id):
+    return hashlib.sha256(video_id.encode('ascii')).hexdigest()[:4]
+
+
+class SponsorBlockRequestHandler(compat_http_server.BaseHTTPRequestHandler):
+    # video id -> segments
+    SEGMENTS = {}
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        mobj = re.match(r'^/api/skipSegments/(?P<prefix>[0-9a-f]+)\?', self.path)
+        assert mobj
+        self.requests.append(mobj.group('prefix'))
+        videos = [
+            {'videoID': video_id, 'segments': segments} for video_id, segments in self.SEGMENTS.items()
+            if _hash_prefix(video_id).startswith(mobj.group('prefix'))]
+        if not videos:
+            self.send_response(404)
+            self.end_headers()
+            return
+        data = json.dumps(videos).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', len(data))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class TestSponsorBlockPP(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.httpd = compat_http_server.HTTPServer(('127.0.0.1', 0), SponsorBlockRequestHandler)
+        cls.api = 'http://127.0.0.1:%d' % http_server_port(cls.httpd)
+        threading.Thread(target=cls.httpd.serve_forever, daemon=True).start()
+
+        # Two videos that share a hash prefix
+        seen = {}
+        for i in itertools.count():
+            video_id = 'video%05d' % i
+            prefix = _hash_prefix(video_id)
+            if prefix in seen:
+                cls.video_ids = [seen[prefix], video_id, 'video-without-segments']
+                break
+            seen[prefix] = video_id
+        SponsorBlockRequestHandler.SEGMENTS = {
+            video_id: [{'segment': [10, 20], 'category': 'sponsor', 'videoDuration': 60}]
+            for video_id in cls.video_ids[:2]}
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.httpd.shutdown()
+        cls.httpd.server_close()
+
+    def setUp(self):
+        self.cache_dir = os.path.join('test', 'testdata', 'sponsorblock-cache')
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        SponsorBlockRequestHandler.requests = []
+        self.ydl = YoutubeDL({'cachedir': self.cache_dir, 'quiet': True})
+
+    def tearDown(self):
+        self.ydl.cache.remove()
+
+    def run_pp(self, video_id, pp=None):
+        pp = pp or SponsorBlockPP(self.ydl, api=self.api)
+        _, info = pp.run({'id': video_id, 'extractor_key': 'Youtube', 'duration': 60})
+        return [(c['start_time'], c['end_time']) for c in info['sponsorblock_chapters']]
+
+    def test_cache(self):
+        for video_id in self.video_ids:
+            self.run_pp(video_id)
+        self.assertEqual(self.run_pp(self.video_ids[0]), [(10, 20)])
+        self.assertEqual(self.run_pp(self.video_ids[1]), [(10, 20)])
+        self.assertEqual(self.run_pp(self.video_ids[2]), [])
+        self.assertEqual(len(SponsorBlockRequestHandler.requests), 2)
+
+        # Queries of other categories are not answered by the cache
+        self.run_pp(self.video_ids[0], SponsorBlockPP(self.ydl, categories=['intro'], api=self.api))
+        self.assertEqual(len(SponsorBlockRequestHandler.requests), 3)
+
+    def test_prefetch(self):
+        pp = SponsorBlockPP(self.ydl, api=self.api)
+        entries = [{'_type': 'url', 'id': video_id, 'ie_key': 'Youtube'} for video_id in self.video_ids]
+        pp.prefetch(entries + [{'_type': 'url', 'id': 'x', 'ie_key': 'Generic'}])
+        self.assertEqual(
+            sorted(SponsorBlockRequestHandler.requests), sorted({_hash_prefix(v) for v in self.video_ids}))
+
+        pp.prefetch(entries)
+        for video_id in self.video_ids:
+            self.run_pp(video_id, pp)
+        self.assertEqual(len(SponsorBlockRequestHandler.requests), 2)
+
+    def test_prefetch_errors(self):
+        pp = SponsorBlockPP(self.ydl, api=self.api)
+
+        def query_prefix(prefix, service):
+            raise ValueError('Malformed response')
+
+        pp._query_prefix = query_prefix
+        # Only logged, the segments are fetched when the video is processed
+        pp.prefetch([None] + [{'_type': 'url', 'id': video_id, 'ie_key': 'Youtube'} for video_id in self.video_ids])
+        self.assertEqual(SponsorBlockRequestHandler.requests, [])
+        self.assertEqual(self.run_pp(self.video_ids[0]), [(10, 20)])
+
+
 class TestExec(unittest.TestCase):
     def test_parse_cmd(self):
         pp = ExecPP(YoutubeDL(), '')
@@ -546,6 +1006,25 @@ outpoint 10.000000
         opts = self._pp._make_concat_opts(sponsor_chapters, 20)
         self.assertEqual(expected, ''.join(self._pp._concat_spec(['test'] * len(opts), opts)))
 
+    def test_smart_cut_pieces_CommonCase(self):
+        opts = self._pp._make_concat_opts([self._chapter(1, 2, 's1'), self._chapter(10, 20, 's2')], 30)
+        self.assertEqual(self._pp._smart_cut_pieces(opts, [0, 4, 8, 12, 16, 24], 30), [
+            (False, 0.0, 1.0),
+            (False, 2.0, 4), (True, 4, 8), (False, 8, 10.0),
+            (False, 20.0, 24), (True, 24, None)])
+
+    def test_smart_cut_pieces_CutsAtKeyframes(self):
+        opts = self._pp._make_concat_opts([self._chapter(0, 4, 's1'), self._chapter(8, 12, 's2')], 20)
+        self.assertEqual(self._pp._smart_cut_pieces(opts, [0, 4, 8, 12, 16], 20), [
+            (True, 4, 8), (True, 12, None)])
+
+    def test_smart_cut_pieces_NoKeyframeInPart(self):
+        opts = self._pp._make_concat_opts([self._chapter(1, 2, 's1')], 20)
+        self.assertEqual(self._pp._smart_cut_pieces(opts, [0, 10], 20), [
+            (False, 0.0, 1.0), (False, 2.0, 10), (True, 10, None)])
+        self.assertEqual(self._pp._smart_cut_pieces([{'inpoint': '2', 'outpoint': '9'}], [0, 10], 20), [
+            (False, 2.0, 9.0)])
+
     def test_quote_for_concat_RunsOfQuotes(self):
         self.assertEqual(
             r"'special '\'' '\'\''characters'\'\'\''galore'",
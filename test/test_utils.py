@@ -14,6 +14,8 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 import io
 import itertools
 import json
+import threading
+import time
 import xml.etree.ElementTree
 
 from yt_dlp.utils import (
@@ -656,13 +658,14 @@ class TestUtil(unittest.TestCase):
                 for i in range(firstid, upto):
                     yield i
 
-            pl = OnDemandPagedList(get_page, pagesize)
-            got = pl.getslice(*sliceargs)
-            self.assertEqual(got, expected)
+            for kwargs in ({}, {'prefetch': 2}, {'prefetch': 3, 'max_cached_pages': 2}):
+                pl = OnDemandPagedList(get_page, pagesize, **kwargs)
+                got = pl.getslice(*sliceargs)
+                self.assertEqual(got, expected)
 
-            iapl = InAdvancePagedList(get_page, size // pagesize + 1, pagesize)
-            got = iapl.getslice(*sliceargs)
-            self.assertEqual(got, expected)
+                iapl = InAdvancePagedList(get_page, size // pagesize + 1, pagesize, **kwargs)
+                got = iapl.getslice(*sliceargs)
+                self.assertEqual(got, expected)
 
         testPL(5, 2, (), [0, 1, 2, 3, 4])
         testPL(5, 2, (1,), [1, 2, 3, 4])
@@ -673,6 +676,64 @@ class TestUtil(unittest.TestCase):
         testPL(5, 2, (2, 99), [2, 3, 4])
         testPL(5, 2, (20, 99), [])
 
+    def test_paged_list_prefetch(self):
+        fetched = []
+        main_thread = threading.current_thread()
+
+        def get_page(pagenum):
+            fetched.append((pagenum, threading.current_thread() is main_thread))
+            time.sleep(0.05)
+            return range(pagenum * 10, min(pagenum * 10 + 10, 95))
+
+        pl = OnDemandPagedList(get_page, 10, prefetch=3)
+        self.assertEqual(pl.getslice(0, 25), list(range(25)))
+        # Pages past the end of the slice are not fetched
+        self.assertEqual(sorted(fetched), [(0, True), (1, False), (2, False)])
+
+        # Reading by index fetches the next pages
+        pl = OnDemandPagedList(get_page, 10, prefetch=2)
+        self.assertEqual(pl[15], 15)
+        self.assertEqual(set(pl._cache) | set(pl._pending), {1, 2, 3})
+        iapl = InAdvancePagedList(get_page, 10, 10, prefetch=2)
+        self.assertEqual(iapl[85], 85)
+        self.assertEqual(set(iapl._cache) | set(iapl._pending), {8, 9})
+
+        # Several readers share the pages, which are only fetched once
+        pl._pool.shutdown()
+        iapl._pool.shutdown()
+        fetched.clear()
+        pl = OnDemandPagedList(get_page, 10, prefetch=3)
+        results = [None] * 4
+
+        def read(i):
+            results[i] = pl.getslice()
+
+        threads = [threading.Thread(target=read, args=(i, )) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [list(range(95))] * 4)
+        pagenums = [pagenum for pagenum, _ in fetched]
+        self.assertEqual(len(pagenums), len(set(pagenums)))
+        self.assertTrue(set(range(10)) <= set(pagenums))
+
+        # Pages of an InAdvancePagedList are fetched in parallel
+        pl._pool.shutdown()
+        fetched.clear()
+        iapl = InAdvancePagedList(get_page, 10, 10, prefetch=10)
+        start = time.time()
+        self.assertEqual(iapl.getslice(), list(range(95)))
+        self.assertLess(time.time() - start, 0.05 * 5)
+        self.assertEqual(sorted(pagenum for pagenum, _ in fetched), list(range(10)))
+
+        # Least recently used pages are evicted from the cache
+        iapl = InAdvancePagedList(get_page, 10, 10, prefetch=2, max_cached_pages=3)
+        self.assertEqual(iapl.getslice(), list(range(95)))
+        self.assertEqual(list(iapl._cache), [7, 8, 9])
+        self.assertEqual(iapl.getslice(5, 6), [5])
+        self.assertEqual(list(iapl._cache), [8, 9, 0])
+
     def test_read_batch_urls(self):
         f = io.StringIO('''\xef\xbb\xbf foo
             bar\r
@@ -1681,6 +1742,26 @@ Line 1
         ll = reversed(ll)
         test(ll, -15, 14, range(15))
 
+    def test_LazyList_threads(self):
+        def slow_range(n):
+            for i in range(n):
+                time.sleep(0.001)
+                yield i
+
+        ll = LazyList(slow_range(100))
+        results = [None] * 4
+
+        def read(i):
+            results[i] = list(ll) if i % 2 else [ll[j] for j in range(100)]
+
+        threads = [threading.Thread(target=read, args=(i, )) for i in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [list(range(100))] * 4)
+        self.assertEqual(getattr(ll, '_LazyList__cache'), list(range(100)))
+
 
 if __name__ == '__main__':
     unittest.main()
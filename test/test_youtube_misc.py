@@ -3,12 +3,16 @@ from __future__ import unicode_literals
 
 # Allow direct execution
 import os
+import shutil
 import sys
 import unittest
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 
+from test.helper import FakeYDL
+from test.test_jsinterp import NSIG_CODE
 from yt_dlp.extractor import YoutubeIE
+from yt_dlp.jsinterp import JSInterpreter
 
 
 class TestYoutubeMisc(unittest.TestCase):
@@ -22,5 +26,38 @@ class TestYoutubeMisc(unittest.TestCase):
         assertExtractId('BaW_jenozKc', 'BaW_jenozKc')
 
 
+class TestYoutubePlayerCache(unittest.TestCase):
+    PLAYER_URL = 'https://www.youtube.com/s/player/9216d1f7/player_ias.vflset/en_US/base.js'
+
+    def setUp(self):
+        self.cachedir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'testdata', 'youtube_cache')
+        self.tearDown()
+
+    def tearDown(self):
+        YoutubeIE._NSIG_FUNCTIONS.clear()
+        YoutubeIE._NSIG_VALUES.clear()
+        if os.path.exists(self.cachedir):
+            shutil.rmtree(self.cachedir)
+
+    def _new_ie(self):
+        return YoutubeIE(FakeYDL({'cachedir': self.cachedir}))
+
+    def test_nsig_cache(self):
+        ie = self._new_ie()
+        ie._downloader.cache.store(
+            'youtube-nsig', '9216d1f7', JSInterpreter(NSIG_CODE).extract_function_code('nsig'))
+        # The player is not downloaded
+        ie._load_player = None
+        self.assertEqual(ie._decrypt_nsig('SLp9F5bwjAdhE9F-', 'test', self.PLAYER_URL), 'H7Z38gajddsL-e4')
+        self.assertIn('9216d1f7', YoutubeIE._NSIG_FUNCTIONS)
+
+        # Decrypted values are shared with the other processes through the cache directory
+        YoutubeIE._NSIG_FUNCTIONS.clear()
+        YoutubeIE._NSIG_VALUES.clear()
+        ie = self._new_ie()
+        ie._get_n_function = None
+        self.assertEqual(ie._decrypt_nsig('SLp9F5bwjAdhE9F-', 'test', self.PLAYER_URL), 'H7Z38gajddsL-e4')
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -4,6 +4,7 @@
 from __future__ import absolute_import, unicode_literals
 
 import collections
+import concurrent.futures
 import contextlib
 import datetime
 import errno
@@ -18,6 +19,7 @@ import os
 import platform
 import re
 import shutil
+import socket
 import subprocess
 import sys
 import tempfile
@@ -26,6 +28,7 @@ import tokenize
 import traceback
 import random
 import unicodedata
+import weakref
 
 from enum import Enum
 from string import ascii_letters
@@ -41,11 +44,11 @@ from .compat import (
     compat_str,
     compat_tokenize_tokenize,
     compat_urllib_error,
+    compat_urllib_parse_urlparse,
     compat_urllib_request,
     compat_urllib_request_DataHandler,
     windows_enable_vt_mode,
 )
-from .cookies import load_cookies
 from .utils import (
     ExclusivelyLockedError,
     age_restricted,
@@ -75,6 +78,7 @@ from .utils import (
     GeoRestrictedError,
     get_domain,
     HEADRequest,
+    HTTPConnectionPool,
     int_or_none,
     iri_to_uri,
     ISO3166Utils,
@@ -126,37 +130,29 @@ from .utils import (
     version_tuple,
     write_json_file,
     write_string,
+    YoutubeDLCookieJar,
     YoutubeDLCookieProcessor,
     YoutubeDLHandler,
     YoutubeDLRedirectHandler,
 )
+from .archive import open_download_archive
 from .cache import Cache
 from .minicurses import format_text
 from .extractor import (
     gen_extractor_classes,
+    gen_url_index,
     get_info_extractor,
     _LAZY_LOADER,
     _PLUGIN_CLASSES as plugin_extractors
 )
-from .extractor.openload import PhantomJSwrapper
+from .extractor.urlindex import URLDispatcher
 from .downloader import (
-    FFmpegFD,
     LDM_EXCEPTIONS,
     get_suitable_downloader,
     shorten_protocol_name
 )
-from .downloader.rtmp import rtmpdump_version
 from .postprocessor import (
     get_postprocessor,
-    FFmpegFixupDuplicateMoovPP,
-    FFmpegFixupDurationPP,
-    FFmpegFixupM3u8PP,
-    FFmpegFixupM4aPP,
-    FFmpegFixupStretchedPP,
-    FFmpegFixupTimestampPP,
-    FFmpegMergerPP,
-    FFmpegPostProcessor,
-    MoveFilesAfterDownloadPP,
     _PLUGIN_CLASSES as plugin_postprocessors
 )
 from .longname import (
@@ -285,6 +281,12 @@ class YoutubeDL(object):
     playlist_items:    Specific indices of playlist to download.
     playlistreverse:   Download playlist items in reverse order.
     playlistrandom:    Download playlist items in random order.
+    playlist_prefetch: Number of upcoming playlist items to extract while the
+                       current one is downloaded. When set, the videos are also
+                       post-processed in the background, one at a time (default: 0).
+                       Each item is extracted ahead of time by a new instance of
+                       its extractor, so only state shared through the class or
+                       the YoutubeDL object must be thread-safe
     matchtitle:        Download only matching titles.
     rejecttitle:       Reject downloads for matching titles.
     logger:            Log messages to a logging.Logger instance.
@@ -321,6 +323,8 @@ class YoutubeDL(object):
     skip_download:     Skip the actual download of the video file
     cachedir:          Location of the cache files in the filesystem.
                        False to disable filesystem cache.
+    cache_max_size:    Maximum size of the cache in bytes (default is 64MiB).
+                       The least recently used entries are evicted beyond it.
     noplaylist:        Download single video instead of a playlist if in doubt.
     age_limit:         An integer representing the user's age in years.
                        Unsuitable videos for the given age are skipped.
@@ -335,7 +339,12 @@ class YoutubeDL(object):
                        downloaded. None for no limit.
     download_archive:  File name of a file where all downloads are recorded.
                        Videos already present in the file are not downloaded
-                       again.
+                       again. Files with a .db, .sqlite or .sqlite3 extension
+                       (or existing SQLite databases) are indexed archives,
+                       which are not loaded into memory (see yt_dlp/archive.py)
+    download_archive_batch_size: Number of downloads recorded in the archive at
+                       once (default 1). Pending entries are written when the
+                       YoutubeDL object is closed
     break_on_existing: Stop the download process after attempting to download a
                        file that is in the archive.
     break_on_reject:   Stop the download process when encountering a video that
@@ -398,6 +407,13 @@ class YoutubeDL(object):
                                          downloaded video fragment.
                        * fragment_count: The number of fragments (= individual
                                          files that will be merged)
+                       * active_fragments: The number of fragments currently being
+                                           downloaded (all threads together)
+                       * fragment_latency: Dictionary with the percentiles "p50",
+                                           "p90" and "p99" of the time in seconds
+                                           taken to download a fragment
+                       * decryption_time: The number of seconds spent decrypting
+                                          fragments (all threads together)
 
                        Progress hooks are guaranteed to be called at least once
                        (with status "finished") if the download is successful.
@@ -420,6 +436,8 @@ class YoutubeDL(object):
                        - "detect_or_warn": check whether we can do anything
                                            about it, warn otherwise (default)
     source_address:    Client-side IP address to bind to.
+    http_keep_alive:   Reuse HTTP(S) connections for further requests to the same
+                       host (default: True)
     call_home:         Boolean, true iff we are allowed to contact the
                        yt-dlp servers for debugging. (BROKEN)
     sleep_interval_requests: Number of seconds to sleep between requests
@@ -503,13 +521,17 @@ class YoutubeDL(object):
     nopart, updatetime, buffersize, ratelimit, throttledratelimit, min_filesize,
     max_filesize, test, noresizebuffer, retries, fragment_retries, continuedl,
     noprogress, xattr_set_filesize, hls_use_mpegts, http_chunk_size,
-    external_downloader_args, concurrent_fragment_downloads.
+    http_connections, external_downloader_args, concurrent_fragment_downloads,
+    fragment_memory_limit, fragment_engine.
 
     The following options are used by the post processors:
     prefer_ffmpeg:     If False, use avconv instead of ffmpeg if both are available,
                        otherwise prefer ffmpeg. (avconv support is deprecated)
     ffmpeg_location:   Location of the ffmpeg/avconv binary; either the path
                        to the binary or its containing directory.
+    fuse_postprocessors: Run consecutive postprocessors that only remux the file
+                       (fixups and embedding of subtitles, metadata and
+                       thumbnails) as a single ffmpeg command (default: True)
     postprocessor_args: A dictionary of postprocessor/executable keys (in lower case)
                        and a list of additional command-line arguments for the
                        postprocessor/executable. The dict can also have "PP+EXE" keys
@@ -574,6 +596,7 @@ class YoutubeDL(object):
             params = {}
         self._ies = {}
         self._ies_instances = {}
+        self._url_dispatcher = None
         self._pps = {'pre_process': [], 'before_dl': [], 'after_move': [], 'post_process': []}
         self._printed_messages = set()
         self._first_webpage_request = True
@@ -583,6 +606,17 @@ class YoutubeDL(object):
         self._opened_streams = []
         self._download_retcode = 0
         self._num_downloads = 0
+        # url -> whether the format or thumbnail could be downloaded
+        self._checked_formats = {}
+        self._checked_thumbnails = {}
+        # Hosts of thumbnails that could not be connected to
+        self._dead_thumbnail_hosts = set()
+        # (ie_key, url) -> future of the extraction of an upcoming playlist entry
+        self._prefetched_extractions = {}
+        # Set while processing a playlist with playlist_prefetch
+        self._postprocessing_worker = None
+        # (archive id, future) of the videos that are being post-processed in the background
+        self._postprocessing_jobs = []
         self._screen_file = [sys.stdout, sys.stderr][params.get('logtostderr', False)]
         self._err_file = sys.stderr
         self.params = params
@@ -706,23 +740,13 @@ class YoutubeDL(object):
 
         register_socks_protocols()
 
-        def preload_download_archive(fn):
-            """Preload the archive, if any is specified"""
-            if fn is None:
-                return False
-            self.write_debug(f'Loading archive file {fn!r}')
-            try:
-                with locked_file(fn, 'r', encoding='utf-8') as archive_file:
-                    for line in archive_file:
-                        self.archive.add(line.strip())
-            except IOError as ioe:
-                if ioe.errno != errno.ENOENT:
-                    raise
-                return False
-            return True
-
         self.archive = set()
-        preload_download_archive(self.params.get('download_archive'))
+        archive_fn = self.params.get('download_archive')
+        if archive_fn is not None:
+            self.write_debug(f'Loading archive file {archive_fn!r}')
+            self.archive = open_download_archive(archive_fn, self.params.get('download_archive_batch_size') or 1)
+            # The batched entries must be written even if the object is never closed
+            self._close_archive = weakref.finalize(self, self.archive.close)
 
     def warn_if_short_id(self, argv):
         # short YouTube ID starting with dash?
@@ -743,6 +767,10 @@ class YoutubeDL(object):
     def add_info_extractor(self, ie):
         """Add an InfoExtractor object to the end of the list."""
         ie_key = ie.ie_key()
+        if ie_key not in self._ies or (
+                URLDispatcher.indexed_suffixes(ie, gen_url_index())
+                != URLDispatcher.indexed_suffixes(self._ies[ie_key], gen_url_index())):
+            self._url_dispatcher = None
         self._ies[ie_key] = ie
         if not isinstance(ie, type):
             self._ies_instances[ie_key] = ie
@@ -767,6 +795,15 @@ class YoutubeDL(object):
             self.add_info_extractor(ie)
         return ie
 
+    def _suitable_ie_candidates(self, url):
+        """Yield (ie_key, ie) for the extractors that may be suitable for url, in order"""
+        url_index = gen_url_index()
+        if not url_index:
+            return iter(self._ies.items())
+        if self._url_dispatcher is None:
+            self._url_dispatcher = URLDispatcher(self._ies, url_index)
+        return self._url_dispatcher.candidates(url)
+
     def add_default_info_extractors(self):
         """
         Add the InfoExtractors returned by gen_extractors to the end of the list
@@ -868,6 +905,14 @@ class YoutubeDL(object):
     def __exit__(self, *args):
         self.restore_console_title()
 
+        if hasattr(self.archive, 'close'):
+            self._close_archive()
+
+        pool = getattr(self, '_connection_pool', None)
+        if pool is not None:
+            self.write_debug('HTTP connection pool: %d hits, %d misses' % (pool.hits, pool.misses))
+            pool.close()
+
         if self.params.get('cookiefile') is not None:
             try:
                 self.cookiejar.save(ignore_discard=True, ignore_expires=True)
@@ -1367,11 +1412,11 @@ class YoutubeDL(object):
             ie_key = 'Generic'
 
         if ie_key:
-            ies = {ie_key: self._get_info_extractor_class(ie_key)}
+            ies = {ie_key: self._get_info_extractor_class(ie_key)}.items()
         else:
-            ies = self._ies
+            ies = self._suitable_ie_candidates(url)
 
-        for ie_key, ie in ies.items():
+        for ie_key, ie in ies:
             if not ie.suitable(url):
                 continue
 
@@ -1469,7 +1514,8 @@ class YoutubeDL(object):
                     else '%.2f' % sleep_interval))
             time.sleep(sleep_interval)
 
-        ie_result = ie.extract(url)
+        prefetched = self._prefetched_extractions.pop((ie.ie_key(), url), None)
+        ie_result = prefetched.result() if prefetched else ie.extract(url)
         if ie_result is None:  # Finished already (backwards compatibility; listformats and friends should be moved here)
             return
         if isinstance(ie_result, list):
@@ -1758,45 +1804,49 @@ class YoutubeDL(object):
         x_forwarded_for = ie_result.get('__x_forwarded_for_ip')
 
         self.to_screen('[%s] playlist %s: %s' % (ie_result.get('extractor'), playlist, msg % n_entries))
+        for pp in self._pps['pre_process']:
+            pp.prefetch([entry for _, entry in entries])
         failures = 0
         max_failures = self.params.get('skip_playlist_after_errors') or float('inf')
-        for i, entry_tuple in enumerate(entries, 1):
-            playlist_index, entry = entry_tuple
-            if 'playlist-index' in self.params.get('compat_opts', []):
-                playlist_index = playlistitems[i - 1] if playlistitems else i + playliststart - 1
-            self.to_screen('[download] Downloading video %s of %s' % (i, n_entries))
-            # This __x_forwarded_for_ip thing is a bit ugly but requires
-            # minimal changes
-            if x_forwarded_for:
-                entry['__x_forwarded_for_ip'] = x_forwarded_for
-            extra = {
-                'n_entries': n_entries,
-                '_last_playlist_index': max(playlistitems) if playlistitems else (playlistend or n_entries),
-                'playlist_index': playlist_index,
-                'playlist_autonumber': i,
-                'playlist': playlist,
-                'playlist_id': ie_result.get('id'),
-                'playlist_title': ie_result.get('title'),
-                'playlist_uploader': ie_result.get('uploader'),
-                'playlist_uploader_id': ie_result.get('uploader_id'),
-                'extractor': ie_result.get('extractor'),
-                'webpage_url': ie_result.get('webpage_url'),
-                'webpage_url_basename': url_basename(ie_result.get('webpage_url')),
-                'webpage_url_domain': get_domain(ie_result.get('webpage_url')),
-                'extractor_key': ie_result.get('extractor_key'),
-            }
+        with self._playlist_pipeline(entries) as advance:
+            for i, entry_tuple in enumerate(entries, 1):
+                advance(i)
+                playlist_index, entry = entry_tuple
+                if 'playlist-index' in self.params.get('compat_opts', []):
+                    playlist_index = playlistitems[i - 1] if playlistitems else i + playliststart - 1
+                self.to_screen('[download] Downloading video %s of %s' % (i, n_entries))
+                # This __x_forwarded_for_ip thing is a bit ugly but requires
+                # minimal changes
+                if x_forwarded_for:
+                    entry['__x_forwarded_for_ip'] = x_forwarded_for
+                extra = {
+                    'n_entries': n_entries,
+                    '_last_playlist_index': max(playlistitems) if playlistitems else (playlistend or n_entries),
+                    'playlist_index': playlist_index,
+                    'playlist_autonumber': i,
+                    'playlist': playlist,
+                    'playlist_id': ie_result.get('id'),
+                    'playlist_title': ie_result.get('title'),
+                    'playlist_uploader': ie_result.get('uploader'),
+                    'playlist_uploader_id': ie_result.get('uploader_id'),
+                    'extractor': ie_result.get('extractor'),
+                    'webpage_url': ie_result.get('webpage_url'),
+                    'webpage_url_basename': url_basename(ie_result.get('webpage_url')),
+                    'webpage_url_domain': get_domain(ie_result.get('webpage_url')),
+                    'extractor_key': ie_result.get('extractor_key'),
+                }
 
-            if self._match_entry(entry, incomplete=True) is not None:
-                continue
+                if self._match_entry(entry, incomplete=True) is not None:
+                    continue
 
-            entry_result = self.__process_iterable_entry(entry, download, extra)
-            if not entry_result:
-                failures += 1
-            if failures >= max_failures:
-                self.report_error(
-                    'Skipping the remaining entries in playlist "%s" since %d items failed extraction' % (playlist, failures))
-                break
-            playlist_results.append(entry_result)
+                entry_result = self.__process_iterable_entry(entry, download, extra)
+                if not entry_result:
+                    failures += 1
+                if failures >= max_failures:
+                    self.report_error(
+                        'Skipping the remaining entries in playlist "%s" since %d items failed extraction' % (playlist, failures))
+                    break
+                playlist_results.append(entry_result)
         ie_result['entries'] = playlist_results
 
         # Write the updated info to json
@@ -1812,6 +1862,117 @@ class YoutubeDL(object):
         return self.process_ie_result(
             entry, download=download, extra_info=extra_info)
 
+    @contextlib.contextmanager
+    def _playlist_pipeline(self, entries):
+        """
+        Extract the upcoming entries of a playlist and post-process the downloaded
+        ones in the background, as requested by playlist_prefetch. Yields a function
+        that must be called with the (1-based) position of each entry before it is processed
+        """
+        prefetch = self.params.get('playlist_prefetch') or 0
+        if prefetch <= 0:
+            yield lambda i: None
+            return
+
+        # The worker of the outermost playlist is shared by the nested ones
+        owns_worker = self._postprocessing_worker is None
+        if owns_worker:
+            self._postprocessing_worker = concurrent.futures.ThreadPoolExecutor(1)
+        pool, prefetched, next_entry = None, [], 0
+        # Flat extraction does not extract the entries at all, and
+        # the entries must not be requested without sleeping in between
+        if not self.params.get('extract_flat') and not self.params.get('sleep_before_extract'):
+            pool = concurrent.futures.ThreadPoolExecutor(prefetch)
+
+        def advance(i):
+            nonlocal next_entry
+            self._raise_postprocessing_errors()
+            if pool is None:
+                return
+            next_entry = max(next_entry, i)
+            for _, entry in entries[next_entry:i + prefetch]:
+                key = self._prefetch_extraction(entry, pool)
+                if key:
+                    prefetched.append(key)
+            next_entry = max(next_entry, min(i + prefetch, len(entries)))
+
+        try:
+            yield advance
+        except KeyboardInterrupt:
+            for _, future in self._postprocessing_jobs:
+                future.cancel()
+            raise
+        finally:
+            if pool is not None:
+                for key in prefetched:
+                    future = self._prefetched_extractions.pop(key, None)
+                    if future:
+                        future.cancel()
+                pool.shutdown(wait=False)
+            if owns_worker:
+                self._postprocessing_worker.shutdown()
+                self._postprocessing_worker = None
+                jobs, self._postprocessing_jobs = self._postprocessing_jobs, []
+        if owns_worker:
+            # Errors of the background post-processing are not raised over other exceptions
+            for _, future in jobs:
+                if not future.cancelled():
+                    future.result()
+
+    def _prefetch_extraction(self, entry, pool):
+        """
+        Start extracting a playlist entry on the pool, unless it will be skipped.
+        Returns the key of the extraction in _prefetched_extractions
+        """
+        if not isinstance(entry, dict) or entry.get('_type') not in ('url', 'url_transparent'):
+            return
+        # Whether the video is skipped is not known until its post-processing is done
+        if self._postprocessing_of(entry):
+            return
+        try:
+            if self._match_entry(entry, incomplete=True, silent=True) is not None:
+                return
+        except (ExistingVideoReached, RejectedVideoReached):
+            return
+
+        url = sanitize_url(entry['url'])
+        ie_key = entry.get('ie_key')
+        ies = {ie_key: self._get_info_extractor_class(ie_key)}.items() if ie_key else self._suitable_ie_candidates(url)
+        ie_key = next((key for key, ie in ies if ie.suitable(url)), None)
+        if ie_key is None:
+            return
+        # Extractors keep per-instance state (initialization, geo bypass, caches) that
+        # is not thread-safe, so every prefetched extraction gets its own instance
+        ie = type(self.get_info_extractor(ie_key))(self)
+        temp_id = ie.get_temp_id(url)
+        if temp_id is not None and (
+                self._postprocessing_of({'id': temp_id, 'ie_key': ie_key})
+                or self.in_download_archive({'id': temp_id, 'ie_key': ie_key})):
+            return
+
+        key = (ie_key, url)
+        if key not in self._prefetched_extractions:
+            self._prefetched_extractions[key] = pool.submit(ie.extract, url)
+        return key
+
+    def _postprocessing_of(self, info_dict):
+        """Return the futures of the background post-processing of the video"""
+        vid_id = self._postprocessing_jobs and self._make_archive_id(info_dict)
+        return [future for job_id, future in self._postprocessing_jobs if vid_id and job_id == vid_id]
+
+    def _wait_for_postprocessing(self, info_dict):
+        """Wait until the video is no longer being post-processed in the background"""
+        concurrent.futures.wait(self._postprocessing_of(info_dict))
+
+    def _raise_postprocessing_errors(self):
+        """Forget the finished background post-processing and re-raise its errors"""
+        done = [job for job in self._postprocessing_jobs if job[1].done()]
+        for job in done:
+            self._postprocessing_jobs.remove(job)
+        for _, future in done:
+            if not future.cancelled():
+                future.result()
+
     def _build_format_filter(self, filter_spec):
         " Returns a function to filter the formats according to the filter_spec "
 
@@ -1873,32 +2034,117 @@ class YoutubeDL(object):
             return op(actual_value, comparison_value)
         return _filter
 
+    # Number of formats and thumbnails that are checked at once
+    _FORMAT_CHECK_WORKERS = 4
+    _THUMBNAIL_CHECK_WORKERS = 8
+
+    def _probe_format(self, f):
+        """
+        Check a progressive HTTP format by requesting its first byte.
+        Return None if the format has to be test-downloaded instead
+        """
+        if f.get('protocol') not in ('http', 'https') or f.get('fragments') or f.get('downloader_options'):
+            return None
+        headers = dict(f.get('http_headers') or self._calc_headers(f), Range='bytes=0-0')
+        try:
+            with contextlib.closing(self.urlopen(sanitized_Request(f['url'], None, headers))) as rsp:
+                rsp.read(1)
+                return rsp.getcode() in (200, 206)
+        except compat_urllib_error.HTTPError as err:
+            if err.code in (401, 403, 404, 410):
+                return False
+        except network_exceptions:
+            pass
+        # Some servers do not support ranges; test as usual
+        return None
+
+    def _test_download_format(self, f):
+        path = self.get_output_path('temp')
+        if not self._ensure_dir_exists(f'{path}/'):
+            return False
+        temp_file = tempfile.NamedTemporaryFile(suffix='.tmp', delete=False, dir=path or None)
+        temp_file.close()
+        try:
+            success, _ = self.dl(temp_file.name, f, test=True)
+        except (DownloadError, IOError, OSError, ValueError) + network_exceptions:
+            success = False
+        finally:
+            if os.path.exists(temp_file.name):
+                try:
+                    os.remove(temp_file.name)
+                except OSError:
+                    self.report_warning('Unable to delete temporary file "%s"' % temp_file.name)
+        return success
+
+    def _check_format(self, f):
+        """Return whether the format can be downloaded. The result is kept for the rest of the run"""
+        url = f.get('url')
+        if url in self._checked_formats:
+            return self._checked_formats[url]
+        self.to_screen('[info] Testing format %s' % f['format_id'])
+        success = self._probe_format(f)
+        if success is None:
+            success = self._test_download_format(f)
+        if url:
+            self._checked_formats[url] = success
+        return success
+
+    def _check_in_order(self, items, check, workers):
+        """
+        Yield (item, check(item)) for each item, in the given order. The next few
+        items are checked concurrently, and no more are checked once the consumer
+        stops iterating
+        """
+        items, pending = iter(items), collections.deque()
+        pool = concurrent.futures.ThreadPoolExecutor(workers)
+        try:
+            while True:
+                for item in itertools.islice(items, workers - len(pending)):
+                    pending.append((item, pool.submit(check, item)))
+                if not pending:
+                    return
+                item, future = pending.popleft()
+                yield item, future.result()
+        finally:
+            for _, future in pending:
+                future.cancel()
+            pool.shutdown(wait=False)
+
     def _check_formats(self, formats):
-        for f in formats:
-            self.to_screen('[info] Testing format %s' % f['format_id'])
-            path = self.get_output_path('temp')
-            if not self._ensure_dir_exists(f'{path}/'):
-                continue
-            temp_file = tempfile.NamedTemporaryFile(suffix='.tmp', delete=False, dir=path or None)
-            temp_file.close()
-            try:
-                success, _ = self.dl(temp_file.name, f, test=True)
-            except (DownloadError, IOError, OSError, ValueError) + network_exceptions:
-                success = False
-            finally:
-                if os.path.exists(temp_file.name):
-                    try:
-                        os.remove(temp_file.name)
-                    except OSError:
-                        self.report_warning('Unable to delete temporary file "%s"' % temp_file.name)
-            if success:
-                yield f
-            else:
-                self.to_screen('[info] Unable to download format %s. Skipping...' % f['format_id'])
+        """Yield the formats that can be downloaded, in the given order"""
+        with contextlib.closing(self._check_in_order(formats, self._check_format, self._FORMAT_CHECK_WORKERS)) as checks:
+            for f, success in checks:
+                if success:
+                    yield f
+                else:
+                    self.to_screen('[info] Unable to download format %s. Skipping...' % f['format_id'])
+
+    def _check_thumbnail(self, t):
+        """Return whether the thumbnail can be downloaded. The result is kept for the rest of the run"""
+        if t['url'] in self._checked_thumbnails:
+            return self._checked_thumbnails[t['url']]
+        host = compat_urllib_parse_urlparse(t['url']).netloc
+        if host in self._dead_thumbnail_hosts:
+            self.to_screen(f'[info] Skipping thumbnail {t["id"]} since {host} could not be connected to')
+            return False
+        self.to_screen(f'[info] Testing thumbnail {t["id"]}')
+        try:
+            self.urlopen(HEADRequest(t['url'])).close()
+            success = True
+        except network_exceptions as err:
+            self.to_screen(f'[info] Unable to connect to thumbnail {t["id"]} URL {t["url"]!r} - {err}. Skipping...')
+            if isinstance(getattr(err, 'reason', err), (socket.gaierror, ConnectionRefusedError)):
+                # The host can not be resolved or is not listening at all. Other errors,
+                # like timeouts and reset connections, may not happen again
+                self._dead_thumbnail_hosts.add(host)
+            success = False
+        self._checked_thumbnails[t['url']] = success
+        return success
 
     def _default_format_spec(self, info_dict, download=True):
 
         def can_merge():
+            from .postprocessor import FFmpegMergerPP
             merger = FFmpegMergerPP(self)
             return merger.available and merger.can_merge()
 
@@ -2310,14 +2556,9 @@ class YoutubeDL(object):
             return
 
         def check_thumbnails(thumbnails):
-            for t in thumbnails:
-                self.to_screen(f'[info] Testing thumbnail {t["id"]}')
-                try:
-                    self.urlopen(HEADRequest(t['url']))
-                except network_exceptions as err:
-                    self.to_screen(f'[info] Unable to connect to thumbnail {t["id"]} URL {t["url"]!r} - {err}. Skipping...')
-                    continue
-                yield t
+            with contextlib.closing(self._check_in_order(
+                    thumbnails, self._check_thumbnail, self._THUMBNAIL_CHECK_WORKERS)) as checks:
+                yield from (t for t, success in checks if success)
 
         self._sort_thumbnails(thumbnails)
         for i, t in enumerate(thumbnails):
@@ -2793,14 +3034,21 @@ class YoutubeDL(object):
         @functools.wraps(func)
         def process_info(self: 'YoutubeDL', info_dict):
             unlock_file = True
+            jobs = len(self._postprocessing_jobs)
             try:
+                self._wait_for_postprocessing(info_dict)
                 self.lock_file(info_dict)
                 func(self, info_dict)
             except ExclusivelyLockedError:
                 self.report_warning('being downloaded in other process; skipping')
                 unlock_file = False
             finally:
-                if unlock_file:
+                if not unlock_file:
+                    pass
+                elif len(self._postprocessing_jobs) > jobs:
+                    # Keep the video locked until it has been post-processed in the background
+                    self._postprocessing_jobs[-1][1].add_done_callback(lambda _: self.unlock_file(info_dict))
+                else:
                     self.unlock_file(info_dict)
 
         return process_info
@@ -2985,11 +3233,12 @@ class YoutubeDL(object):
             self.report_error('Preprocessing: %s' % str(err))
             return
 
-        must_record_download_archive = False
+        must_record_download_archive = post_processing_in_background = False
         if self.params.get('skip_download', False):
             info_dict['filepath'] = temp_filename
             info_dict['__finaldir'] = os.path.dirname(os.path.abspath(encodeFilename(full_filename)))
             info_dict['__files_to_move'] = files_to_move
+            from .postprocessor import MoveFilesAfterDownloadPP
             info_dict = self.run_pp(MoveFilesAfterDownloadPP(self, False), info_dict)
         else:
             # Download
@@ -3049,6 +3298,9 @@ class YoutubeDL(object):
                     dl_filename = existing_file(full_filename, temp_filename)
                     info_dict['__real_download'] = False
 
+                    from .downloader import FFmpegFD
+                    from .postprocessor import FFmpegMergerPP
+
                     downloaded = []
                     merger = FFmpegMergerPP(self)
 
@@ -3133,6 +3385,15 @@ class YoutubeDL(object):
             if success and full_filename != '-':
 
                 def fixup():
+                    from .postprocessor import (
+                        FFmpegFixupDuplicateMoovPP,
+                        FFmpegFixupDurationPP,
+                        FFmpegFixupM3u8PP,
+                        FFmpegFixupM4aPP,
+                        FFmpegFixupStretchedPP,
+                        FFmpegFixupTimestampPP,
+                    )
+
                     do_fixup = True
                     fixup_policy = self.params.get('fixup')
                     vid = info_dict['id']
@@ -3185,25 +3446,45 @@ class YoutubeDL(object):
                     ffmpeg_fixup(downloader == 'WebSocketFragmentFD', 'Malformed duration detected', FFmpegFixupDurationPP)
 
                 fixup()
-                try:
-                    info_dict = self.post_process(dl_filename, info_dict, files_to_move)
-                except PostProcessingError as err:
-                    self.report_error('Postprocessing: %s' % str(err))
-                    return
-                try:
-                    for ph in self._post_hooks:
-                        ph(info_dict['filepath'])
-                except Exception as err:
-                    self.report_error('post hooks: %s' % str(err))
-                    return
-                must_record_download_archive = True
+                if self._postprocessing_worker is not None:
+                    def post_process_and_record(info_dict):
+                        info_dict = self.__post_process_download(dl_filename, info_dict, files_to_move)
+                        if info_dict is not None:
+                            self.record_download_archive(info_dict)
+
+                    self._postprocessing_jobs.append((
+                        self._make_archive_id(info_dict),
+                        self._postprocessing_worker.submit(post_process_and_record, info_dict)))
+                    post_processing_in_background = True
+                else:
+                    info_dict = self.__post_process_download(dl_filename, info_dict, files_to_move)
+                    if info_dict is None:
+                        return
+                    must_record_download_archive = True
 
-        if must_record_download_archive or self.params.get('force_write_download_archive', False):
+        # When post-processing in the background, the video is recorded once that is done
+        if not post_processing_in_background and (
+                must_record_download_archive or self.params.get('force_write_download_archive', False)):
             self.record_download_archive(info_dict)
         max_downloads = self.params.get('max_downloads')
         if max_downloads is not None and self._num_downloads >= int(max_downloads):
             raise MaxDownloadsReached()
 
+    def __post_process_download(self, filename, info_dict, files_to_move):
+        """Run the postprocessors and post hooks. Returns the updated info, or None on error"""
+        try:
+            info_dict = self.post_process(filename, info_dict, files_to_move)
+        except PostProcessingError as err:
+            self.report_error('Postprocessing: %s' % str(err))
+            return
+        try:
+            for ph in self._post_hooks:
+                ph(info_dict['filepath'])
+        except Exception as err:
+            self.report_error('post hooks: %s' % str(err))
+            return
+        return info_dict
+
     def __download_wrapper(self, func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
@@ -3224,6 +3505,19 @@ class YoutubeDL(object):
                     self.to_stdout(json.dumps(self.sanitize_info(res)))
         return wrapper
 
+    def __flush_archive(func):
+        """Write the batched entries of the download archive when func returns"""
+        @functools.wraps(func)
+        def wrapper(self: 'YoutubeDL', *args, **kwargs):
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                if hasattr(self.archive, 'flush'):
+                    self.archive.flush()
+
+        return wrapper
+
+    @__flush_archive
     @__clean_fd
     def download(self, url_list):
         """Download a given list of URLs."""
@@ -3241,6 +3535,7 @@ class YoutubeDL(object):
 
         return self._download_retcode
 
+    @__flush_archive
     def download_with_info_file(self, info_filename):
         with contextlib.closing(fileinput.FileInput(
                 [info_filename], mode='r',
@@ -3353,11 +3648,16 @@ class YoutubeDL(object):
 
     def post_process(self, filename, ie_info, files_to_move=None):
         """Run all the postprocessors on the given file."""
+        from .postprocessor import FFmpegPipelinePP, MoveFilesAfterDownloadPP
+
         info = dict(ie_info)
         info['filepath'] = filename
         info['__files_to_move'] = files_to_move or {}
 
-        for pp in ie_info.get('__postprocessors', []) + self._pps['post_process']:
+        pps = ie_info.get('__postprocessors', []) + self._pps['post_process']
+        if self.params.get('fuse_postprocessors', True):
+            pps = FFmpegPipelinePP.fuse(self, pps)
+        for pp in pps:
             info = self.run_pp(pp, info)
         info = self.run_pp(MoveFilesAfterDownloadPP(self), info)
         del info['__files_to_move']
@@ -3377,7 +3677,7 @@ class YoutubeDL(object):
             if not url:
                 return
             # Try to find matching extractor for the URL and take its ie_key
-            for ie_key, ie in self._ies.items():
+            for ie_key, ie in self._suitable_ie_candidates(url):
                 if ie.suitable(url):
                     extractor = ie_key
                     break
@@ -3420,6 +3720,8 @@ class YoutubeDL(object):
         if not vid_id:
             return False  # Incomplete video information
 
+        # The video is recorded only once it has been post-processed
+        self._wait_for_postprocessing(info_dict)
         return vid_id in self.archive
 
     def record_download_archive(self, info_dict):
@@ -3428,8 +3730,6 @@ class YoutubeDL(object):
             return
         vid_id = self._make_archive_id(info_dict)
         assert vid_id
-        with locked_file(fn, 'a', encoding='utf-8') as archive_file:
-            archive_file.write(vid_id + '\n')
         self.archive.add(vid_id)
 
     def lock_file(self, info_dict):
@@ -3772,11 +4072,14 @@ class YoutubeDL(object):
             platform.architecture()[0],
             platform_name()))
 
+        from .postprocessor import FFmpegPostProcessor
         exe_versions, ffmpeg_features = FFmpegPostProcessor.get_versions_and_features(self)
         ffmpeg_features = {key for key, val in ffmpeg_features.items() if val}
         if ffmpeg_features:
             exe_versions['ffmpeg'] += ' (%s)' % ','.join(ffmpeg_features)
 
+        from .downloader.rtmp import rtmpdump_version
+        from .extractor.openload import PhantomJSwrapper
         exe_versions['rtmpdump'] = rtmpdump_version()
         exe_versions['phantomjs'] = PhantomJSwrapper._version()
         exe_str = ', '.join(
@@ -3823,7 +4126,12 @@ class YoutubeDL(object):
         opts_cookiefile = self.params.get('cookiefile')
         opts_proxy = self.params.get('proxy')
 
-        self.cookiejar = load_cookies(opts_cookiefile, opts_cookiesfrombrowser, self)
+        if opts_cookiefile is None and opts_cookiesfrombrowser is None:
+            # Don't import the cookie extraction code when there are no cookies to load
+            self.cookiejar = YoutubeDLCookieJar()
+        else:
+            from .cookies import load_cookies
+            self.cookiejar = load_cookies(opts_cookiefile, opts_cookiesfrombrowser, self)
 
         cookie_processor = YoutubeDLCookieProcessor(self.cookiejar)
         if opts_proxy is not None:
@@ -3839,8 +4147,10 @@ class YoutubeDL(object):
         proxy_handler = PerRequestProxyHandler(proxies)
 
         debuglevel = 1 if self.params.get('debug_printtraffic') else 0
-        https_handler = make_HTTPS_handler(self.params, debuglevel=debuglevel)
-        ydlh = YoutubeDLHandler(self.params, debuglevel=debuglevel)
+        self._connection_pool = HTTPConnectionPool() if self.params.get('http_keep_alive', True) else None
+        https_handler = make_HTTPS_handler(
+            self.params, debuglevel=debuglevel, connection_pool=self._connection_pool)
+        ydlh = YoutubeDLHandler(self.params, debuglevel=debuglevel, connection_pool=self._connection_pool)
         redirect_handler = YoutubeDLRedirectHandler()
         data_handler = compat_urllib_request_DataHandler()
 
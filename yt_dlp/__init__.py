@@ -21,7 +21,6 @@ from .compat import (
     compat_shlex_quote,
     workaround_optparse_bug9161,
 )
-from .cookies import SUPPORTED_BROWSERS
 from .utils import (
     DateRange,
     decodeOption,
@@ -40,6 +39,7 @@ from .utils import (
     SameFileError,
     setproctitle,
     std_headers,
+    SUPPORTED_BROWSERS,
     write_string,
     get_filesystem_encoding,
 )
@@ -49,17 +49,14 @@ from .downloader import (
 )
 from .extractor import gen_extractors, list_extractors
 from .extractor.common import InfoExtractor
-from .extractor.adobepass import MSO_INFO
-from .postprocessor import (
-    FFmpegExtractAudioPP,
-    FFmpegSubtitlesConvertorPP,
-    FFmpegThumbnailsConvertorPP,
-    FFmpegVideoConvertorPP,
-    FFmpegVideoRemuxerPP,
-    MetadataFromFieldPP,
-    MetadataParserPP,
-)
 from .longname import DEFAULT_DELIMITER
+from .postprocessor._constants import (
+    EXTRACT_AUDIO_EXTS,
+    SUBTITLES_CONVERT_EXTS,
+    THUMBNAILS_CONVERT_EXTS,
+    VIDEO_CONVERT_EXTS,
+    VIDEO_CONVERT_FORMAT_RE,
+)
 from .YoutubeDL import YoutubeDL
 
 
@@ -139,6 +136,7 @@ def _real_main(argv=None):
             write_string(desc + '\n', out=sys.stdout)
         sys.exit(0)
     if opts.ap_list_mso:
+        from .extractor.adobepass import MSO_INFO
         table = [[mso_id, mso_info['name']] for mso_id, mso_info in MSO_INFO.items()]
         write_string('Supported TV Providers:\n' + render_table(['mso', 'mso name'], table) + '\n', out=sys.stdout)
         sys.exit(0)
@@ -214,12 +212,20 @@ def _real_main(argv=None):
     if opts.sleep_interval_requests is not None:
         if opts.sleep_interval_requests < 0:
             parser.error('requests sleep interval must be positive or 0')
-    if opts.ap_mso and opts.ap_mso not in MSO_INFO:
-        parser.error('Unsupported TV Provider, use --ap-list-mso to get a list of supported TV Providers')
+    if opts.ap_mso:
+        from .extractor.adobepass import MSO_INFO
+        if opts.ap_mso not in MSO_INFO:
+            parser.error('Unsupported TV Provider, use --ap-list-mso to get a list of supported TV Providers')
     if opts.overwrites:  # --yes-overwrites implies --no-continue
         opts.continue_dl = False
     if opts.concurrent_fragment_downloads <= 0:
         parser.error('Concurrent fragments must be positive')
+    if opts.http_connections is not None and opts.http_connections <= 0:
+        parser.error('HTTP connections must be positive')
+    if opts.playlist_prefetch < 0:
+        parser.error('playlist prefetch must be positive or 0')
+    if opts.download_archive_batch_size is not None and opts.download_archive_batch_size <= 0:
+        parser.error('download archive batch size must be positive')
     if opts.wait_for_video is not None:
         min_wait, max_wait, *_ = map(parse_duration, opts.wait_for_video.split('-', 1) + [None])
         if min_wait is None or (max_wait is None and '-' in opts.wait_for_video):
@@ -248,6 +254,16 @@ def _real_main(argv=None):
         if numeric_buffersize is None:
             parser.error('invalid buffer size specified')
         opts.buffersize = numeric_buffersize
+    if opts.fragment_memory_limit is not None:
+        numeric_limit = FileDownloader.parse_bytes(opts.fragment_memory_limit)
+        if numeric_limit is None:
+            parser.error('invalid fragment memory limit specified')
+        opts.fragment_memory_limit = numeric_limit
+    if opts.cache_max_size is not None:
+        numeric_limit = FileDownloader.parse_bytes(opts.cache_max_size)
+        if numeric_limit is None:
+            parser.error('invalid cache size specified')
+        opts.cache_max_size = numeric_limit
     if opts.http_chunk_size is not None:
         numeric_chunksize = FileDownloader.parse_bytes(opts.http_chunk_size)
         if not numeric_chunksize:
@@ -259,7 +275,7 @@ def _real_main(argv=None):
         raise parser.error('Playlist end must be greater than playlist start')
     if opts.extractaudio:
         opts.audioformat = opts.audioformat.lower()
-        if opts.audioformat not in ['best'] + list(FFmpegExtractAudioPP.SUPPORTED_EXTS):
+        if opts.audioformat not in ['best'] + list(EXTRACT_AUDIO_EXTS):
             parser.error('invalid audio format specified')
     if opts.audioquality:
         opts.audioquality = opts.audioquality.strip('k').strip('K')
@@ -268,17 +284,17 @@ def _real_main(argv=None):
             parser.error('invalid audio quality specified')
     if opts.recodevideo is not None:
         opts.recodevideo = opts.recodevideo.replace(' ', '')
-        if not re.match(FFmpegVideoConvertorPP.FORMAT_RE, opts.recodevideo):
+        if not re.match(VIDEO_CONVERT_FORMAT_RE, opts.recodevideo):
             parser.error('invalid video remux format specified')
     if opts.remuxvideo is not None:
         opts.remuxvideo = opts.remuxvideo.replace(' ', '')
-        if not re.match(FFmpegVideoRemuxerPP.FORMAT_RE, opts.remuxvideo):
+        if not re.match(VIDEO_CONVERT_FORMAT_RE, opts.remuxvideo):
             parser.error('invalid video remux format specified')
     if opts.convertsubtitles is not None:
-        if opts.convertsubtitles not in FFmpegSubtitlesConvertorPP.SUPPORTED_EXTS:
+        if opts.convertsubtitles not in SUBTITLES_CONVERT_EXTS:
             parser.error('invalid subtitle format specified')
     if opts.convertthumbnails is not None:
-        if opts.convertthumbnails not in FFmpegThumbnailsConvertorPP.SUPPORTED_EXTS:
+        if opts.convertthumbnails not in THUMBNAILS_CONVERT_EXTS:
             parser.error('invalid thumbnail format specified')
     if opts.cookiesfrombrowser is not None:
         opts.cookiesfrombrowser = [
@@ -377,6 +393,8 @@ def _real_main(argv=None):
             parser.error('invalid format sort string "%s" specified' % f)
 
     def metadataparser_actions(f):
+        from .postprocessor import MetadataFromFieldPP, MetadataParserPP
+
         if isinstance(f, str):
             cmd = '--parse-metadata %s' % compat_shlex_quote(f)
             try:
@@ -632,8 +650,8 @@ def _real_main(argv=None):
     # report_deprecation(opts.writeannotations, '--write-annotations')  # It's just that no website has it
 
     final_ext = (
-        opts.recodevideo if opts.recodevideo in FFmpegVideoConvertorPP.SUPPORTED_EXTS
-        else opts.remuxvideo if opts.remuxvideo in FFmpegVideoRemuxerPP.SUPPORTED_EXTS
+        opts.recodevideo if opts.recodevideo in VIDEO_CONVERT_EXTS
+        else opts.remuxvideo if opts.remuxvideo in VIDEO_CONVERT_EXTS
         else opts.audioformat if (opts.extractaudio and opts.audioformat != 'best')
         else None)
 
@@ -695,9 +713,12 @@ def _real_main(argv=None):
         'skip_unavailable_fragments': opts.skip_unavailable_fragments,
         'keep_fragments': opts.keep_fragments,
         'concurrent_fragment_downloads': opts.concurrent_fragment_downloads,
+        'fragment_memory_limit': opts.fragment_memory_limit,
+        'fragment_engine': opts.fragment_engine,
         'buffersize': opts.buffersize,
         'noresizebuffer': opts.noresizebuffer,
         'http_chunk_size': opts.http_chunk_size,
+        'http_connections': opts.http_connections,
         'continuedl': opts.continue_dl,
         'noprogress': opts.quiet if opts.noprogress is None else opts.noprogress,
         'progress_with_newline': opts.progress_with_newline,
@@ -706,6 +727,7 @@ def _real_main(argv=None):
         'playlistend': opts.playlistend,
         'playlistreverse': opts.playlist_reverse,
         'playlistrandom': opts.playlist_random,
+        'playlist_prefetch': opts.playlist_prefetch,
         'noplaylist': opts.noplaylist,
         'logtostderr': outtmpl_default == '-',
         'consoletitle': opts.consoletitle,
@@ -745,9 +767,11 @@ def _real_main(argv=None):
         'max_views': opts.max_views,
         'daterange': date,
         'cachedir': opts.cachedir,
+        'cache_max_size': opts.cache_max_size,
         'youtube_print_sig_code': opts.youtube_print_sig_code,
         'age_limit': opts.age_limit,
         'download_archive': download_archive_fn,
+        'download_archive_batch_size': opts.download_archive_batch_size,
         'break_on_existing': opts.break_on_existing,
         'break_on_reject': opts.break_on_reject,
         'break_per_url': opts.break_per_url,
@@ -777,6 +801,7 @@ def _real_main(argv=None):
         'postprocessors': postprocessors,
         'fixup': opts.fixup,
         'source_address': opts.source_address,
+        'http_keep_alive': opts.http_keep_alive,
         'call_home': opts.call_home,
         'sleep_interval_requests': opts.sleep_interval_requests,
         'sleep_interval': opts.sleep_interval,
@@ -791,6 +816,7 @@ def _real_main(argv=None):
         'match_filter': match_filter,
         'no_color': opts.no_color,
         'ffmpeg_location': opts.ffmpeg_location,
+        'fuse_postprocessors': opts.fuse_postprocessors,
         'hls_prefer_native': opts.hls_prefer_native,
         'hls_use_mpegts': opts.hls_use_mpegts,
         'hls_split_discontinuity': opts.hls_split_discontinuity,
@@ -1,6 +1,7 @@
 from __future__ import unicode_literals
 
 from math import ceil
+import struct
 
 from .compat import compat_b64decode, compat_pycrypto_AES
 from .utils import bytes_to_intlist, intlist_to_bytes
@@ -11,6 +12,10 @@ if compat_pycrypto_AES:
         """ Decrypt bytes with AES-CBC using pycryptodome """
         return compat_pycrypto_AES.new(key, compat_pycrypto_AES.MODE_CBC, iv).decrypt(data)
 
+    def aes_ctr_decrypt_bytes(data, key, iv):
+        """ Decrypt bytes with AES-CTR using pycryptodome """
+        return compat_pycrypto_AES.new(key, compat_pycrypto_AES.MODE_CTR, nonce=b'', initial_value=iv).decrypt(data)
+
     def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
         """ Decrypt bytes with AES-GCM using pycryptodome """
         return compat_pycrypto_AES.new(key, compat_pycrypto_AES.MODE_GCM, nonce).decrypt_and_verify(data, tag)
@@ -18,11 +23,15 @@ if compat_pycrypto_AES:
 else:
     def aes_cbc_decrypt_bytes(data, key, iv):
         """ Decrypt bytes with AES-CBC using native implementation since pycryptodome is unavailable """
-        return intlist_to_bytes(aes_cbc_decrypt(*map(bytes_to_intlist, (data, key, iv))))
+        return _aes_cbc_decrypt_fast(data, key, iv)
+
+    def aes_ctr_decrypt_bytes(data, key, iv):
+        """ Decrypt bytes with AES-CTR using native implementation since pycryptodome is unavailable """
+        return _aes_ctr_encrypt_fast(data, key, iv)
 
     def aes_gcm_decrypt_and_verify_bytes(data, key, tag, nonce):
         """ Decrypt bytes with AES-GCM using native implementation since pycryptodome is unavailable """
-        return intlist_to_bytes(aes_gcm_decrypt_and_verify(*map(bytes_to_intlist, (data, key, tag, nonce))))
+        return _aes_gcm_decrypt_and_verify_fast(data, key, tag, nonce)
 
 
 BLOCK_SIZE_BYTES = 16
@@ -498,10 +507,237 @@ def ghash(subkey, data):
     return last_y
 
 
+# Table-driven implementation on 32-bit words, used when pycryptodome is unavailable.
+# Each round of a column is four lookups in the T-tables, which combine SubBytes,
+# ShiftRows and MixColumns (FIPS-197, section 5.2.1 for the inverse cipher)
+
+_T_TABLES = None
+# Below this size, converting the data to numpy arrays costs more than it saves
+_NUMPY_MIN_BYTES = 4096
+
+
+def _gf_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return RIJNDAEL_EXP_TABLE[(RIJNDAEL_LOG_TABLE[a] + RIJNDAEL_LOG_TABLE[b]) % 0xFF]
+
+
+def _get_t_tables():
+    global _T_TABLES
+    if _T_TABLES is None:
+        te0, td0 = [], []
+        for x in range(256):
+            s, si = SBOX[x], SBOX_INV[x]
+            te0.append(_gf_mul(s, 2) << 24 | s << 16 | s << 8 | _gf_mul(s, 3))
+            td0.append(_gf_mul(si, 14) << 24 | _gf_mul(si, 9) << 16 | _gf_mul(si, 13) << 8 | _gf_mul(si, 11))
+
+        def rotations(t0):
+            t1 = [(t >> 8 | t << 24) & 0xFFFFFFFF for t in t0]
+            t2 = [(t >> 8 | t << 24) & 0xFFFFFFFF for t in t1]
+            t3 = [(t >> 8 | t << 24) & 0xFFFFFFFF for t in t2]
+            return tuple(t0), tuple(t1), tuple(t2), tuple(t3)
+        _T_TABLES = rotations(te0), rotations(td0)
+    return _T_TABLES
+
+
+def _round_keys(key):
+    """
+    @param {bytes} key   16/24/32-Byte cipher key
+    @returns             (encryption round keys, decryption round keys) as lists of 32-bit words
+    """
+    expanded_key = key_expansion(bytes_to_intlist(key))
+    enc_keys = list(struct.unpack('>%dI' % (len(expanded_key) // 4), intlist_to_bytes(expanded_key)))
+
+    # Round keys of the equivalent inverse cipher: reversed, with InvMixColumns
+    # applied to all but the first and the last ones
+    _, (td0, td1, td2, td3) = _get_t_tables()
+    dec_keys = []
+    rounds = len(enc_keys) // 4 - 1
+    for i in range(rounds, -1, -1):
+        words = enc_keys[i * 4: i * 4 + 4]
+        if 0 < i < rounds:
+            words = [
+                td0[SBOX[w >> 24]] ^ td1[SBOX[w >> 16 & 0xFF]] ^ td2[SBOX[w >> 8 & 0xFF]] ^ td3[SBOX[w & 0xFF]]
+                for w in words]
+        dec_keys += words
+    return enc_keys, dec_keys
+
+
+def _encrypt_words(s0, s1, s2, s3, rk, tables):
+    t0, t1, t2, t3 = tables
+    s0 ^= rk[0]
+    s1 ^= rk[1]
+    s2 ^= rk[2]
+    s3 ^= rk[3]
+    for k in range(4, len(rk) - 4, 4):
+        s0, s1, s2, s3 = (
+            t0[s0 >> 24] ^ t1[s1 >> 16 & 0xFF] ^ t2[s2 >> 8 & 0xFF] ^ t3[s3 & 0xFF] ^ rk[k],
+            t0[s1 >> 24] ^ t1[s2 >> 16 & 0xFF] ^ t2[s3 >> 8 & 0xFF] ^ t3[s0 & 0xFF] ^ rk[k + 1],
+            t0[s2 >> 24] ^ t1[s3 >> 16 & 0xFF] ^ t2[s0 >> 8 & 0xFF] ^ t3[s1 & 0xFF] ^ rk[k + 2],
+            t0[s3 >> 24] ^ t1[s0 >> 16 & 0xFF] ^ t2[s1 >> 8 & 0xFF] ^ t3[s2 & 0xFF] ^ rk[k + 3])
+    k = len(rk) - 4
+    return (
+        (SBOX[s0 >> 24] << 24 | SBOX[s1 >> 16 & 0xFF] << 16 | SBOX[s2 >> 8 & 0xFF] << 8 | SBOX[s3 & 0xFF]) ^ rk[k],
+        (SBOX[s1 >> 24] << 24 | SBOX[s2 >> 16 & 0xFF] << 16 | SBOX[s3 >> 8 & 0xFF] << 8 | SBOX[s0 & 0xFF]) ^ rk[k + 1],
+        (SBOX[s2 >> 24] << 24 | SBOX[s3 >> 16 & 0xFF] << 16 | SBOX[s0 >> 8 & 0xFF] << 8 | SBOX[s1 & 0xFF]) ^ rk[k + 2],
+        (SBOX[s3 >> 24] << 24 | SBOX[s0 >> 16 & 0xFF] << 16 | SBOX[s1 >> 8 & 0xFF] << 8 | SBOX[s2 & 0xFF]) ^ rk[k + 3])
+
+
+def _decrypt_words(s0, s1, s2, s3, rk, tables):
+    t0, t1, t2, t3 = tables
+    s0 ^= rk[0]
+    s1 ^= rk[1]
+    s2 ^= rk[2]
+    s3 ^= rk[3]
+    for k in range(4, len(rk) - 4, 4):
+        s0, s1, s2, s3 = (
+            t0[s0 >> 24] ^ t1[s3 >> 16 & 0xFF] ^ t2[s2 >> 8 & 0xFF] ^ t3[s1 & 0xFF] ^ rk[k],
+            t0[s1 >> 24] ^ t1[s0 >> 16 & 0xFF] ^ t2[s3 >> 8 & 0xFF] ^ t3[s2 & 0xFF] ^ rk[k + 1],
+            t0[s2 >> 24] ^ t1[s1 >> 16 & 0xFF] ^ t2[s0 >> 8 & 0xFF] ^ t3[s3 & 0xFF] ^ rk[k + 2],
+            t0[s3 >> 24] ^ t1[s2 >> 16 & 0xFF] ^ t2[s1 >> 8 & 0xFF] ^ t3[s0 & 0xFF] ^ rk[k + 3])
+    k = len(rk) - 4
+    si = SBOX_INV
+    return (
+        (si[s0 >> 24] << 24 | si[s3 >> 16 & 0xFF] << 16 | si[s2 >> 8 & 0xFF] << 8 | si[s1 & 0xFF]) ^ rk[k],
+        (si[s1 >> 24] << 24 | si[s0 >> 16 & 0xFF] << 16 | si[s3 >> 8 & 0xFF] << 8 | si[s2 & 0xFF]) ^ rk[k + 1],
+        (si[s2 >> 24] << 24 | si[s1 >> 16 & 0xFF] << 16 | si[s0 >> 8 & 0xFF] << 8 | si[s3 & 0xFF]) ^ rk[k + 2],
+        (si[s3 >> 24] << 24 | si[s2 >> 16 & 0xFF] << 16 | si[s1 >> 8 & 0xFF] << 8 | si[s0 & 0xFF]) ^ rk[k + 3])
+
+
+def _to_words(data):
+    """Pad data with zeros to whole blocks, and split it in 32-bit words"""
+    data += b'\0' * (-len(data) % BLOCK_SIZE_BYTES)
+    return struct.unpack('>%dI' % (len(data) // 4), data)
+
+
+def _from_words(words, length):
+    return struct.pack('>%dI' % len(words), *words)[:length]
+
+
+def _get_numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def _aes_cbc_decrypt_numpy(numpy, data, dec_keys, iv):
+    """Decrypt all the blocks at once; in CBC mode, the decryption of a block does not depend on the others"""
+    _, tables = _get_t_tables()
+    t0, t1, t2, t3 = (numpy.array(t, dtype=numpy.uint32) for t in tables)
+    si = numpy.array(SBOX_INV, dtype=numpy.uint32)
+    rk = numpy.array(dec_keys, dtype=numpy.uint32)
+
+    padded = data + b'\0' * (-len(data) % BLOCK_SIZE_BYTES)
+    blocks = numpy.frombuffer(padded, dtype='>u4').astype(numpy.uint32).reshape(-1, 4)
+    s0, s1, s2, s3 = (blocks[:, i] ^ rk[i] for i in range(4))
+    for k in range(4, len(dec_keys) - 4, 4):
+        s0, s1, s2, s3 = (
+            t0[s0 >> 24] ^ t1[s3 >> 16 & 0xFF] ^ t2[s2 >> 8 & 0xFF] ^ t3[s1 & 0xFF] ^ rk[k],
+            t0[s1 >> 24] ^ t1[s0 >> 16 & 0xFF] ^ t2[s3 >> 8 & 0xFF] ^ t3[s2 & 0xFF] ^ rk[k + 1],
+            t0[s2 >> 24] ^ t1[s1 >> 16 & 0xFF] ^ t2[s0 >> 8 & 0xFF] ^ t3[s3 & 0xFF] ^ rk[k + 2],
+            t0[s3 >> 24] ^ t1[s2 >> 16 & 0xFF] ^ t2[s1 >> 8 & 0xFF] ^ t3[s0 & 0xFF] ^ rk[k + 3])
+    k = len(dec_keys) - 4
+    decrypted = numpy.stack((
+        (si[s0 >> 24] << 24 | si[s3 >> 16 & 0xFF] << 16 | si[s2 >> 8 & 0xFF] << 8 | si[s1 & 0xFF]) ^ rk[k],
+        (si[s1 >> 24] << 24 | si[s0 >> 16 & 0xFF] << 16 | si[s3 >> 8 & 0xFF] << 8 | si[s2 & 0xFF]) ^ rk[k + 1],
+        (si[s2 >> 24] << 24 | si[s1 >> 16 & 0xFF] << 16 | si[s0 >> 8 & 0xFF] << 8 | si[s3 & 0xFF]) ^ rk[k + 2],
+        (si[s3 >> 24] << 24 | si[s2 >> 16 & 0xFF] << 16 | si[s1 >> 8 & 0xFF] << 8 | si[s0 & 0xFF]) ^ rk[k + 3],
+    ), axis=1)
+
+    previous = numpy.concatenate((
+        numpy.frombuffer(iv, dtype='>u4').astype(numpy.uint32).reshape(1, 4), blocks[:-1]))
+    return (decrypted ^ previous).astype('>u4').tobytes()[:len(data)]
+
+
+def _aes_cbc_decrypt_fast(data, key, iv, use_numpy=True):
+    """
+    Decrypt bytes with AES-CBC using the T-tables,
+    and with numpy for large data if it is available
+    """
+    _, dec_keys = _round_keys(key)
+    numpy = use_numpy and len(data) >= _NUMPY_MIN_BYTES and _get_numpy()
+    if numpy:
+        return _aes_cbc_decrypt_numpy(numpy, data, dec_keys, iv)
+
+    _, tables = _get_t_tables()
+    words = _to_words(data)
+    p0, p1, p2, p3 = struct.unpack('>4I', iv)
+    decrypted = []
+    for i in range(0, len(words), 4):
+        c0, c1, c2, c3 = words[i: i + 4]
+        d0, d1, d2, d3 = _decrypt_words(c0, c1, c2, c3, dec_keys, tables)
+        decrypted += (d0 ^ p0, d1 ^ p1, d2 ^ p2, d3 ^ p3)
+        p0, p1, p2, p3 = c0, c1, c2, c3
+    return _from_words(decrypted, len(data))
+
+
+def _aes_ctr_encrypt_fast(data, key, iv):
+    """Encrypt (or decrypt) bytes with AES-CTR using the T-tables; the whole 16-Byte iv is the counter"""
+    enc_keys, _ = _round_keys(key)
+    tables, _ = _get_t_tables()
+    words = _to_words(data)
+    counter = int.from_bytes(iv, 'big')
+    encrypted = []
+    for i in range(0, len(words), 4):
+        k0, k1, k2, k3 = _encrypt_words(
+            counter >> 96, counter >> 64 & 0xFFFFFFFF, counter >> 32 & 0xFFFFFFFF, counter & 0xFFFFFFFF,
+            enc_keys, tables)
+        encrypted += (words[i] ^ k0, words[i + 1] ^ k1, words[i + 2] ^ k2, words[i + 3] ^ k3)
+        counter = (counter + 1) & ((1 << 128) - 1)
+    return _from_words(encrypted, len(data))
+
+
+def _ghash_fast(subkey, data):
+    """GHASH on 128-bit integers (NIST SP 800-38D, Algorithms 1 and 2); data is whole blocks"""
+    R = 0xE1 << 120
+    y = 0
+    for i in range(0, len(data), BLOCK_SIZE_BYTES):
+        x = y ^ int.from_bytes(data[i: i + BLOCK_SIZE_BYTES], 'big')
+        z, v = 0, subkey
+        for bit in range(127, -1, -1):
+            if x >> bit & 1:
+                z ^= v
+            v = (v >> 1) ^ R if v & 1 else v >> 1
+        y = z
+    return y.to_bytes(BLOCK_SIZE_BYTES, 'big')
+
+
+def _aes_gcm_decrypt_and_verify_fast(data, key, tag, nonce):
+    """Same as aes_gcm_decrypt_and_verify, on bytes"""
+    enc_keys, _ = _round_keys(key)
+    tables, _ = _get_t_tables()
+    hash_subkey = 0
+    for word in _encrypt_words(0, 0, 0, 0, enc_keys, tables):
+        hash_subkey = hash_subkey << 32 | word
+
+    if len(nonce) == 12:
+        j0 = nonce + b'\0\0\0\1'
+    else:
+        fill = (BLOCK_SIZE_BYTES - (len(nonce) % BLOCK_SIZE_BYTES)) % BLOCK_SIZE_BYTES + 8
+        j0 = _ghash_fast(hash_subkey, nonce + b'\0' * fill + (8 * len(nonce)).to_bytes(8, 'big'))
+
+    iv_ctr = ((int.from_bytes(j0, 'big') + 1) & ((1 << 128) - 1)).to_bytes(BLOCK_SIZE_BYTES, 'big')
+    decrypted_data = _aes_ctr_encrypt_fast(data, key, iv_ctr)
+    s_tag = _ghash_fast(
+        hash_subkey,
+        data
+        + b'\0' * (-len(data) % BLOCK_SIZE_BYTES)   # pad
+        + (0 * 8).to_bytes(8, 'big')                # length of associated data
+        + (len(data) * 8).to_bytes(8, 'big'))       # length of data
+
+    if tag != _aes_ctr_encrypt_fast(s_tag, key, j0):
+        raise ValueError("Mismatching authentication tag")
+
+    return decrypted_data
+
+
 __all__ = [
     'aes_ctr_decrypt',
     'aes_cbc_decrypt',
     'aes_cbc_decrypt_bytes',
+    'aes_ctr_decrypt_bytes',
     'aes_decrypt_text',
     'aes_encrypt',
     'aes_gcm_decrypt_and_verify',
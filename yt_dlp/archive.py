@@ -0,0 +1,176 @@
+from __future__ import unicode_literals
+
+import errno
+import os
+import threading
+
+from .utils import locked_file
+
+try:
+    import sqlite3
+    SQLITE_AVAILABLE = True
+except ImportError:
+    # See yt_dlp/cookies.py
+    SQLITE_AVAILABLE = False
+
+
+SQLITE_MAGIC = b'SQLite format 3\x00'
+SQLITE_EXTENSIONS = ('.db', '.sqlite', '.sqlite3')
+
+
+class TextDownloadArchive(object):
+    """
+    Download archive in the original text format: one "<extractor> <id>" per line.
+    The whole file is loaded into memory when opened
+    """
+
+    def __init__(self, filename, batch_size=1):
+        self.filename = filename
+        self._batch_size = batch_size
+        self._ids = set()
+        self._pending = []
+        self._lock = threading.RLock()
+        try:
+            with locked_file(filename, 'r', encoding='utf-8') as archive_file:
+                for line in archive_file:
+                    self._ids.add(line.strip())
+        except IOError as ioe:
+            if ioe.errno != errno.ENOENT:
+                raise
+
+    def __contains__(self, vid_id):
+        return vid_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __iter__(self):
+        return iter(set(self._ids))
+
+    def add(self, vid_id):
+        with self._lock:
+            self._ids.add(vid_id)
+            self._pending.append(vid_id)
+            if len(self._pending) >= self._batch_size:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            with locked_file(self.filename, 'a', encoding='utf-8') as archive_file:
+                archive_file.write(''.join('%s\n' % vid_id for vid_id in self._pending))
+            self._pending = []
+
+    def close(self):
+        self.flush()
+
+
+class SQLiteDownloadArchive(object):
+    """
+    Download archive kept in an SQLite database.
+    Lookups are indexed queries, so opening the archive does not depend on its size
+    """
+
+    def __init__(self, filename, batch_size=1):
+        self.filename = filename
+        self._batch_size = batch_size
+        self._pending = set()
+        self._lock = threading.RLock()
+        # Other processes hold the write lock only briefly; wait for them
+        self._conn = sqlite3.connect(filename, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('CREATE TABLE IF NOT EXISTS archive (id TEXT PRIMARY KEY NOT NULL) WITHOUT ROWID')
+
+    def __contains__(self, vid_id):
+        with self._lock:
+            return vid_id in self._pending or self._conn.execute(
+                'SELECT 1 FROM archive WHERE id = ?', (vid_id, )).fetchone() is not None
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM archive').fetchone()[0] + len(self._pending)
+
+    def __iter__(self):
+        with self._lock:
+            return iter([row[0] for row in self._conn.execute('SELECT id FROM archive')] + list(self._pending))
+
+    def add(self, vid_id):
+        with self._lock:
+            self._pending.add(vid_id)
+            if len(self._pending) >= self._batch_size:
+                self.flush()
+
+    def update(self, vid_ids):
+        """Add many IDs in a single transaction"""
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO archive (id) VALUES (?)', ((vid_id, ) for vid_id in vid_ids))
+                self._conn.execute('COMMIT')
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, set()
+        if pending:
+            self.update(pending)
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+def is_sqlite_archive(filename):
+    if os.path.splitext(filename)[1].lower() in SQLITE_EXTENSIONS:
+        return True
+    try:
+        with open(filename, 'rb') as f:
+            return f.read(len(SQLITE_MAGIC)) == SQLITE_MAGIC
+    except IOError:
+        return False
+
+
+def open_download_archive(filename, batch_size=1):
+    """
+    Open the download archive at filename.
+    Existing SQLite databases and files with a database extension
+    (.db, .sqlite, .sqlite3) use SQLiteDownloadArchive; other files are text archives.
+    With batch_size > 1, new entries are written every batch_size downloads and on close()
+    """
+    if is_sqlite_archive(filename):
+        if not SQLITE_AVAILABLE:
+            raise ImportError('sqlite3 is required to use the download archive %s' % filename)
+        return SQLiteDownloadArchive(filename, batch_size)
+    return TextDownloadArchive(filename, batch_size)
+
+
+def convert_download_archive(src, dest):
+    """
+    Copy the entries of the archive src to dest, dropping duplicates and blank lines.
+    The format of each archive is chosen as in open_download_archive, so this converts
+    a text archive to a database (or back), or compacts it when both are text files.
+    Returns the number of entries written
+    """
+    source = open_download_archive(src)
+    try:
+        vid_ids = sorted(vid_id for vid_id in source if vid_id)
+    finally:
+        source.close()
+
+    if not is_sqlite_archive(dest):
+        tmp = dest + '.part'
+        with locked_file(tmp, 'w', encoding='utf-8') as archive_file:
+            archive_file.write(''.join('%s\n' % vid_id for vid_id in vid_ids))
+        os.replace(tmp, dest)
+        return len(vid_ids)
+
+    archive = open_download_archive(dest)
+    try:
+        archive.update(vid_ids)
+    finally:
+        archive.close()
+    return len(vid_ids)
@@ -1,11 +1,15 @@
 from __future__ import unicode_literals
 
+import collections
+import copy
 import errno
 import io
 import json
 import os
 import re
 import shutil
+import threading
+import time
 import traceback
 
 from .compat import compat_getenv
@@ -14,8 +18,42 @@ from .utils import (
     write_json_file,
 )
 
+try:
+    import sqlite3
+    SQLITE_AVAILABLE = True
+except ImportError:
+    # See yt_dlp/cookies.py
+    SQLITE_AVAILABLE = False
+
 
 class Cache(object):
+    """
+    Persistent cache of JSON-serializable data, grouped in sections.
+
+    Entries are kept in a single SQLite database in the cache directory, which
+    may be shared by several processes. Each entry can have a time to live, and
+    the least recently used entries are evicted once the total size of the cache
+    exceeds the cache_max_size param. Loaded entries are also kept in memory
+    for the lifetime of the process.
+
+    Without sqlite3 support, each entry is stored in its own JSON file and
+    neither TTLs nor the size cap are enforced.
+    """
+
+    _DB_NAME = 'cache.sqlite3'
+    _MAX_SIZE = 64 * 1024 * 1024
+    _MEMORY_ENTRIES = 256
+    # The access time used for LRU eviction is only updated this often, so that
+    # reading an entry does not usually need a write transaction
+    _ACCESS_RESOLUTION = 3600
+
+    # Shared by all the Cache objects of the process
+    _lock = threading.RLock()
+    _connections = {}  # root dir -> sqlite3.Connection
+    # Total size of the entries, counted once per process and then kept up to date by store()
+    _total_sizes = {}  # root dir -> int
+    _memory = collections.OrderedDict()  # (root dir, section, key) -> (data, expires)
+
     def __init__(self, ydl):
         self._ydl = ydl
 
@@ -37,13 +75,131 @@ class Cache(object):
     def enabled(self):
         return self._ydl.params.get('cachedir') is not False
 
-    def store(self, section, key, data, dtype='json'):
+    def _connect(self, root_dir, create=True):
+        """Return the database connection for root_dir, or None if it can not be used"""
+        if not SQLITE_AVAILABLE:
+            return None
+        with self._lock:
+            if root_dir in self._connections:
+                return self._connections[root_dir]
+            if not create and not os.path.exists(os.path.join(root_dir, self._DB_NAME)):
+                return None
+            conn = None
+            try:
+                try:
+                    os.makedirs(root_dir)
+                except OSError as ose:
+                    if ose.errno != errno.EEXIST:
+                        raise
+                # Other processes hold the write lock only briefly; wait for them
+                conn = sqlite3.connect(
+                    os.path.join(root_dir, self._DB_NAME), timeout=30,
+                    isolation_level=None, check_same_thread=False)
+                conn.execute('PRAGMA journal_mode=WAL')
+                conn.execute('PRAGMA synchronous=NORMAL')
+                conn.execute(
+                    'CREATE TABLE IF NOT EXISTS cache ('
+                    'section TEXT NOT NULL, key TEXT NOT NULL, data TEXT NOT NULL, size INTEGER NOT NULL, '
+                    'expires REAL, accessed REAL NOT NULL, PRIMARY KEY (section, key))')
+                conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+                conn.execute('CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)')
+            except Exception:
+                if conn is not None:
+                    conn.close()
+                conn = None
+                self._ydl.report_warning(
+                    'Unable to open cache database in %r; falling back to JSON files: %s'
+                    % (root_dir, traceback.format_exc()))
+            self._connections[root_dir] = conn
+            return conn
+
+    @classmethod
+    def _close(cls, root_dir):
+        with cls._lock:
+            conn = cls._connections.pop(root_dir, None)
+            cls._total_sizes.pop(root_dir, None)
+            if conn is not None:
+                conn.close()
+            for memory_key in [k for k in cls._memory if k[0] == root_dir]:
+                del cls._memory[memory_key]
+
+    def _remember(self, memory_key, data, expires):
+        with self._lock:
+            self._memory[memory_key] = (data, expires)
+            self._memory.move_to_end(memory_key)
+            while len(self._memory) > self._MEMORY_ENTRIES:
+                self._memory.popitem(last=False)
+
+    def _evict(self, conn, now, max_size):
+        """Delete the expired entries, then the least recently used ones over max_size; return the size left"""
+        conn.execute('DELETE FROM cache WHERE expires <= ?', (now, ))
+        # Other processes may have changed the database, so the total is counted again
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM cache').fetchone()[0]
+        if total <= max_size:
+            return total
+        evicted = []
+        for section, key, size in conn.execute('SELECT section, key, size FROM cache ORDER BY accessed'):
+            evicted.append((section, key))
+            total -= size
+            if total <= max_size:
+                break
+        conn.executemany('DELETE FROM cache WHERE section = ? AND key = ?', evicted)
+        self._ydl.write_debug('Evicted %d entries from cache' % len(evicted))
+        return total
+
+    def store(self, section, key, data, dtype='json', ttl=None):
+        """Store data; if ttl is given, the entry expires after that many seconds"""
         assert dtype in ('json',)
 
         if not self.enabled:
             return
 
         fn = self._get_cache_fn(section, key, dtype)
+        root_dir = self._get_root_dir()
+        conn = self._connect(root_dir)
+        if conn is None:
+            return self._store_file(section, key, data, fn)
+        self._store_db(conn, root_dir, section, key, data, ttl)
+
+    def _store_db(self, conn, root_dir, section, key, data, ttl):
+        """Store the entry in the database; return whether it succeeded"""
+        max_size = self._ydl.params.get('cache_max_size')
+        if max_size is None:
+            max_size = self._MAX_SIZE
+        now = time.time()
+        expires = None if ttl is None else now + ttl
+        try:
+            serialized = json.dumps(data)
+            size = len(serialized.encode('utf-8'))
+            self._ydl.write_debug(f'Saving {section}.{key} to cache')
+            with self._lock:
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    replaced = conn.execute(
+                        'SELECT size FROM cache WHERE section = ? AND key = ?', (section, key)).fetchone()
+                    conn.execute(
+                        'INSERT OR REPLACE INTO cache (section, key, data, size, expires, accessed) '
+                        'VALUES (?, ?, ?, ?, ?, ?)',
+                        (section, key, serialized, size, expires, now))
+                    total = self._total_sizes.get(root_dir)
+                    if total is not None:
+                        total += size - (replaced[0] if replaced else 0)
+                    if total is None or total > max_size:
+                        total = self._evict(conn, now, max_size)
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+                self._total_sizes[root_dir] = total
+                self._remember((root_dir, section, key), copy.deepcopy(data), expires)
+        except Exception:
+            tb = traceback.format_exc()
+            self._ydl.report_warning(
+                'Writing cache to %r failed: %s' % (os.path.join(root_dir, self._DB_NAME), tb))
+            return False
+        return True
+
+    def _store_file(self, section, key, data, fn):
         try:
             try:
                 os.makedirs(os.path.dirname(fn))
@@ -64,6 +220,97 @@ class Cache(object):
             return default
 
         cache_fn = self._get_cache_fn(section, key, dtype)
+        root_dir = self._get_root_dir()
+        memory_key = (root_dir, section, key)
+        now = time.time()
+        with self._lock:
+            data, expires = self._memory.get(memory_key, (None, None))
+            if memory_key in self._memory and (expires is None or expires > now):
+                self._memory.move_to_end(memory_key)
+                return copy.deepcopy(data)
+
+        conn = self._connect(root_dir, create=False)
+        row = None
+        try:
+            if conn is not None:
+                with self._lock:
+                    row = conn.execute(
+                        'SELECT data, expires, accessed FROM cache WHERE section = ? AND key = ?',
+                        (section, key)).fetchone()
+                    if row is not None and now - row[2] > self._ACCESS_RESOLUTION:
+                        conn.execute(
+                            'UPDATE cache SET accessed = ? WHERE section = ? AND key = ?', (now, section, key))
+        except Exception:
+            self._ydl.report_warning(
+                'Cache retrieval of %s.%s from %s failed: %s'
+                % (section, key, os.path.join(root_dir, self._DB_NAME), traceback.format_exc()))
+            return default
+
+        if row is None:
+            # Without sqlite3 or for entries stored before the database was introduced
+            data = self._load_file(section, key, cache_fn, None)
+            if data is None:
+                return default
+            conn = self._connect(root_dir)
+            if conn is not None and self._store_db(conn, root_dir, section, key, data, None):
+                # The file would otherwise bring the entry back once it is evicted from the database
+                try:
+                    os.remove(cache_fn)
+                except OSError:
+                    pass
+            return data
+
+        serialized, expires, _ = row
+        if expires is not None and expires <= now:
+            return default
+        self._ydl.write_debug(f'Loading {section}.{key} from cache')
+        data = json.loads(serialized)
+        self._remember(memory_key, data, expires)
+        return copy.deepcopy(data)
+
+    def load_section(self, section, dtype='json'):
+        """Return a dict of all the unexpired entries in section, read in one query"""
+        assert dtype in ('json',)
+        assert re.match(r'^[a-zA-Z0-9_.-]+$', section), 'invalid section %r' % section
+
+        if not self.enabled:
+            return {}
+
+        root_dir = self._get_root_dir()
+        conn = self._connect(root_dir, create=False)
+        if conn is None:
+            return self._load_section_files(section, root_dir, dtype)
+
+        now = time.time()
+        try:
+            with self._lock:
+                rows = conn.execute(
+                    'SELECT key, data FROM cache WHERE section = ? AND (expires IS NULL OR expires > ?)',
+                    (section, now)).fetchall()
+        except Exception:
+            self._ydl.report_warning(
+                'Cache retrieval of %s from %s failed: %s'
+                % (section, os.path.join(root_dir, self._DB_NAME), traceback.format_exc()))
+            return {}
+        self._ydl.write_debug(f'Loading {len(rows)} entries of {section} from cache')
+        return {key: json.loads(serialized) for key, serialized in rows}
+
+    def _load_section_files(self, section, root_dir, dtype):
+        res = {}
+        try:
+            filenames = os.listdir(os.path.join(root_dir, section))
+        except OSError:
+            return res
+        for filename in filenames:
+            key, ext = os.path.splitext(filename)
+            if ext != '.' + dtype:
+                continue
+            data = self._load_file(section, key, os.path.join(root_dir, section, filename), None)
+            if data is not None:
+                res[key] = data
+        return res
+
+    def _load_file(self, section, key, cache_fn, default):
         try:
             try:
                 with io.open(cache_fn, 'r', encoding='utf-8') as cachef:
@@ -90,6 +337,7 @@ class Cache(object):
         if not any((term in cachedir) for term in ('cache', 'tmp')):
             raise Exception('Not removing directory %s - this does not look like a cache dir' % cachedir)
 
+        self._close(cachedir)
         self._ydl.to_screen(
             'Removing cache dir %s .' % cachedir, skip_eol=True)
         if os.path.exists(cachedir):
@@ -16,8 +16,10 @@ from .compat import (
 )
 from .utils import (
     bug_reports_message,
+    CHROMIUM_BASED_BROWSERS,
     expand_path,
     Popen,
+    SUPPORTED_BROWSERS,
     YoutubeDLCookieJar,
 )
 
@@ -46,10 +48,6 @@ except Exception as _err:
     KEYRING_UNAVAILABLE_REASON = 'as the `keyring` module could not be initialized: %s' % _err
 
 
-CHROMIUM_BASED_BROWSERS = {'brave', 'chrome', 'chromium', 'edge', 'opera', 'vivaldi'}
-SUPPORTED_BROWSERS = CHROMIUM_BASED_BROWSERS | {'firefox', 'safari'}
-
-
 class YDLLogger:
     def __init__(self, ydl=None):
         self._ydl = ydl
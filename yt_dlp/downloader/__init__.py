@@ -1,13 +1,19 @@
 from __future__ import unicode_literals
 
+import collections.abc
+import sys
+
 from ..compat import compat_str
 from ..utils import (
     determine_protocol,
+    lazy_module_attributes,
     NO_DEFAULT
 )
 
 
 def get_suitable_downloader(info_dict, params={}, default=NO_DEFAULT, protocol=None, to_stdout=False):
+    from .external import FFmpegFD
+
     info_dict['protocol'] = determine_protocol(info_dict)
     info_copy = info_dict.copy()
     info_copy['to_stdout'] = to_stdout
@@ -17,10 +23,10 @@ def get_suitable_downloader(info_dict, params={}, default=NO_DEFAULT, protocol=N
 
     if set(downloaders) == {FFmpegFD} and FFmpegFD.can_merge_formats(info_copy, params):
         return FFmpegFD
-    elif (set(downloaders) == {DashSegmentsFD}
+    elif (set(protocols) == {'http_dash_segments_generator'}
           and not (to_stdout and len(protocols) > 1)
-          and set(protocols) == {'http_dash_segments_generator'}):
-        return DashSegmentsFD
+          and set(downloaders) == {_get_downloader('DashSegmentsFD')}):
+        return _get_downloader('DashSegmentsFD')
     elif len(downloaders) == 1:
         return downloaders[0]
     return None
@@ -28,47 +34,78 @@ def get_suitable_downloader(info_dict, params={}, default=NO_DEFAULT, protocol=N
 
 # Some of these require get_suitable_downloader
 from .common import FileDownloader
-from .dash import DashSegmentsFD
-from .f4m import F4mFD
-from .hls import HlsFD
 from .http import HttpFD
-from .rtmp import RtmpFD
-from .rtsp import RtspFD
-from .ism import IsmFD
-from .mhtml import MhtmlFD
-from .niconico import NiconicoDmcFD, NiconicoLiveFD
-from .websocket import WebSocketFragmentFD
-from .youtube_live_chat import YoutubeLiveChatFD
-from .serial import SerialFD
-from .images import ImageSeriesFD
-from .external import (
-    get_external_downloader,
-    FFmpegFD,
-)
 
-PROTOCOL_MAP = {
-    'rtmp': RtmpFD,
-    'rtmpe': RtmpFD,
-    'rtmp_ffmpeg': FFmpegFD,
-    'ffmpeg': FFmpegFD,  # for backward compatibility with old code
-    'live_ffmpeg': FFmpegFD,
-    'm3u8_native': HlsFD,
-    'm3u8': FFmpegFD,
-    'mms': RtspFD,
-    'rtsp': RtspFD,
-    'f4m': F4mFD,
-    'http_dash_segments': DashSegmentsFD,
-    'http_dash_segments_generator': DashSegmentsFD,
-    'ism': IsmFD,
-    'mhtml': MhtmlFD,
-    'niconico_dmc': NiconicoDmcFD,
-    'niconico_live': NiconicoLiveFD,
-    'websocket_frag': WebSocketFragmentFD,
-    'serial': SerialFD,
-    'image_series': ImageSeriesFD,
-    'youtube_live_chat': YoutubeLiveChatFD,
-    'youtube_live_chat_replay': YoutubeLiveChatFD,
-}
+# The other downloaders are only imported when they are first used,
+# since some of them pull in extractors and postprocessors
+lazy_module_attributes(__name__, {
+    'get_external_downloader': '.external',
+    'FFmpegFD': '.external',
+    'DashSegmentsFD': '.dash',
+    'F4mFD': '.f4m',
+    'HlsFD': '.hls',
+    'RtmpFD': '.rtmp',
+    'RtspFD': '.rtsp',
+    'IsmFD': '.ism',
+    'MhtmlFD': '.mhtml',
+    'NiconicoDmcFD': '.niconico',
+    'NiconicoLiveFD': '.niconico',
+    'WebSocketFragmentFD': '.websocket',
+    'YoutubeLiveChatFD': '.youtube_live_chat',
+    'SerialFD': '.serial',
+    'ImageSeriesFD': '.images',
+})
+
+# Names of the downloaders of .external, so that they can be listed without importing them
+EXTERNAL_DOWNLOADERS = ('aria2c', 'avconv', 'axel', 'curl', 'ffmpeg', 'httpie', 'wget')
+
+
+class _LazyDownloaderMap(collections.abc.MutableMapping):
+    """Dictionary of downloader classes, given by their names until they are first used"""
+
+    def __init__(self, names):
+        self._map = dict(names)
+
+    def __getitem__(self, key):
+        value = self._map[key]
+        return _get_downloader(value) if isinstance(value, compat_str) else value
+
+    def __setitem__(self, key, value):
+        self._map[key] = value
+
+    def __delitem__(self, key):
+        del self._map[key]
+
+    def __iter__(self):
+        return iter(self._map)
+
+    def __len__(self):
+        return len(self._map)
+
+
+PROTOCOL_MAP = _LazyDownloaderMap({
+    'rtmp': 'RtmpFD',
+    'rtmpe': 'RtmpFD',
+    'rtmp_ffmpeg': 'FFmpegFD',
+    'ffmpeg': 'FFmpegFD',  # for backward compatibility with old code
+    'live_ffmpeg': 'FFmpegFD',
+    'm3u8_native': 'HlsFD',
+    'm3u8': 'FFmpegFD',
+    'mms': 'RtspFD',
+    'rtsp': 'RtspFD',
+    'f4m': 'F4mFD',
+    'http_dash_segments': 'DashSegmentsFD',
+    'http_dash_segments_generator': 'DashSegmentsFD',
+    'ism': 'IsmFD',
+    'mhtml': 'MhtmlFD',
+    'niconico_dmc': 'NiconicoDmcFD',
+    'niconico_live': 'NiconicoLiveFD',
+    'websocket_frag': 'WebSocketFragmentFD',
+    'serial': 'SerialFD',
+    'image_series': 'ImageSeriesFD',
+    'youtube_live_chat': 'YoutubeLiveChatFD',
+    'youtube_live_chat_replay': 'YoutubeLiveChatFD',
+})
 
 # exceptions for --live-download-mkv
 # adding here will bypass protocol change
@@ -104,6 +141,8 @@ def shorten_protocol_name(proto, simplify=False):
 
 def _get_suitable_downloader(info_dict, protocol, params, default):
     """Get the downloader class that can handle the info dict."""
+    from .external import FFmpegFD, get_external_downloader
+
     if default is NO_DEFAULT:
         default = HttpFD
 
@@ -132,18 +171,22 @@ def _get_suitable_downloader(info_dict, protocol, params, default):
         if info_dict.get('is_live'):
             return FFmpegFD
         elif (external_downloader or '').lower() == 'native':
-            return HlsFD
+            return _get_downloader('HlsFD')
         elif get_suitable_downloader(
                 info_dict, params, None, protocol='m3u8_frag_urls', to_stdout=info_dict['to_stdout']):
-            return HlsFD
+            return _get_downloader('HlsFD')
         elif params.get('hls_prefer_native') is True:
-            return HlsFD
+            return _get_downloader('HlsFD')
         elif params.get('hls_prefer_native') is False:
             return FFmpegFD
 
     return PROTOCOL_MAP.get(protocol, default)
 
 
+def _get_downloader(name):
+    return getattr(sys.modules[__name__], name)
+
+
 __all__ = [
     'FileDownloader',
     'get_suitable_downloader',
@@ -0,0 +1,346 @@
+from __future__ import unicode_literals
+
+import asyncio
+import collections
+import io
+import threading
+import time
+import zlib
+
+from ..compat import (
+    compat_http_client,
+    compat_urllib_error,
+    compat_urllib_request,
+    compat_urlparse,
+)
+from ..utils import (
+    make_HTTPS_handler,
+    sanitized_Request,
+    std_headers,
+)
+
+
+class AsyncFragmentEngine(object):
+    """
+    Process-wide asyncio event loop on which fragment requests are made.
+
+    A single loop running in a daemon thread serves the fragment downloads of every
+    FragmentFD and YoutubeDL instance of the process, using a minimal HTTP/1.1 client
+    with keep-alive connections. Requests that this client can not make (proxies,
+    non-HTTP URLs) have to be made by the caller with the regular urllib opener
+    """
+
+    _IDLE_TIMEOUT = 30
+    _MAX_IDLE_PER_HOST = 16
+    _MAX_REDIRECTS = 10
+    _READ_SIZE = 64 * 1024
+
+    # The parameters of YoutubeDL that change how a connection is made.
+    # Connections and SSL contexts are only shared by instances that agree on all of them
+    _CONNECTION_PARAMS = ('nocheckcertificate', 'use_modern_tls_cipher', 'source_address')
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    @classmethod
+    def get(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name='yt-dlp-fragments', daemon=True)
+        self._thread.start()
+        self._ssl_contexts = {}
+        # Only used from the loop thread
+        self._idle = collections.defaultdict(list)
+
+    @staticmethod
+    def is_available(ydl):
+        """Whether the engine can make the requests of this YoutubeDL instance (proxies are not supported)"""
+        proxy = ydl.params.get('proxy')
+        if proxy is None:
+            return not compat_urllib_request.getproxies()
+        return proxy == ''
+
+    @staticmethod
+    def supports_url(url):
+        return compat_urlparse.urlparse(url).scheme in ('http', 'https')
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop and return a concurrent.futures.Future"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def run_sync(self, func, *args):
+        """Run a blocking function on the default executor of the loop"""
+        return await self.loop.run_in_executor(None, func, *args)
+
+    def executor(self):
+        """An object with the submit(func, *args) interface of an Executor, for coroutine functions"""
+        engine = self
+
+        class AsyncExecutor(object):
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def submit(self, func, *args):
+                return engine.submit(func(*args))
+
+        return AsyncExecutor()
+
+    @classmethod
+    def _connection_key(cls, params):
+        return tuple(params.get(name) for name in cls._CONNECTION_PARAMS)
+
+    def _ssl_context(self, params):
+        key = self._connection_key(params)
+        if key not in self._ssl_contexts:
+            self._ssl_contexts[key] = make_HTTPS_handler(params)._context
+        return self._ssl_contexts[key]
+
+    async def _connect(self, key, ydl, timeout):
+        idle = self._idle[key]
+        while idle:
+            reader, writer, released = idle.pop()
+            if time.time() - released <= self._IDLE_TIMEOUT and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        scheme, host, port = key[:3]
+        source_address = ydl.params.get('source_address')
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(
+            host, port, ssl=self._ssl_context(ydl.params) if scheme == 'https' else None,
+            local_addr=(source_address, 0) if source_address else None), timeout)
+        return reader, writer, False
+
+    def _release(self, key, reader, writer):
+        idle = self._idle[key]
+        if len(idle) >= self._MAX_IDLE_PER_HOST:
+            writer.close()
+        else:
+            idle.append((reader, writer, time.time()))
+
+    async def fetch(self, ydl, url, stream, headers=None, byte_range=None, on_progress=None):
+        """
+        GET the url, write the body to stream and return (length of the body, response headers).
+        byte_range is {'start': ..., 'end': ...} (end excluded), as in the fragments of a format;
+        if the server ignores the Range header, only that part of the body is written.
+        on_progress(downloaded_bytes, total_bytes) is called from the loop thread.
+        Raises HTTPError for error responses, like YoutubeDL.urlopen does
+        """
+        for _ in range(self._MAX_REDIRECTS + 1):
+            try:
+                status, response_headers, length = await self._request(
+                    ydl, url, stream, headers, byte_range, on_progress)
+            except asyncio.TimeoutError:
+                raise TimeoutError('Timed out while requesting %s' % url)
+            location = response_headers.get('Location')
+            if status in (301, 302, 303, 307, 308) and location:
+                url = compat_urlparse.urljoin(url, location)
+                continue
+            if status >= 400:
+                raise compat_urllib_error.HTTPError(url, status, response_headers.get('Reason'), response_headers, io.BytesIO())
+            return length, response_headers
+        raise compat_urllib_error.HTTPError(url, status, 'Too many redirects', response_headers, None)
+
+    async def _request(self, ydl, url, stream, headers, byte_range, on_progress):
+        headers = {**std_headers, **(headers or {}), 'Accept-Encoding': 'identity'}
+        if byte_range:
+            headers['Range'] = 'bytes=%d-%d' % (byte_range['start'], byte_range['end'] - 1)
+        req = sanitized_Request(url, None, headers)
+        req.headers.pop('Youtubedl-no-compression', None)
+        ydl.cookiejar.add_cookie_header(req)
+        parsed = compat_urlparse.urlparse(req.full_url)
+        key = (parsed.scheme, parsed.hostname, parsed.port or (443 if parsed.scheme == 'https' else 80),
+               *self._connection_key(ydl.params))
+        timeout = ydl._socket_timeout
+
+        request_headers = dict(req.header_items())
+        request_headers.update({'Host': parsed.netloc, 'Connection': 'keep-alive'})
+        request = ''.join(['GET %s HTTP/1.1\r\n' % req.selector] + [
+            '%s: %s\r\n' % (k, v) for k, v in request_headers.items()] + ['\r\n'])
+
+        reader, writer, reused = await self._connect(key, ydl, timeout)
+        try:
+            try:
+                writer.write(request.encode('latin-1'))
+                await asyncio.wait_for(writer.drain(), timeout)
+                status_line = await asyncio.wait_for(reader.readline(), timeout)
+                if not status_line:
+                    raise compat_http_client.RemoteDisconnected('Remote end closed connection without response')
+            except (ConnectionError, compat_http_client.RemoteDisconnected):
+                if not reused:
+                    raise
+                # The server closed the idle connection in the meantime
+                writer.close()
+                reader, writer, reused = await self._connect(key, ydl, timeout)
+                writer.write(request.encode('latin-1'))
+                await asyncio.wait_for(writer.drain(), timeout)
+                status_line = await asyncio.wait_for(reader.readline(), timeout)
+            version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+            if not version.startswith('HTTP/') or not (len(status) == 3 and status.isdigit()):
+                raise compat_http_client.BadStatusLine(status_line)
+            status = int(status)
+
+            header_lines = []
+            while True:
+                try:
+                    line = await asyncio.wait_for(reader.readline(), timeout)
+                except ValueError:  # Raised by readline for a LimitOverrunError
+                    raise compat_http_client.LineTooLong('header line')
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                header_lines.append(line)
+            response_headers = compat_http_client.parse_headers(io.BytesIO(b''.join(header_lines) + b'\r\n'))
+            response_headers['Reason'] = reason
+
+            keep_alive = version == 'HTTP/1.1' and response_headers.get('Connection', '').lower() != 'close'
+            if status >= 300 and status not in (304, ):
+                # The body of redirects and errors is not needed
+                keep_alive = False
+                length = 0
+            else:
+                # A server that does not support ranges answers with the whole resource
+                body_writer = _BodyWriter(
+                    stream, response_headers.get('Content-Encoding', '').lower(),
+                    byte_range if byte_range and status == 200 else None)
+                keep_alive = await self._read_body(
+                    reader, response_headers, timeout, keep_alive, body_writer, on_progress, ydl.params.get('ratelimit'))
+                length = body_writer.close()
+        except BaseException:
+            writer.close()
+            raise
+
+        ydl.cookiejar.extract_cookies(_CookieResponse(response_headers), req)
+        if keep_alive:
+            self._release(key, reader, writer)
+        else:
+            writer.close()
+        return status, response_headers, length
+
+    async def _read_body(self, reader, headers, timeout, keep_alive, body_writer, on_progress, ratelimit):
+        """Read the body into body_writer, and return whether the connection can be reused"""
+        downloaded, start = 0, time.time()
+        total = headers.get('Content-Length')
+        total = int(total) if total and total.isdigit() else None
+
+        async def add(chunk):
+            nonlocal downloaded
+            body_writer.write(chunk)
+            downloaded += len(chunk)
+            if on_progress:
+                on_progress(downloaded, total)
+            # Like FileDownloader.slow_down
+            if ratelimit:
+                delay = downloaded / ratelimit - (time.time() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+        if headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            # Like http.client, a truncated or malformed chunked body is an IncompleteRead
+            try:
+                while not body_writer.done:
+                    size = int((await asyncio.wait_for(reader.readline(), timeout)).split(b';')[0], 16)
+                    if size == 0:
+                        # Trailers
+                        while (await asyncio.wait_for(reader.readline(), timeout)) not in (b'\r\n', b'\n', b''):
+                            pass
+                        return keep_alive
+                    await add(await asyncio.wait_for(reader.readexactly(size), timeout))
+                    await asyncio.wait_for(reader.readexactly(2), timeout)
+            except asyncio.IncompleteReadError as err:
+                raise compat_http_client.IncompleteRead(err.partial)
+            except ValueError:  # Invalid chunk size, or a line over the limit of the reader
+                raise compat_http_client.IncompleteRead(b'')
+        elif total is not None:
+            while downloaded < total and not body_writer.done:
+                chunk = await asyncio.wait_for(reader.read(min(self._READ_SIZE, total - downloaded)), timeout)
+                if not chunk:
+                    raise compat_http_client.IncompleteRead(b'', total - downloaded)
+                await add(chunk)
+            if downloaded == total:
+                return keep_alive
+        else:
+            while not body_writer.done:
+                chunk = await asyncio.wait_for(reader.read(self._READ_SIZE), timeout)
+                if not chunk:
+                    break
+                await add(chunk)
+        # The rest of the body was not read
+        return False
+
+
+class _DeflateDecoder(object):
+    """'deflate' content is sent both with and without the zlib header"""
+
+    def __init__(self):
+        self._decoder = None
+
+    def decompress(self, data):
+        if self._decoder is None:
+            self._decoder = zlib.decompressobj()
+            try:
+                return self._decoder.decompress(data)
+            except zlib.error:
+                self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+        return self._decoder.decompress(data)
+
+    def flush(self):
+        return self._decoder.flush() if self._decoder else b''
+
+
+class _BodyWriter(object):
+    """
+    Decode the body of a response while it is read, and write it to a stream.
+    If byte_range is given, only that part of the decoded body is written
+    """
+
+    def __init__(self, stream, encoding, byte_range=None):
+        self._stream = stream
+        self._decoder = (
+            zlib.decompressobj(16 + zlib.MAX_WBITS) if encoding == 'gzip'
+            else _DeflateDecoder() if encoding == 'deflate' else None)
+        self._encoding = encoding
+        self._start, self._end = (byte_range['start'], byte_range['end']) if byte_range else (0, None)
+        self._offset = self.length = 0
+
+    @property
+    def done(self):
+        """Whether the rest of the body is not needed"""
+        return self._end is not None and self._offset >= self._end
+
+    def _decode(self, func, *args):
+        try:
+            return func(*args)
+        except zlib.error as err:
+            raise compat_http_client.HTTPException('Unable to decode %s response: %s' % (self._encoding, err))
+
+    def _write(self, data):
+        offset, self._offset = self._offset, self._offset + len(data)
+        data = data[max(self._start - offset, 0):None if self._end is None else max(self._end - offset, 0)]
+        if data:
+            self._stream.write(data)
+            self.length += len(data)
+
+    def write(self, data):
+        self._write(self._decode(self._decoder.decompress, data) if self._decoder else data)
+
+    def close(self):
+        """Write what is left in the decoder and return the number of bytes written"""
+        if self._decoder:
+            self._write(self._decode(self._decoder.flush))
+        return self.length
+
+
+class _CookieResponse(object):
+    """The minimal response interface needed by CookieJar.extract_cookies"""
+
+    def __init__(self, headers):
+        self._headers = headers
+
+    def info(self):
+        return self._headers
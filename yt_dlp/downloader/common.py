@@ -55,6 +55,9 @@ class FileDownloader(ShowsProgress):
     http_chunk_size:    Size of a chunk for chunk-based HTTP downloading. May be
                         useful for bypassing bandwidth throttling imposed by
                         a webserver (experimental)
+    http_connections:   Number of connections used to download a single file
+                        over HTTP. The file is split into byte ranges that are
+                        fetched at the same time into a preallocated file
     progress_template:  See YoutubeDL.py
 
     Subclasses of this one must re-define the real_download method.
@@ -1,8 +1,13 @@
 from __future__ import division, unicode_literals
 
+import collections
 import http.client
+import io
 import json
 import math
+import os
+import tempfile
+import threading
 import time
 
 try:
@@ -37,6 +42,325 @@ class HttpQuietDownloader(HttpFD):
             f'[download] Got server HTTP error: {err}. Retrying (attempt {count} of {self.format_retries(retries)}) ...')
 
 
+class FragmentSpool(object):
+    """
+    Memory budget shared by the buffers of downloaded fragments that are waiting
+    to be appended in order.
+
+    Once the budget is used up (typically because a slow fragment holds back the
+    ones after it), the data of further fragments is spilled to temporary files.
+    """
+
+    def __init__(self, max_memory, spill_dir=None):
+        self._lock = threading.Lock()
+        self._available = max_memory
+        self._spill_dir = spill_dir
+
+    def _reserve(self, size):
+        with self._lock:
+            if size > self._available:
+                return False
+            self._available -= size
+            return True
+
+    def _release(self, size):
+        with self._lock:
+            self._available += size
+
+    def buffer(self):
+        return FragmentBuffer(self)
+
+
+class FragmentBuffer(object):
+    """Writable stream holding the content of a single fragment (see FragmentSpool)"""
+
+    def __init__(self, spool):
+        self._spool = spool
+        self._stream = io.BytesIO()
+        self._reserved = 0
+        self.spilled = False
+
+    def write(self, data):
+        if not self.spilled:
+            if self._spool._reserve(len(data)):
+                self._reserved += len(data)
+            else:
+                spill_file = tempfile.TemporaryFile(dir=self._spool._spill_dir)
+                spill_file.write(self._stream.getbuffer())
+                self._release()
+                self._stream, self.spilled = spill_file, True
+        return self._stream.write(data)
+
+    def flush(self):
+        self._stream.flush()
+
+    def reset(self):
+        """Discard the content written so far, when the download starts over"""
+        self._stream.seek(0)
+        self._stream.truncate()
+        self._release()
+
+    def read(self):
+        """Return the whole content and free the buffer"""
+        try:
+            self._stream.seek(0)
+            return self._stream.read()
+        finally:
+            self.close()
+
+    def _release(self):
+        self._spool._release(self._reserved)
+        self._reserved = 0
+
+    def close(self):
+        self._stream.close()
+        self._release()
+
+
+class FragmentScheduler(object):
+    """
+    Run fragment downloads on a thread pool and yield their results in order.
+
+    Only a sliding window of fragments past the first unfinished one (the head)
+    is scheduled at a time. The window widens when fragment latencies are uneven,
+    so that more fragments are prefetched while a straggler is being waited for,
+    and narrows back to the number of workers when they are steady. If hedging is
+    enabled, a head fragment that takes much longer than usual is requested again
+    on another connection and whichever request finishes first is used.
+    """
+
+    _HEDGE_FACTOR = 3
+    _HEDGE_MIN_DELAY = 2
+    _LATENCY_SAMPLES = 20
+
+    def __init__(self, pool, func, max_workers, hedge=False, is_success=bool, discard=None):
+        self._pool = pool
+        self._func = func
+        self._max_workers = max_workers
+        self._hedge = hedge
+        self._is_success = is_success
+        self._discard = discard or (lambda _: None)
+        self.window = max_workers
+        self.latencies = collections.deque(maxlen=self._LATENCY_SAMPLES)
+
+    def _update_window(self):
+        latencies = sorted(self.latencies)
+        median = latencies[len(latencies) // 2]
+        slowest = latencies[int(len(latencies) * 0.9)]
+        spread = slowest / median if median > 0 else 1
+        self.window = max(self._max_workers, min(
+            4 * self._max_workers, math.ceil(self._max_workers * spread)))
+
+    def _hedge_delay(self):
+        if not self._hedge or len(self.latencies) < 3:
+            return None
+        median = sorted(self.latencies)[len(self.latencies) // 2]
+        return max(self._HEDGE_FACTOR * median, self._HEDGE_MIN_DELAY)
+
+    def map(self, items):
+        items = iter(items)
+        pending = {}  # future -> sequence number
+        started, scheduled, results = {}, {}, {}
+        hedged = set()
+        head = submitted = 0
+        exhausted = False
+
+        def submit(seq):
+            future = self._pool.submit(self._func, scheduled[seq])
+            pending[future] = seq
+            started.setdefault(seq, time.time())
+
+        try:
+            while True:
+                while not exhausted and len(pending) < self._max_workers and submitted - head < self.window:
+                    try:
+                        scheduled[submitted] = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    submit(submitted)
+                    submitted += 1
+
+                while head in results:
+                    result = results.pop(head)
+                    del scheduled[head], started[head]
+                    head += 1
+                    yield result
+                if exhausted and head >= submitted:
+                    return
+
+                timeout, hedge_delay = None, self._hedge_delay()
+                if hedge_delay is not None and head < submitted and head not in hedged:
+                    timeout = max(0, started[head] + hedge_delay - time.time())
+                done, _ = concurrent.futures.wait(
+                    pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    seq = pending.pop(future)
+                    result = future.result()
+                    duplicate_pending = seq in hedged and seq in pending.values()
+                    if seq < head or seq in results or (duplicate_pending and not self._is_success(result)):
+                        self._discard(result)
+                        continue
+                    results[seq] = result
+                    self.latencies.append(time.time() - started[seq])
+                    self._update_window()
+
+                if (hedge_delay is not None and head < submitted and head not in results
+                        and head not in hedged and time.time() - started[head] >= hedge_delay):
+                    hedged.add(head)
+                    submit(head)
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class FragmentDecryptionStage(object):
+    """
+    Process downloaded fragments (i.e. read and decrypt them) on a thread pool,
+    separately from their download, and yield the results in order.
+
+    At most max_pending fragments are being processed or waiting to be appended
+    at a time. Until the oldest one is taken, no more fragments are taken from the
+    downloads, which are throttled in turn. Items for which needs_work returns
+    False are processed in the calling thread
+    """
+
+    def __init__(self, pool, func, max_pending, needs_work=lambda _: True):
+        self._pool = pool
+        self._func = func
+        self._max_pending = max_pending
+        self._needs_work = needs_work
+
+    def map(self, items):
+        items = iter(items)
+        pending = collections.deque()
+        exhausted = False
+        try:
+            while True:
+                while pending and pending[0].done():
+                    yield pending.popleft().result()
+                if not exhausted and len(pending) < self._max_pending:
+                    try:
+                        item = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        continue
+                    if self._needs_work(item):
+                        pending.append(self._pool.submit(self._func, item))
+                    else:
+                        future = concurrent.futures.Future()
+                        future.set_result(self._func(item))
+                        pending.append(future)
+                elif pending:
+                    yield pending.popleft().result()
+                else:
+                    return
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+class FragmentProgress(object):
+    """
+    Thread-safe download progress of a fragmented file, accumulated over all the
+    fragments that are being downloaded at the same time.
+
+    Fragment downloads are identified by a key given to begin(); update() is fed
+    with the progress hook status of each fragment download and returns the
+    aggregated fields for the progress hook of the whole file
+    """
+
+    _SPEED_WINDOW = 5
+    _LATENCY_SAMPLES = 1000
+
+    def __init__(self, resume_len, fragment_index, total_frags, live=False):
+        self.lock = threading.RLock()
+        self.started = time.time()
+        self._resume_len = resume_len
+        self._resume_frags = fragment_index
+        self._total_frags = total_frags
+        self._live = live
+        self.complete_bytes = resume_len
+        self._complete_frags = fragment_index
+        self._active = {}  # key -> [start time, downloaded bytes, total bytes]
+        self._samples = collections.deque()
+        self.latencies = collections.deque(maxlen=self._LATENCY_SAMPLES)
+        self.decryption_time = 0
+
+    def begin(self, key):
+        with self.lock:
+            self._active[key] = [time.time(), 0, None]
+
+    def end(self, key):
+        """Forget a fragment download that did not finish"""
+        with self.lock:
+            self._active.pop(key, None)
+
+    def add_decryption_time(self, seconds):
+        with self.lock:
+            self.decryption_time += seconds
+
+    def latency_percentiles(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        return {
+            'p%d' % p: latencies[min(len(latencies) - 1, len(latencies) * p // 100)]
+            for p in (50, 90, 99)
+        }
+
+    def update(self, key, status, downloaded_bytes=None, total_bytes=None):
+        with self.lock:
+            now = time.time()
+            fragment = self._active.setdefault(key, [now, 0, None])
+            if status == 'finished':
+                del self._active[key]
+                self.complete_bytes += total_bytes or fragment[1]
+                self._complete_frags += 1
+                self.latencies.append(now - fragment[0])
+            else:
+                fragment[1:] = [downloaded_bytes or 0, total_bytes]
+
+            downloaded = self.complete_bytes + sum(f[1] for f in self._active.values())
+            self._samples.append((now, downloaded))
+            while now - self._samples[0][0] > self._SPEED_WINDOW:
+                self._samples.popleft()
+            first_time, first_bytes = self._samples[0]
+            if now - first_time >= 1:
+                speed = FileDownloader.calc_speed(first_time, now, downloaded - first_bytes)
+            else:
+                speed = FileDownloader.calc_speed(self.started, now, downloaded - self._resume_len)
+
+            progress = {
+                'downloaded_bytes': downloaded,
+                'fragment_index': self._complete_frags,
+                'active_fragments': len(self._active),
+                'elapsed': now - self.started,
+                'speed': speed,
+            }
+            if self._live or not self._total_frags:
+                return progress
+
+            if self._complete_frags:
+                frag_size = self.complete_bytes / self._complete_frags
+            else:
+                sizes = [f[2] for f in self._active.values() if f[2]]
+                frag_size = sum(sizes) / len(sizes) if sizes else None
+            if frag_size:
+                progress['total_bytes_estimate'] = frag_size * self._total_frags
+
+            session_frags = self._complete_frags - self._resume_frags
+            if session_frags:
+                frag_rate = session_frags / (now - self.started)
+                progress['eta'] = int((self._total_frags - self._complete_frags) / frag_rate)
+            elif progress.get('total_bytes_estimate'):
+                progress['eta'] = FileDownloader.calc_eta(
+                    self.started, now, progress['total_bytes_estimate'] - self._resume_len,
+                    downloaded - self._resume_len)
+            return progress
+
+
 class FragmentFD(FileDownloader):
     """
     A base file downloader class for fragmented media (e.g. f4m/m3u8 manifests).
@@ -50,6 +374,13 @@ class FragmentFD(FileDownloader):
     keep_fragments:     Keep downloaded fragments on disk after downloading is
                         finished
     concurrent_fragment_downloads:  The number of threads to use for native hls and dash downloads
+    fragment_memory_limit: Maximum number of bytes of downloaded fragments to hold in
+                        memory while they wait to be appended (default is 64MiB).
+                        Fragments over this limit are spilled to temporary files.
+                        Set to 0 to always download fragments to -FragN files
+    fragment_engine:    'threads' (default) to download concurrent fragments on a
+                        thread pool or 'asyncio' to request them on a shared
+                        event loop. Falls back to threads when a proxy is used
     _no_ytdl_file:      Don't use .ytdl file
 
     For each incomplete fragment download yt-dlp keeps on disk a special
@@ -73,6 +404,8 @@ class FragmentFD(FileDownloader):
     This feature is experimental and file format may change in future.
     """
 
+    _FRAGMENT_MEMORY_LIMIT = 64 * 1024 * 1024
+
     def report_retry_fragment(self, err, frag_index, count, retries):
         self.to_screen(
             '\r[download] Got server HTTP error: %s. Retrying fragment %d (attempt %d of %s) ...'
@@ -123,7 +456,16 @@ class FragmentFD(FileDownloader):
             frag_index_stream.close()
 
     def _download_fragment(self, ctx, frag_url, info_dict, headers=None, request_data=None):
-        fragment_filename = '%s-Frag%d' % (ctx['tmpfilename'], ctx['fragment_index'])
+        """
+        Download a fragment and return (success, content).
+        If ctx has a 'fragment_spool', the fragment is kept in a FragmentBuffer which is
+        returned instead of the content; it is read by _read_fragment when appending
+        """
+        spool = ctx.get('fragment_spool')
+        if spool:
+            fragment_filename = spool.buffer()
+        else:
+            fragment_filename = '%s-Frag%d' % (ctx['tmpfilename'], ctx['fragment_index'])
         fragment_info_dict = {
             'url': frag_url,
             'http_headers': headers or info_dict.get('http_headers'),
@@ -131,15 +473,29 @@ class FragmentFD(FileDownloader):
             'ctx_id': ctx.get('ctx_id'),
             'unrecoverable_http_error': info_dict.get('unrecoverable_http_error'),
         }
-        success = ctx['dl'].download(fragment_filename, fragment_info_dict)
+        progress = ctx.get('fragment_progress')
+        if progress:
+            progress.begin(id(fragment_info_dict))
+        success = False
+        try:
+            success = ctx['dl'].download(fragment_filename, fragment_info_dict)
+        finally:
+            if progress:
+                progress.end(id(fragment_info_dict))
+            if spool and not success:
+                fragment_filename.close()
         if not success:
             return False, None
         if fragment_info_dict.get('filetime'):
             ctx['fragment_filetime'] = fragment_info_dict.get('filetime')
         ctx['fragment_filename_sanitized'] = fragment_filename
+        if spool:
+            return True, fragment_filename
         return True, self._read_fragment(ctx)
 
     def _read_fragment(self, ctx):
+        if isinstance(ctx['fragment_filename_sanitized'], FragmentBuffer):
+            return ctx['fragment_filename_sanitized'].read()
         down, frag_sanitized = self.ydl.sanitize_open(ctx['fragment_filename_sanitized'], 'rb')
         try:
             ctx['fragment_filename_sanitized'] = frag_sanitized
@@ -155,7 +511,9 @@ class FragmentFD(FileDownloader):
         finally:
             if self.__do_ytdl_file(ctx):
                 self._write_ytdl_file(ctx)
-            if not self.params.get('keep_fragments', False):
+            if isinstance(ctx['fragment_filename_sanitized'], FragmentBuffer):
+                ctx['fragment_filename_sanitized'].close()
+            elif not self.params.get('keep_fragments', False):
                 self.ydl.remove(encodeFilename(ctx['fragment_filename_sanitized']))
             del ctx['fragment_filename_sanitized']
 
@@ -243,14 +601,10 @@ class FragmentFD(FileDownloader):
             'tmpfilename': ctx['tmpfilename'],
         }
 
-        start = time.time()
-        ctx.update({
-            'started': start,
-            'fragment_started': start,
-            # Amount of fragment's bytes downloaded by the time of the previous
-            # frag progress hook invocation
-            'prev_frag_downloaded_bytes': 0,
-        })
+        progress = ctx['fragment_progress'] = FragmentProgress(
+            resume_len, ctx['fragment_index'], total_frags, live=ctx['live'])
+        start = progress.started
+        ctx['started'] = start
 
         def frag_progress_hook(s):
             if s['status'] not in ('downloading', 'finished'):
@@ -259,39 +613,19 @@ class FragmentFD(FileDownloader):
             if ctx_id is not None and s.get('ctx_id') != ctx_id:
                 return
 
-            state['max_progress'] = ctx.get('max_progress')
-            state['progress_idx'] = ctx.get('progress_idx')
-
-            time_now = time.time()
-            state['elapsed'] = time_now - start
-            frag_total_bytes = s.get('total_bytes') or 0
-            s['fragment_info_dict'] = s.pop('info_dict', {})
-            if not ctx['live']:
-                estimated_size = (
-                    (ctx['complete_frags_downloaded_bytes'] + frag_total_bytes)
-                    / (state['fragment_index'] + 1) * total_frags)
-                state['total_bytes_estimate'] = estimated_size
-
-            if s['status'] == 'finished':
-                state['fragment_index'] += 1
-                ctx['fragment_index'] = state['fragment_index']
-                state['downloaded_bytes'] += frag_total_bytes - ctx['prev_frag_downloaded_bytes']
-                ctx['complete_frags_downloaded_bytes'] = state['downloaded_bytes']
-                ctx['speed'] = state['speed'] = self.calc_speed(
-                    ctx['fragment_started'], time_now, frag_total_bytes)
-                ctx['fragment_started'] = time.time()
-                ctx['prev_frag_downloaded_bytes'] = 0
-            else:
-                frag_downloaded_bytes = s['downloaded_bytes']
-                state['downloaded_bytes'] += frag_downloaded_bytes - ctx['prev_frag_downloaded_bytes']
-                if not ctx['live']:
-                    state['eta'] = self.calc_eta(
-                        start, time_now, estimated_size - resume_len,
-                        state['downloaded_bytes'] - resume_len)
-                ctx['speed'] = state['speed'] = self.calc_speed(
-                    ctx['fragment_started'], time_now, frag_downloaded_bytes)
-                ctx['prev_frag_downloaded_bytes'] = frag_downloaded_bytes
-            self._hook_progress(state, info_dict)
+            fragment_info_dict = s['fragment_info_dict'] = s.pop('info_dict', {})
+            with progress.lock:
+                state.update(progress.update(
+                    id(fragment_info_dict), s['status'], s.get('downloaded_bytes'), s.get('total_bytes')))
+                state['fragment_latency'] = progress.latency_percentiles()
+                state['decryption_time'] = progress.decryption_time
+                state['max_progress'] = ctx.get('max_progress')
+                state['progress_idx'] = ctx.get('progress_idx')
+                ctx['speed'] = state['speed']
+                if s['status'] == 'finished':
+                    ctx['fragment_index'] = state['fragment_index']
+                    ctx['complete_frags_downloaded_bytes'] = progress.complete_bytes
+                self._hook_progress(state, info_dict)
 
         ctx['dl'].add_progress_hook(frag_progress_hook)
 
@@ -325,6 +659,8 @@ class FragmentFD(FileDownloader):
             'status': 'finished',
             'elapsed': elapsed,
             'fragment_count': ctx.get('total_frags'),
+            'fragment_latency': ctx['fragment_progress'].latency_percentiles() if 'fragment_progress' in ctx else None,
+            'decryption_time': ctx['fragment_progress'].decryption_time if 'fragment_progress' in ctx else None,
             'ctx_id': ctx.get('ctx_id'),
             'max_progress': ctx.get('max_progress'),
             'progress_idx': ctx.get('progress_idx'),
@@ -351,25 +687,30 @@ class FragmentFD(FileDownloader):
             'fragment_index': 0,
         })
 
+    def _needs_decryption(self, fragment):
+        decrypt_info = fragment.get('decrypt_info')
+        # Don't decrypt the content in tests since the data is explicitly truncated and it's not to a valid block
+        # size (see https://github.com/ytdl-org/youtube-dl/pull/27660). Tests only care that the correct data downloaded,
+        # not what it decrypts to.
+        return bool(decrypt_info) and decrypt_info['METHOD'] == 'AES-128' and not self.params.get('test', False)
+
     def decrypter(self, info_dict):
         _key_cache = {}
+        # Fragments may be decrypted by several threads
+        _key_lock = threading.Lock()
 
         def _get_key(url):
-            if url not in _key_cache:
-                _key_cache[url] = self.ydl.urlopen(self._prepare_url(info_dict, url)).read()
-            return _key_cache[url]
+            with _key_lock:
+                if url not in _key_cache:
+                    _key_cache[url] = self.ydl.urlopen(self._prepare_url(info_dict, url)).read()
+                return _key_cache[url]
 
         def decrypt_fragment(fragment, frag_content):
-            decrypt_info = fragment.get('decrypt_info')
-            if not decrypt_info or decrypt_info['METHOD'] != 'AES-128':
+            if not self._needs_decryption(fragment):
                 return frag_content
+            decrypt_info = fragment['decrypt_info']
             iv = decrypt_info.get('IV') or compat_struct_pack('>8xq', fragment['media_sequence'])
             decrypt_info['KEY'] = decrypt_info.get('KEY') or _get_key(info_dict.get('_decryption_key_url') or decrypt_info['URI'])
-            # Don't decrypt the content in tests since the data is explicitly truncated and it's not to a valid block
-            # size (see https://github.com/ytdl-org/youtube-dl/pull/27660). Tests only care that the correct data downloaded,
-            # not what it decrypts to.
-            if self.params.get('test', False):
-                return frag_content
             decrypted_data = aes_cbc_decrypt_bytes(frag_content, decrypt_info['KEY'], iv)
             return decrypted_data[:-decrypted_data[-1]]
 
@@ -436,6 +777,13 @@ class FragmentFD(FileDownloader):
         if not pack_func:
             pack_func = lambda frag_content, _: frag_content
 
+        memory_limit = self.params.get('fragment_memory_limit')
+        if memory_limit is None:
+            memory_limit = self._FRAGMENT_MEMORY_LIMIT
+        if memory_limit and not self.params.get('keep_fragments', False):
+            spill_dir = None if ctx['tmpfilename'] == '-' else os.path.dirname(os.path.abspath(ctx['tmpfilename']))
+            ctx['fragment_spool'] = FragmentSpool(memory_limit, spill_dir)
+
         def download_fragment(fragment, ctx):
             frag_index = ctx['fragment_index'] = fragment['frag_index']
             if not interrupt_trigger[0]:
@@ -479,6 +827,11 @@ class FragmentFD(FileDownloader):
                 return False, frag_index
             return frag_content, frag_index
 
+        def read_fragment(frag_content, ctx):
+            if isinstance(frag_content, FragmentBuffer):
+                return self._read_fragment(ctx)
+            return frag_content
+
         def append_fragment(frag_content, frag_index, ctx):
             if not frag_content:
                 if not is_fatal(frag_index - 1):
@@ -492,25 +845,119 @@ class FragmentFD(FileDownloader):
             self._append_fragment(ctx, pack_func(frag_content, frag_index))
             return True
 
-        decrypt_fragment = self.decrypter(info_dict)
+        decrypter = self.decrypter(info_dict)
 
-        max_workers = math.ceil(
-            self.params.get('concurrent_fragment_downloads', 1) / ctx.get('max_progress', 1))
-        if can_threaded_download and max_workers > 1:
+        def decrypt_fragment(fragment, frag_content):
+            if not frag_content or not self._needs_decryption(fragment):
+                return frag_content
+            start = time.time()
+            try:
+                return decrypter(fragment, frag_content)
+            finally:
+                if 'fragment_progress' in ctx:
+                    ctx['fragment_progress'].add_decryption_time(time.time() - start)
+
+        def process_fragment(result):
+            fragment, frag_content, frag_index, frag_filename = result
+            frag_ctx = {'fragment_filename_sanitized': frag_filename}
+            frag_content = decrypt_fragment(fragment, read_fragment(frag_content, frag_ctx))
+            return frag_content, frag_index, frag_ctx['fragment_filename_sanitized']
+
+        # The asyncio engine keeps the fragments in the spool, so it can not be used with -FragN files
+        engine = None
+        if (self.params.get('fragment_engine') == 'asyncio' and ctx.get('fragment_spool')
+                and not self.params.get('test')):
+            from .async_fragment import AsyncFragmentEngine
+            if AsyncFragmentEngine.is_available(self.ydl):
+                engine = AsyncFragmentEngine.get()
+            else:
+                self.report_warning('The asyncio fragment engine does not support proxies; using threads instead')
 
-            def _download_fragment(fragment):
-                ctx_copy = ctx.copy()
-                frag_content, frag_index = download_fragment(fragment, ctx_copy)
-                return fragment, frag_content, frag_index, ctx_copy.get('fragment_filename_sanitized')
+        def _download_fragment(fragment):
+            ctx_copy = ctx.copy()
+            frag_content, frag_index = download_fragment(fragment, ctx_copy)
+            return fragment, frag_content, frag_index, ctx_copy.get('fragment_filename_sanitized')
 
-            self.report_warning('The download speed shown is only of one thread. This is a known issue and patches are welcome')
-            with tpe or concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
-                for fragment, frag_content, frag_index, frag_filename in pool.map(_download_fragment, fragments):
+        async def async_download_fragment(fragment):
+            if not engine.supports_url(fragment['url']):
+                return await engine.run_sync(_download_fragment, fragment)
+            frag_index = fragment['frag_index']
+            if not interrupt_trigger[0]:
+                return fragment, False, frag_index, None
+            headers = info_dict.get('http_headers', {})
+            fatal = is_fatal(fragment.get('index') or (frag_index - 1))
+            progress, spool = ctx['fragment_progress'], ctx['fragment_spool']
+            # The fragment is written to the spool while it is downloaded
+            frag_buffer = spool.buffer()
+            count = 0
+            while count <= fragment_retries:
+                fragment_info_dict = {
+                    'url': fragment['url'],
+                    'http_headers': headers,
+                    'ctx_id': ctx.get('ctx_id'),
+                }
+
+                def report_progress(downloaded_bytes, total_bytes, status='downloading'):
+                    ctx['dl']._hook_progress({
+                        'status': status,
+                        'downloaded_bytes': downloaded_bytes,
+                        'total_bytes': total_bytes,
+                        'ctx_id': ctx.get('ctx_id'),
+                    }, fragment_info_dict)
+
+                progress.begin(id(fragment_info_dict))
+                try:
+                    length, _ = await engine.fetch(
+                        self.ydl, fragment['url'], frag_buffer, headers, fragment.get('byte_range'), report_progress)
+                except (compat_urllib_error.HTTPError, http.client.HTTPException, OSError) as err:
+                    frag_buffer.reset()
+                    if isinstance(err, compat_urllib_error.HTTPError) and err.code in bad_status_code:
+                        frag_buffer.close()
+                        raise UnrecoverableHttpError()
+                    count += 1
+                    if count <= fragment_retries:
+                        self.report_retry_fragment(err, frag_index, count, fragment_retries)
+                    continue
+                except BaseException:
+                    frag_buffer.close()
+                    raise
+                finally:
+                    progress.end(id(fragment_info_dict))
+                report_progress(length, length, 'finished')
+                return fragment, frag_buffer, frag_index, frag_buffer
+
+            frag_buffer.close()
+            if fatal:
+                ctx['dest_stream'].close()
+                self.report_error('Giving up after %s fragment retries' % fragment_retries)
+            return fragment, False, frag_index, None
+
+        max_workers = math.ceil(
+            self.params.get('concurrent_fragment_downloads', 1) / ctx.get('max_progress', 1))
+        if engine or (can_threaded_download and max_workers > 1):
+
+            def discard_fragment(result):
+                if isinstance(result[1], FragmentBuffer):
+                    result[1].close()
+
+            # Decryption runs on its own pool, so that it does not hold back the appending of fragments
+            decryption_pool = concurrent.futures.ThreadPoolExecutor(max_workers)
+            with decryption_pool, engine.executor() if engine else (
+                    tpe or concurrent.futures.ThreadPoolExecutor(max_workers)) as pool:
+                # Hedged requests are only safe when fragments are not written to -FragN files
+                scheduler = FragmentScheduler(
+                    pool, async_download_fragment if engine else _download_fragment, max_workers,
+                    hedge=bool(ctx.get('fragment_spool')),
+                    is_success=lambda result: bool(result[1]), discard=discard_fragment)
+                decryption = FragmentDecryptionStage(
+                    decryption_pool, process_fragment, 2 * max_workers,
+                    needs_work=lambda result: bool(result[1]) and self._needs_decryption(result[0]))
+                for frag_content, frag_index, frag_filename in decryption.map(scheduler.map(fragments)):
                     if not interrupt_trigger[0]:
                         break
                     ctx['fragment_filename_sanitized'] = frag_filename
                     ctx['fragment_index'] = frag_index
-                    result = append_fragment(decrypt_fragment(fragment, frag_content), frag_index, ctx)
+                    result = append_fragment(frag_content, frag_index, ctx)
                     if not result:
                         return False
         else:
@@ -518,6 +965,7 @@ class FragmentFD(FileDownloader):
                 if not interrupt_trigger[0]:
                     break
                 frag_content, frag_index = download_fragment(fragment, ctx)
+                frag_content = read_fragment(frag_content, ctx)
                 result = append_fragment(decrypt_fragment(fragment, frag_content), frag_index, ctx)
                 if not result:
                     return False
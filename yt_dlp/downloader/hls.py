@@ -75,7 +75,7 @@ class HlsFD(FragmentFD):
                 can_download, message = False, 'The stream has AES-128 encryption and pycryptodomex is not available'
             else:
                 message = ('The stream has AES-128 encryption and neither ffmpeg nor pycryptodomex are available; '
-                           'Decryption will be performed natively, but will be extremely slow')
+                           'Decryption will be performed natively, but will be slow')
         if not can_download:
             has_drm = re.search('|'.join([
                 r'#EXT-X-FAXS-CM:',  # Adobe Flash Access
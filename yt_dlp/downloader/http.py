@@ -1,11 +1,20 @@
 from __future__ import unicode_literals
 
 import errno
+import json
+import math
 import socket
+import threading
 import time
 import random
 import re
 
+try:
+    import concurrent.futures
+    can_threaded_download = True
+except ImportError:
+    can_threaded_download = False
+
 from .common import FileDownloader
 from ..compat import (
     compat_str,
@@ -25,6 +34,9 @@ from ..utils import (
 
 
 class HttpFD(FileDownloader):
+    # Smallest byte range worth opening an extra connection for
+    _MIN_RANGE_SIZE = 1024 * 1024
+
     def real_download(self, filename, info_dict):
         url = info_dict['url']
         request_data = info_dict.get('request_data', None)
@@ -35,10 +47,16 @@ class HttpFD(FileDownloader):
             __setattr__ = dict.__setitem__
             __delattr__ = dict.__delitem__
 
+        # A writable stream may be given instead of a filename (see FragmentFD).
+        # It must have a reset() method to discard what was written if resuming fails
+        out_stream = None
+        if hasattr(filename, 'write'):
+            out_stream, filename = filename, '-'
+
         ctx = DownloadContext()
         ctx.filename = filename
         ctx.tmpfilename = self.temp_name(filename)
-        ctx.stream = None
+        ctx.stream = out_stream
 
         # Do not include the Accept-Encoding header
         headers = {'Youtubedl-no-compression': 'True'}
@@ -68,6 +86,20 @@ class HttpFD(FileDownloader):
 
         ctx.is_resume = ctx.resume_len > 0
 
+        connections = self.params.get('http_connections')
+        if connections is None:
+            connections = info_dict.get('downloader_options', {}).get('http_connections') or 1
+        if connections > 1 and can_threaded_download and not is_test and ctx.tmpfilename != '-':
+            success = self._download_multi_connection(ctx, info_dict, headers, connections)
+            if success is not None:
+                return success
+        if ctx.resume_len > 0 and self._read_range_state(ctx) is not None:
+            # The .part file was preallocated by a multi-connection download, so it is not a prefix of the file
+            self.report_unable_to_resume()
+            ctx.resume_len = 0
+            ctx.is_resume = False
+            self.ydl.remove(encodeFilename(self.ytdl_filename(ctx.filename)))
+
         count = 0
         retries = self.params.get('retries', 0)
 
@@ -87,6 +119,14 @@ class HttpFD(FileDownloader):
                 range_header += compat_str(end)
             req.add_header('Range', range_header)
 
+        def restart_download():
+            # Resuming is not possible, so the download starts over from the beginning
+            self.report_unable_to_resume()
+            ctx.resume_len = 0
+            ctx.open_mode = 'wb'
+            if out_stream is not None:
+                out_stream.reset()
+
         def establish_connection():
             ctx.chunk_size = (random.randint(int(chunk_size * 0.95), chunk_size)
                               if not is_test and chunk_size else chunk_size)
@@ -145,9 +185,7 @@ class HttpFD(FileDownloader):
                     # Content-Range is either not present or invalid. Assuming remote webserver is
                     # trying to send the whole file, resume is not possible, so wiping the local file
                     # and performing entire redownload
-                    self.report_unable_to_resume()
-                    ctx.resume_len = 0
-                    ctx.open_mode = 'wb'
+                    restart_download()
                 ctx.data_len = int_or_none(ctx.data.info().get('Content-length', None))
                 return
             except (compat_urllib_error.HTTPError, ) as err:
@@ -185,9 +223,7 @@ class HttpFD(FileDownloader):
                             raise SucceedDownload()
                         else:
                             # The length does not match, we start the download over
-                            self.report_unable_to_resume()
-                            ctx.resume_len = 0
-                            ctx.open_mode = 'wb'
+                            restart_download()
                             return
                 elif err.code < 500 or err.code >= 600:
                     # Unexpected HTTP error
@@ -240,9 +276,8 @@ class HttpFD(FileDownloader):
 
             def retry(e):
                 to_stdout = ctx.tmpfilename == '-'
-                if ctx.stream is not None:
-                    if not to_stdout:
-                        ctx.stream.close()
+                if ctx.stream is not None and not to_stdout:
+                    ctx.stream.close()
                     ctx.stream = None
                 ctx.resume_len = byte_counter if to_stdout else self.ydl.getsize(encodeFilename(ctx.tmpfilename))
                 raise RetryDownload(e)
@@ -398,7 +433,7 @@ class HttpFD(FileDownloader):
                 except SucceedDownload:
                     return True
         finally:
-            if ctx.stream:
+            if ctx.stream and ctx.stream is not out_stream:
                 ctx.stream.close()
                 ctx.stream = None
             if ctx.data:
@@ -407,3 +442,232 @@ class HttpFD(FileDownloader):
 
         self.report_error('giving up after %s retries' % retries)
         return False
+
+    def _probe_total_size(self, url, request_data, headers):
+        """Return (total size, response headers) if the server honours byte ranges"""
+        request = sanitized_Request(url, request_data, headers)
+        request.add_header('Range', 'bytes=0-0')
+        try:
+            data = self.ydl.urlopen(request)
+        except (compat_urllib_error.URLError, socket.error):
+            return None, None
+        try:
+            mobj = re.match(r'bytes 0-0/(\d+)', data.headers.get('Content-Range') or '')
+            return (int(mobj.group(1)) if mobj else None), data.info()
+        finally:
+            data.close()
+
+    def _read_range_state(self, ctx, total=None):
+        ytdl_filename = encodeFilename(self.ytdl_filename(ctx.filename))
+        if not self.ydl.isfile(ytdl_filename):
+            return None
+        stream, _ = self.ydl.sanitize_open(ytdl_filename, 'r')
+        try:
+            state = json.loads(stream.read())['downloader']['http_ranges']
+            if total is not None and state['total'] != total:
+                return None
+            return [{'start': s, 'end': e, 'downloaded': d} for s, e, d in state['ranges']]
+        except Exception:
+            return None
+        finally:
+            stream.close()
+
+    def _write_range_state(self, ctx, total, ranges):
+        stream, _ = self.ydl.sanitize_open(self.ytdl_filename(ctx.filename), 'w')
+        try:
+            stream.write(json.dumps({'downloader': {'http_ranges': {
+                'total': total,
+                'ranges': [[r['start'], r['end'], r['downloaded']] for r in ranges],
+            }}}))
+        finally:
+            stream.close()
+
+    def _download_multi_connection(self, ctx, info_dict, headers, connections):
+        """Download a resource of known length over several connections at once.
+
+        The .part file is preallocated and every byte range is written in place by
+        its own worker. Progress of each range is kept in the .ytdl file so that an
+        interrupted download resumes every range where it stopped.
+
+        Returns None if the server does not support byte ranges, so that the caller
+        can fall back to a regular download
+        """
+        url = info_dict['url']
+        request_data = info_dict.get('request_data')
+        bad_status_code = info_dict.get('unrecoverable_http_error') or tuple()
+
+        total, url_info = self._probe_total_size(url, request_data, headers)
+        if not total or total < 2 * self._MIN_RANGE_SIZE:
+            return None
+
+        min_data_len = self.params.get('min_filesize')
+        max_data_len = self.params.get('max_filesize')
+        if min_data_len is not None and total < min_data_len:
+            self.to_screen('\r[download] File is smaller than min-filesize (%s bytes < %s bytes). Aborting.' % (total, min_data_len))
+            return False
+        if max_data_len is not None and total > max_data_len:
+            self.to_screen('\r[download] File is larger than max-filesize (%s bytes > %s bytes). Aborting.' % (total, max_data_len))
+            return False
+
+        ranges = None
+        if ctx.resume_len > 0:
+            ranges = self._read_range_state(ctx, total)
+            if ranges is None:
+                # Without the state of the ranges, a preallocated .part file can not be
+                # told apart from a complete prefix of the file
+                self.report_unable_to_resume()
+                ctx.resume_len = 0
+        open_mode = 'ab' if ranges is not None else 'wb'
+        if ranges is None:
+            count = max(1, min(connections, math.ceil(total / self._MIN_RANGE_SIZE)))
+            size = math.ceil(total / count)
+            ranges = [{
+                'start': i * size,
+                'end': min((i + 1) * size, total) - 1,
+                'downloaded': 0,
+            } for i in range(count)]
+
+        def completed_bytes():
+            return total - sum(r['end'] - r['start'] + 1 - r['downloaded'] for r in ranges)
+
+        resume_len = completed_bytes()
+        if resume_len:
+            self.report_resuming_byte(resume_len)
+
+        try:
+            # The state is written first, so that a preallocated .part file always has one
+            self._write_range_state(ctx, total, ranges)
+            stream, ctx.tmpfilename = self.ydl.sanitize_open(ctx.tmpfilename, open_mode)
+            stream.truncate(total)
+            stream.close()
+        except (OSError, IOError) as err:
+            self.report_error('unable to open for writing: %s' % str(err))
+            return False
+        ctx.filename = self.undo_temp_name(ctx.tmpfilename)
+        self.report_destination(ctx.filename)
+        self.write_debug('Downloading %d bytes over %d connections' % (total, len(ranges)))
+
+        if self.params.get('xattr_set_filesize', False):
+            try:
+                write_xattr(ctx.tmpfilename, 'user.ytdl.filesize', str(total).encode('utf-8'))
+            except (XAttrUnavailableError, XAttrMetadataError) as err:
+                self.report_error('unable to set filesize xattr: %s' % str(err))
+
+        lock = threading.Lock()
+        stop = threading.Event()
+        retries = self.params.get('retries', 0)
+        block_size = ctx.block_size
+        start_time = time.time()
+        new_bytes = [0]
+
+        def download_range(rng):
+            count = 0
+            while not stop.is_set():
+                range_start = rng['start'] + rng['downloaded']
+                if range_start > rng['end']:
+                    return
+                request = sanitized_Request(url, request_data, headers)
+                request.add_header('Range', 'bytes=%d-%d' % (range_start, rng['end']))
+                try:
+                    data = self.ydl.urlopen(request)
+                    try:
+                        content_range = re.match(r'bytes (\d+)-', data.headers.get('Content-Range') or '')
+                        if not content_range or int(content_range.group(1)) != range_start:
+                            raise ContentTooShortError(0, rng['end'] - range_start + 1)
+                        with self.ydl.open(encodeFilename(ctx.tmpfilename), 'r+b') as stream:
+                            stream.seek(range_start)
+                            while not stop.is_set():
+                                data_block = data.read(block_size)[:rng['end'] + 1 - rng['start'] - rng['downloaded']]
+                                if not data_block:
+                                    break
+                                stream.write(data_block)
+                                stream.flush()
+                                with lock:
+                                    rng['downloaded'] += len(data_block)
+                                    new_bytes[0] += len(data_block)
+                                self.slow_down(start_time, None, new_bytes[0])
+                    finally:
+                        data.close()
+                    if not stop.is_set() and rng['start'] + rng['downloaded'] <= rng['end']:
+                        raise ContentTooShortError(
+                            rng['downloaded'], rng['end'] - rng['start'] + 1)
+                except compat_urllib_error.HTTPError as err:
+                    if err.code in bad_status_code:
+                        raise UnrecoverableHttpError()
+                    elif err.code < 500 or err.code >= 600:
+                        raise
+                    error = err
+                except (socket.error, ContentTooShortError) as err:
+                    error = err
+                else:
+                    continue
+                count += 1
+                if count > retries:
+                    raise error
+                self.report_retry(error, count, retries)
+
+        def report_progress():
+            with lock:
+                byte_counter = completed_bytes()
+                downloaded = new_bytes[0]
+            now = time.time()
+            speed = self.calc_speed(start_time, now, downloaded)
+            self._hook_progress({
+                'status': 'downloading',
+                'downloaded_bytes': byte_counter,
+                'total_bytes': total,
+                'tmpfilename': ctx.tmpfilename,
+                'filename': ctx.filename,
+                'eta': self.calc_eta(start_time, now, total - resume_len, downloaded),
+                'speed': speed,
+                'elapsed': now - ctx.start_time,
+                'ctx_id': info_dict.get('ctx_id'),
+            }, info_dict)
+            return speed
+
+        throttle_start = None
+        try:
+            with concurrent.futures.ThreadPoolExecutor(len(ranges)) as pool:
+                futures = [pool.submit(download_range, rng) for rng in ranges]
+                try:
+                    while True:
+                        done, pending = concurrent.futures.wait(
+                            futures, timeout=0.5, return_when=concurrent.futures.FIRST_EXCEPTION)
+                        for future in done:
+                            future.result()
+                        if not pending:
+                            break
+                        speed = report_progress()
+                        with lock:
+                            self._write_range_state(ctx, total, ranges)
+                        if speed and speed < (self.params.get('throttledratelimit') or 0):
+                            now = time.time()
+                            if throttle_start is None:
+                                throttle_start = now
+                            elif now - throttle_start > 3:
+                                raise ThrottledDownload()
+                        elif speed:
+                            throttle_start = None
+                finally:
+                    stop.set()
+        except BaseException:
+            self._write_range_state(ctx, total, ranges)
+            raise
+
+        ytdl_filename = encodeFilename(self.ytdl_filename(ctx.filename))
+        if self.ydl.isfile(ytdl_filename):
+            self.ydl.remove(ytdl_filename)
+        self.try_rename(ctx.tmpfilename, ctx.filename)
+
+        if self.params.get('updatetime', True):
+            info_dict['filetime'] = self.try_utime(ctx.filename, url_info.get('last-modified', None))
+
+        self._hook_progress({
+            'downloaded_bytes': total,
+            'total_bytes': total,
+            'filename': ctx.filename,
+            'status': 'finished',
+            'elapsed': time.time() - ctx.start_time,
+            'ctx_id': info_dict.get('ctx_id'),
+        }, info_dict)
+        return True
@@ -11,6 +11,10 @@ if not os.environ.get('YTDLP_NO_LAZY_EXTRACTORS'):
     try:
         from .lazy_extractors import *
         from .lazy_extractors import _ALL_CLASSES
+        try:
+            from .lazy_extractors import _URL_INDEX
+        except ImportError:  # Generated by an older version
+            _URL_INDEX = {}
         _SELFHOSTED_CLASSES = []
         _LAZY_LOADER = True
     except ImportError:
@@ -18,6 +22,7 @@ if not os.environ.get('YTDLP_NO_LAZY_EXTRACTORS'):
 
 if not _LAZY_LOADER:
     from .extractors import *
+    _URL_INDEX = {}
     _ALL_CLASSES = [
         klass
         for name, klass in globals().items()
@@ -39,6 +44,13 @@ def gen_extractor_classes():
     return _ALL_CLASSES
 
 
+def gen_url_index():
+    """ Return the index of the extractors by hostname (see urlindex.py).
+    It is only available with lazy extractors; otherwise an empty dict is returned.
+    """
+    return _URL_INDEX
+
+
 def gen_selfhosted_extractor_classes() -> List[Type['SelfHostedInfoExtractor']]:
     """
     Return a list of extractors for self-hosted services.
@@ -40,10 +40,6 @@ from ..compat import (
     compat_xml_parse_error,
 )
 from ..downloader import FileDownloader
-from ..downloader.f4m import (
-    get_base_url,
-    remove_encrypted_media,
-)
 from ..utils import (
     age_restricted,
     base_url,
@@ -99,7 +95,6 @@ from ..utils import (
     xpath_text,
     xpath_with_ns,
 )
-from ..websocket import HAVE_WEBSOCKET
 
 
 class InfoExtractor(object):
@@ -616,8 +611,11 @@ class InfoExtractor(object):
     def extract(self, url):
         """Extracts URL information and returns it in list of dicts."""
 
-        if 'websocket' in self._FEATURE_DEPENDENCY and not HAVE_WEBSOCKET:
-            raise ExtractorError('Please install websockets or websocket_client package via pip, or websockat command', expected=True)
+        if 'websocket' in self._FEATURE_DEPENDENCY:
+            # Probing the WebSocket implementations is slow, so only do it when needed
+            from ..websocket import HAVE_WEBSOCKET
+            if not HAVE_WEBSOCKET:
+                raise ExtractorError('Please install websockets or websocket_client package via pip, or websockat command', expected=True)
         try:
             if 'yaml' in self._FEATURE_DEPENDENCY:
                 __import__('yaml')
@@ -1994,6 +1992,8 @@ class InfoExtractor(object):
         if not media_nodes:
             manifest_version = '2.0'
             media_nodes = manifest.findall('{http://ns.adobe.com/f4m/2.0}media')
+        from ..downloader.f4m import get_base_url, remove_encrypted_media
+
         # Remove unsupported DRM protected media from final formats
         # rendition (see https://github.com/ytdl-org/youtube-dl/issues/8573).
         media_nodes = remove_encrypted_media(media_nodes)
@@ -3807,7 +3807,14 @@ class SelfHostedInfoExtractor(InfoExtractor):
     (like PeerTube, Mastodon, Misskey, and lots of others).
     """
 
+    # hostname -> software name reported by nodeinfo, or None if there is no nodeinfo
     _NODEINFO_CACHE = {}
+    # Probe results are also kept in the cache directory, and are loaded all at once
+    # on the first probe of the process
+    _NODEINFO_CACHE_SECTION = 'selfhosted-nodeinfo'
+    _NODEINFO_CACHE_TTL = 7 * 24 * 3600
+    _NODEINFO_NEGATIVE_CACHE_TTL = 24 * 3600
+    _NODEINFO_CACHE_LOADED = set()  # cache directories
     _SELF_HOSTED = True
 
     _IMPOSSIBLE_HOSTNAMES = ()
@@ -3849,7 +3856,8 @@ class SelfHostedInfoExtractor(InfoExtractor):
         if skip:
             return False
 
-        ie.report_warning(f'Testing if {hostname} is a {cls._SOFTWARE_NAME} instance because it is not listed in internal instance list.')
+        if hostname not in cls._load_nodeinfo_cache(ie):
+            ie.report_warning(f'Testing if {hostname} is a {cls._SOFTWARE_NAME} instance because it is not listed in internal instance list.')
 
         if cls._probe_webpage(webpage) or cls._fetch_nodeinfo_software(ie, hostname) in cls._NODEINFO_SOFTWARE:
             # this is probably acceptable instance
@@ -3899,18 +3907,52 @@ class SelfHostedInfoExtractor(InfoExtractor):
 
         return True
 
+    @staticmethod
+    def _load_nodeinfo_cache(ie: 'InfoExtractor'):
+        """
+        Add the probe results stored in the cache directory to _NODEINFO_CACHE, and return it.
+        The stored entries are only read once per process
+        """
+        cache = SelfHostedInfoExtractor._NODEINFO_CACHE
+        ydl = ie._downloader
+        if ydl is None or not ydl.cache.enabled:
+            return cache
+        root_dir = ydl.cache._get_root_dir()
+        if root_dir in SelfHostedInfoExtractor._NODEINFO_CACHE_LOADED:
+            return cache
+        SelfHostedInfoExtractor._NODEINFO_CACHE_LOADED.add(root_dir)
+        for hostname, software in ydl.cache.load_section(SelfHostedInfoExtractor._NODEINFO_CACHE_SECTION).items():
+            cache.setdefault(hostname, software or None)
+        return cache
+
     @staticmethod
     def _fetch_nodeinfo_software(ie: 'InfoExtractor', hostname: 'compat_str'):
-        if hostname in SelfHostedInfoExtractor._NODEINFO_CACHE:
-            nodeinfo = SelfHostedInfoExtractor._NODEINFO_CACHE[hostname]
-        else:
-            nodeinfo_href = ie._download_json(
-                f'https://{hostname}/.well-known/nodeinfo', hostname,
-                'Downloading instance nodeinfo link', fatal=False)
-            nodeinfo_url = traverse_obj(nodeinfo_href, ('links', -1, 'href'))
-            if not nodeinfo_url:
-                return False
+        cache = SelfHostedInfoExtractor._load_nodeinfo_cache(ie)
+        if hostname in cache:
+            return cache[hostname]
 
+        software = None
+        try:
+            nodeinfo_href = ie._download_json(
+                f'https://{hostname}/.well-known/nodeinfo', hostname, 'Downloading instance nodeinfo link')
+        except ExtractorError as e:
+            # Only a client error or a response that is not JSON tells that the host has no nodeinfo.
+            # Connection errors, timeouts and server errors may be temporary, so nothing is remembered
+            if not (isinstance(e.cause, compat_urllib_error.HTTPError) and 400 <= e.cause.code < 500
+                    or isinstance(e.cause, ValueError)):
+                ie.report_warning('Unable to probe %s: %s' % (hostname, e))
+                return None
+            nodeinfo_href = None
+        nodeinfo_url = traverse_obj(nodeinfo_href, ('links', -1, 'href'))
+        if nodeinfo_url:
             nodeinfo = ie._download_json(nodeinfo_url, hostname, 'Downloading instance nodeinfo')
-
-        return traverse_obj(nodeinfo, ('software', 'name'))
+            software = traverse_obj(nodeinfo, ('software', 'name'), expected_type=compat_str)
+
+        cache[hostname] = software
+        if ie._downloader is not None and re.match(r'^[a-zA-Z0-9_.-]+$', hostname):
+            # Hosts without nodeinfo are stored as an empty string, and are probed again sooner
+            ie._downloader.cache.store(
+                SelfHostedInfoExtractor._NODEINFO_CACHE_SECTION, hostname, software or '',
+                ttl=(SelfHostedInfoExtractor._NODEINFO_CACHE_TTL if software
+                     else SelfHostedInfoExtractor._NODEINFO_NEGATIVE_CACHE_TTL))
+        return software
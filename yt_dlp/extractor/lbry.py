@@ -285,7 +285,7 @@ class LBRYChannelIE(LBRYBaseIE):
             params['any_languages'] = languages
         entries = OnDemandPagedList(
             functools.partial(self._fetch_page, claim_id, url, params),
-            self._PAGE_SIZE)
+            self._PAGE_SIZE, prefetch=4)
         result_value = result.get('value') or {}
         return self.playlist_result(
             entries, claim_id, result_value.get('title'),
@@ -239,7 +239,7 @@ class MotherlessGroupIE(InfoExtractor):
             for entry in self._extract_entries(webpage, url):
                 yield entry
 
-        playlist = InAdvancePagedList(_get_page, page_count, PAGE_SIZE)
+        playlist = InAdvancePagedList(_get_page, page_count, PAGE_SIZE, prefetch=4)
 
         return {
             '_type': 'playlist',
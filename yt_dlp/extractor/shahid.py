@@ -219,7 +219,7 @@ class ShahidShowIE(ShahidBaseIE):
         entries = InAdvancePagedList(
             page_func,
             math.ceil(playlist['count'] / self._PAGE_SIZE),
-            self._PAGE_SIZE)
+            self._PAGE_SIZE, prefetch=4)
 
         return self.playlist_result(
             entries, show_id, show.get('title'), show.get('description'))
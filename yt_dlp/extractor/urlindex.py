@@ -0,0 +1,366 @@
+# coding: utf-8
+"""
+Index of the extractors by the hostnames their _VALID_URL can match.
+
+The index is computed by devscripts/make_lazy_extractors.py and stored in
+lazy_extractors.py as _URL_INDEX, a dict mapping the name of each indexed
+extractor to the hostname suffixes it accepts. An http(s) URL can only be
+matched by an indexed extractor if its hostname ends with one of these suffixes,
+so URLDispatcher only needs to call suitable() on those extractors and on the
+ones that are not indexed (e.g. those with a custom suitable()).
+"""
+from __future__ import unicode_literals
+
+import ast
+import inspect
+import re
+import textwrap
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+
+class _Wild(object):
+    """A part of the pattern that can match variable text"""
+
+    def __init__(self, item):
+        self.may_match_slash = _may_match([item], ord('/'))
+        self.may_match_colon = _may_match([item], ord(':'))
+        self.min_length = _min_length([item])
+
+
+_END = object()
+_IRRELEVANT = object()
+_UNKNOWN = object()
+
+_PACKAGE = __name__.rpartition('.')[0] + '.'
+_HTTP_PREFIXES = ('http://', 'https://')
+_MAX_EXPANSIONS = 1000000
+
+
+class _TooComplex(Exception):
+    pass
+
+
+def _in_matches(set_items, char):
+    negate, matches = False, False
+    for op, av in set_items:
+        if op is sre_constants.NEGATE:
+            negate = True
+        elif op is sre_constants.LITERAL:
+            matches = matches or av == char
+        elif op is sre_constants.RANGE:
+            matches = matches or av[0] <= char <= av[1]
+        elif op is sre_constants.CATEGORY and av in (
+                sre_constants.CATEGORY_DIGIT, sre_constants.CATEGORY_WORD, sre_constants.CATEGORY_SPACE):
+            matches = matches or chr(char).isalnum() or chr(char).isspace() or char == ord('_')
+        else:
+            return True  # Unsure
+    return matches != negate
+
+
+_REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT, getattr(sre_constants, 'POSSESSIVE_REPEAT', None))
+
+
+def _may_match(items, char):
+    """Whether the pattern items may match text containing the character char"""
+    for op, av in items:
+        if op is sre_constants.LITERAL:
+            if av == char:
+                return True
+        elif op is sre_constants.NOT_LITERAL:
+            if av != char:
+                return True
+        elif op is sre_constants.IN:
+            if _in_matches(av, char):
+                return True
+        elif op is sre_constants.SUBPATTERN:
+            if _may_match(av[-1], char):
+                return True
+        elif op is sre_constants.BRANCH:
+            if any(_may_match(alt, char) for alt in av[1]):
+                return True
+        elif op in _REPEATS:
+            if _may_match(av[2], char):
+                return True
+        elif op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+            pass
+        else:
+            return True
+    return False
+
+
+def _min_length(items):
+    length = 0
+    for op, av in items:
+        if op in (sre_constants.LITERAL, sre_constants.NOT_LITERAL, sre_constants.IN, sre_constants.ANY):
+            length += 1
+        elif op is sre_constants.SUBPATTERN:
+            length += _min_length(av[-1])
+        elif op is sre_constants.BRANCH:
+            length += min(_min_length(alt) for alt in av[1])
+        elif op in _REPEATS:
+            length += av[0] * _min_length(av[2])
+    return length
+
+
+def _classify(tokens, complete):
+    """
+    Decide what the (partial) expansion of a pattern means for http(s) URLs. Returns
+    None if more tokens are needed, _IRRELEVANT if it can not match such URLs,
+    _UNKNOWN if the hostnames it can match are unknown, or the hostname suffix it requires
+    """
+    lead = ''
+    for token in tokens:
+        if not isinstance(token, str):
+            break
+        lead += token
+    if not any(lead[:len(prefix)] == prefix[:len(lead)] for prefix in _HTTP_PREFIXES):
+        return _IRRELEVANT
+    # The ":" of the scheme is at most the 6th character
+    consumed = 0
+    for token in tokens:
+        if token is _END or token == ':' or isinstance(token, _Wild) and token.may_match_colon:
+            break
+        consumed += token.min_length if isinstance(token, _Wild) else 1
+    if consumed > len('https'):
+        return _IRRELEVANT
+
+    # The pattern can not match a "/" before its first literal "/", so that one is the first
+    # "/" of the URL, which has to be followed by another one
+    for i, token in enumerate(tokens):
+        if token is _END:
+            return _IRRELEVANT
+        elif isinstance(token, _Wild):
+            if token.may_match_slash:
+                return _UNKNOWN
+        elif token == '/':
+            if i + 1 == len(tokens):
+                return _UNKNOWN if complete else None
+            following = tokens[i + 1]
+            if following == '/':
+                break
+            return _UNKNOWN if isinstance(following, _Wild) and following.may_match_slash else _IRRELEVANT
+    else:
+        return _UNKNOWN if complete else None
+
+    host_start = i + 2
+    for j in range(host_start, len(tokens)):
+        token = tokens[j]
+        if token is _END or token in ('/', ':'):
+            break
+        if isinstance(token, _Wild) and token.may_match_slash:
+            return _UNKNOWN
+    else:
+        return _UNKNOWN if complete else None
+
+    host = tokens[host_start:j]
+    wild = [k for k, token in enumerate(host) if isinstance(token, _Wild)]
+    suffix = ''.join(host[wild[-1] + 1:] if wild else host)
+    return suffix or _UNKNOWN
+
+
+def _expand(items, tokens, cont, counter):
+    counter[0] += 1
+    if counter[0] > _MAX_EXPANSIONS:
+        raise _TooComplex()
+    result = _classify(tokens, False)
+    if result is not None:
+        yield result
+        return
+    if not items:
+        yield from cont(tokens)
+        return
+
+    (op, av), rest = items[0], items[1:]
+
+    def next_(new_tokens):
+        return _expand(rest, new_tokens, cont, counter)
+
+    if op is sre_constants.LITERAL:
+        yield from next_(tokens + (chr(av).lower(), ))
+    elif op is sre_constants.SUBPATTERN or op is getattr(sre_constants, 'ATOMIC_GROUP', None):
+        yield from _expand(list(av if op is not sre_constants.SUBPATTERN else av[-1]), tokens, next_, counter)
+    elif op is sre_constants.BRANCH:
+        for alt in av[1]:
+            yield from _expand(list(alt), tokens, next_, counter)
+    elif op is sre_constants.IN and len(av) <= 8 and all(o is sre_constants.LITERAL for o, _ in av):
+        for char in sorted(set(chr(a).lower() for _, a in av)):
+            yield from next_(tokens + (char, ))
+    elif op in _REPEATS and av[1] == 1:
+        if av[0] == 0:
+            yield from next_(tokens)
+        yield from _expand(list(av[2]), tokens, next_, counter)
+    elif op is sre_constants.AT:
+        if av in (sre_constants.AT_END, sre_constants.AT_END_STRING):
+            yield from next_(tokens + (_END, ))
+        else:
+            yield from next_(tokens)
+    elif op in (sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        # Zero-width; ignoring them can only make the index more permissive
+        yield from next_(tokens)
+    else:
+        yield from next_(tokens + (_Wild((op, av)), ))
+
+
+def hostname_suffixes(regex):
+    """
+    Return the hostname suffixes one of which the hostname of any http(s) URL matched by
+    re.match(regex, url) ends with, or None if they can not be determined
+    """
+    if not isinstance(regex, str):
+        return None
+    try:
+        parsed = sre_parse.parse(regex)
+        suffixes = set()
+        for result in _expand(list(parsed), (), lambda tokens: iter((_classify(tokens, True), )), [0]):
+            if result is _UNKNOWN:
+                return None
+            elif result is not _IRRELEVANT:
+                suffixes.add(result)
+    except (_TooComplex, RecursionError, re.error):
+        return None
+    return tuple(sorted(suffixes))
+
+
+def _is_match_call(node, url_arg):
+    """Whether node is super(...).suitable(url) or cls._match_valid_url(url)"""
+    if not (isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute)
+            and len(node.args) == 1 and isinstance(node.args[0], ast.Name) and node.args[0].id == url_arg):
+        return False
+    value = node.func.value
+    if node.func.attr == 'suitable':
+        return isinstance(value, ast.Call) and isinstance(value.func, ast.Name) and value.func.id == 'super'
+    return node.func.attr == '_match_valid_url' and isinstance(value, ast.Name) and value.id == 'cls'
+
+
+def _implies_match(node, url_arg):
+    """Whether the expression node can only be truthy if the URL matches _VALID_URL"""
+    if isinstance(node, ast.Constant) or type(node).__name__ == 'NameConstant':  # Python < 3.8
+        return not node.value
+    elif isinstance(node, ast.IfExp):
+        return _implies_match(node.body, url_arg) and _implies_match(node.orelse, url_arg)
+    elif isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        return any(_implies_match(value, url_arg) for value in node.values)
+    return _is_match_call(node, url_arg)
+
+
+def _is_match_guard(node, url_arg, matches):
+    """Whether node is "if not <match>: return False", where matches are names bound to match calls"""
+    if not (isinstance(node, ast.If) and not node.orelse and len(node.body) == 1
+            and isinstance(node.body[0], ast.Return) and _implies_match(node.body[0].value, url_arg)):
+        return False
+    test = node.test
+    if not (isinstance(test, ast.UnaryOp) and isinstance(test.op, ast.Not)):
+        return False
+    return _is_match_call(test.operand, url_arg) or (isinstance(test.operand, ast.Name) and test.operand.id in matches)
+
+
+def _suitable_requires_match(ie):
+    """
+    Whether suitable() of the class can only return True for URLs matching its _VALID_URL.
+    Custom suitable() methods are checked for the usual patterns, such as
+    "return False if OtherIE.suitable(url) else super().suitable(url)"
+    """
+    from .common import InfoExtractor
+
+    func = ie.suitable.__func__
+    if func is InfoExtractor.suitable.__func__:
+        return True
+    defining_cls = next(cls for cls in ie.__mro__ if 'suitable' in cls.__dict__)
+    try:
+        tree = ast.parse(textwrap.dedent(inspect.getsource(func)))
+    except (OSError, TypeError, SyntaxError):
+        return False
+    func_def = tree.body[0]
+    if not isinstance(func_def, ast.FunctionDef) or len(func_def.args.args) != 2:
+        return False
+    url_arg = func_def.args.args[1].arg
+    if any(isinstance(node, ast.Name) and node.id == url_arg and isinstance(node.ctx, ast.Store)
+           for node in ast.walk(func_def)):
+        return False
+
+    matches = set()
+    for statement in func_def.body:
+        if _is_match_guard(statement, url_arg, matches):
+            break  # Every statement after this one is only reached if the URL matches
+        if (isinstance(statement, ast.Assign) and len(statement.targets) == 1
+                and isinstance(statement.targets[0], ast.Name) and _is_match_call(statement.value, url_arg)):
+            matches.add(statement.targets[0].id)
+            continue
+        returns = [node for node in ast.walk(statement) if isinstance(node, ast.Return)]
+        if not all(node.value is not None and _implies_match(node.value, url_arg) for node in returns):
+            return False
+    else:
+        # The last statement has to be a return
+        if not isinstance(func_def.body[-1], ast.Return):
+            return False
+
+    # super().suitable() has to imply the match as well
+    parent = ie.__mro__[ie.__mro__.index(defining_cls) + 1]
+    return parent is object or not hasattr(parent, 'suitable') or _suitable_requires_match(parent)
+
+
+def build_url_index(ie_classes):
+    """Compute the _URL_INDEX of lazy_extractors.py"""
+    index = {}
+    for ie in ie_classes:
+        if not _suitable_requires_match(ie):
+            continue
+        valid_url = getattr(ie, '_VALID_URL', None)
+        if not valid_url and hasattr(ie, '_make_valid_url'):
+            valid_url = ie._make_valid_url()
+        suffixes = hostname_suffixes(valid_url)
+        if suffixes is not None:
+            index[ie.__name__] = suffixes
+    return index
+
+
+# The hostname analysis relies on the first "/" after the netloc being the end of the
+# hostname and port; other URLs are matched against every extractor
+_HTTP_URL_RE = re.compile(r'(?i)https?://(?P<host>[a-z0-9._\-]+)(?::[0-9]+)?(?:/|\Z)')
+
+
+class URLDispatcher(object):
+    """
+    Yield the extractors of an ordered dict {ie_key: ie} that may be suitable for a URL,
+    in their original order. Extractors may be replaced in the dict by others with the
+    same indexed_suffixes(), but the dispatcher has to be rebuilt if keys are added
+    """
+
+    def __init__(self, ies, url_index):
+        self._ies = ies
+        self._keys = list(ies)
+        self._wild = []
+        self._index = {}
+        for position, (ie_key, ie) in enumerate(ies.items()):
+            suffixes = self.indexed_suffixes(ie, url_index)
+            if suffixes is None:
+                self._wild.append(position)
+                continue
+            for suffix in suffixes:
+                self._index.setdefault(suffix, []).append(position)
+
+    @staticmethod
+    def indexed_suffixes(ie, url_index):
+        ie_cls = ie if isinstance(ie, type) else type(ie)
+        # Only the built-in extractors were indexed, not plugins or classes of the same name
+        if not ie_cls.__module__.startswith(_PACKAGE):
+            return None
+        return url_index.get(ie_cls.__name__)
+
+    def candidates(self, url):
+        mobj = _HTTP_URL_RE.match(url)
+        if not mobj:
+            yield from self._ies.items()
+            return
+        host = mobj.group('host').lower()
+        positions = set(self._wild)
+        for i in range(len(host)):
+            positions.update(self._index.get(host[i:], ()))
+        for position in sorted(positions):
+            ie_key = self._keys[position]
+            yield ie_key, self._ies[ie_key]
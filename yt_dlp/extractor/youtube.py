@@ -3,6 +3,7 @@
 from __future__ import unicode_literals
 
 import calendar
+import collections
 import copy
 import datetime
 import functools
@@ -1755,6 +1756,15 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
             return False
         return super(YoutubeIE, cls).suitable(url)
 
+    # Signature and n functions, and decrypted n values, shared by all the instances of the process.
+    # The n values are also kept in the cache directory for _NSIG_VALUE_TTL seconds
+    _SIG_FUNCTIONS = {}  # (player_id, signature cache id) -> function
+    _NSIG_FUNCTIONS = {}  # player_id -> function
+    _NSIG_VALUES = collections.OrderedDict()  # (player_id, n) -> decrypted n
+    _NSIG_VALUES_MAX = 4096
+    _NSIG_VALUE_TTL = 7 * 24 * 3600
+    _nsig_lock = threading.Lock()
+
     def __init__(self, *args, **kwargs):
         super(YoutubeIE, self).__init__(*args, **kwargs)
         self._code_cache = {}
@@ -1965,7 +1975,7 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
             cache_spec = [ord(c) for c in cache_res]
 
             self._downloader.cache.store('youtube-sigfuncs', func_id, cache_spec)
-            return res
+            return lambda s: ''.join(s[i] for i in cache_spec)
 
     def _print_sig_code(self, func, example_sig):
         if not self.get_param('youtube_print_sig_code'):
@@ -2009,8 +2019,8 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
                 '    return %s\n') % (signature_id_tuple, expr_code)
         self.to_screen('Extracted signature function:\n' + code)
 
-    def _parse_sig_js(self, jscode):
-        funcname = self._search_regex(
+    def _extract_sig_function_name(self, jscode):
+        return self._search_regex(
             (r'\b[cs]\s*&&\s*[adf]\.set\([^,]+\s*,\s*encodeURIComponent\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(',
              r'\b[a-zA-Z0-9]+\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*encodeURIComponent\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\(',
              r'\bm=(?P<sig>[a-zA-Z0-9$]{2,})\(decodeURIComponent\(h\.s\)\)',
@@ -2029,6 +2039,8 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
              r'\bc\s*&&\s*[a-zA-Z0-9]+\.set\([^,]+\s*,\s*\([^)]*\)\s*\(\s*(?P<sig>[a-zA-Z0-9$]+)\('),
             jscode, 'Initial JS player signature function name', group='sig')
 
+    def _parse_sig_js(self, jscode):
+        funcname = self._extract_sig_function_name(jscode)
         jsi = JSInterpreter(jscode)
         initial_function = jsi.extract_function(funcname)
         return lambda s: initial_function([s])
@@ -2040,13 +2052,13 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
             raise ExtractorError('Cannot decrypt signature without player_url')
 
         try:
-            player_id = (player_url, self._signature_cache_id(s))
-            if player_id not in self._player_cache:
+            func_id = (self._extract_player_info(player_url), self._signature_cache_id(s))
+            if func_id not in self._SIG_FUNCTIONS:
                 func = self._extract_signature_function(
                     video_id, player_url, s
                 )
-                self._player_cache[player_id] = func
-            func = self._player_cache[player_id]
+                self._SIG_FUNCTIONS[func_id] = func
+            func = self._SIG_FUNCTIONS[func_id]
             self._print_sig_code(func, s)
             return func(s)
         except Exception as e:
@@ -2062,21 +2074,51 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
             player_url = compat_urlparse.urljoin(
                 'https://www.youtube.com', player_url)
 
-        sig_id = ('nsig_value', s)
-        if sig_id in self._player_cache:
-            return self._player_cache[sig_id]
-
         try:
-            player_id = ('nsig', player_url)
-            if player_id not in self._player_cache:
-                self._player_cache[player_id] = self._extract_n_function(video_id, player_url)
-            func = self._player_cache[player_id]
-            self._player_cache[sig_id] = func(s)
-            self.write_debug(f'Decrypted nsig {s} => {self._player_cache[sig_id]}')
-            return self._player_cache[sig_id]
+            player_id = self._extract_player_info(player_url)
+            sig_id = (player_id, s)
+            with self._nsig_lock:
+                ret = self._NSIG_VALUES.get(sig_id)
+                if ret is not None:
+                    self._NSIG_VALUES.move_to_end(sig_id)
+                    return ret
+
+            cache_id = f'{player_id}.{s}' if re.match(r'^[a-zA-Z0-9_-]+$', s) else None
+            if cache_id:
+                ret = self._downloader.cache.load('youtube-nsig-values', cache_id)
+            if ret is None:
+                ret = self._get_n_function(video_id, player_url)(s)
+                if cache_id:
+                    self._downloader.cache.store('youtube-nsig-values', cache_id, ret, ttl=self._NSIG_VALUE_TTL)
+                self.write_debug(f'Decrypted nsig {s} => {ret}')
+
+            with self._nsig_lock:
+                self._NSIG_VALUES[sig_id] = ret
+                while len(self._NSIG_VALUES) > self._NSIG_VALUES_MAX:
+                    self._NSIG_VALUES.popitem(last=False)
+            return ret
         except Exception as e:
             raise ExtractorError(traceback.format_exc(), cause=e, video_id=video_id)
 
+    def _get_n_function(self, video_id, player_url):
+        player_id = self._extract_player_info(player_url)
+        func = self._NSIG_FUNCTIONS.get(player_id)
+        if func is None:
+            func = self._NSIG_FUNCTIONS[player_id] = self._extract_n_function(video_id, player_url)
+        return func
+
+    def _prewarm_player(self, video_id, player_url):
+        """
+        Store the n function of the player in the cache directory,
+        so that the other processes do not need to download the player
+        """
+        player_id = self._extract_player_info(player_url)
+        if self._downloader.cache.load('youtube-nsig', player_id):
+            self.to_screen(f'Player {player_id} is already in cache')
+            return False
+        self._get_n_function(video_id, player_url)
+        return True
+
     def _extract_n_function_name(self, jscode):
         return self._search_regex(
             (r'\.get\("n"\)\)&&\(b=(?P<nfunc>[a-zA-Z0-9$]{3})\([a-zA-Z0-9]\)',),
@@ -2098,7 +2140,14 @@ class YoutubeIE(YoutubeBaseInfoExtractor):
         if self.get_param('youtube_print_sig_code'):
             self.to_screen(f'Extracted nsig function from {player_id}:\n{func_code[1]}\n')
 
-        return lambda s: jsi.extract_function_from_code(*func_code)([s])
+        func = jsi.extract_function_from_code(*func_code)
+        lock = threading.Lock()
+
+        def n_function(s):
+            # The local variables of func are shared by all of its calls
+            with lock:
+                return func([s])
+        return n_function
 
     def _decrypt_nsig_2(self, n, video_id, player_url):
         """Turn the encrypted n field into a working signature, for fallbacks"""
@@ -1,4 +1,5 @@
 from collections.abc import MutableMapping
+import functools
 import json
 import operator
 import re
@@ -72,17 +73,29 @@ class LocalNameSpace(MutableMapping):
 
 
 class JSInterpreter(object):
-    def __init__(self, code, objects=None):
+    """
+    Interpreter for the subset of JavaScript used by the extractors.
+
+    With compile_functions (the default), the functions built by build_function are
+    parsed once with compile_statement into a tree of Python closures, which is then
+    evaluated on every call. Otherwise each call interprets the code from its text.
+    """
+
+    def __init__(self, code, objects=None, compile_functions=True):
         if objects is None:
             objects = {}
         self.code = code
         self._functions = {}
         self._objects = objects
+        self._compile_functions = compile_functions
         self.__named_object_counter = 0
 
-    def _named_object(self, namespace, obj):
+    def _new_object_name(self):
         self.__named_object_counter += 1
-        name = f'__yt_dlp_jsinterp_obj{self.__named_object_counter}'
+        return f'__yt_dlp_jsinterp_obj{self.__named_object_counter}'
+
+    def _named_object(self, namespace, obj):
+        name = self._new_object_name()
         namespace[name] = obj
         return name
 
@@ -365,13 +378,7 @@ class JSInterpreter(object):
             else:
                 arg_str, remaining = None, arg_str
 
-            def assertion(cndn, msg):
-                """ assert, but without risk of getting optimized out """
-                if not cndn:
-                    raise ExtractorError(f'{member} {msg}: {expr}')
-
             def eval_method():
-                nonlocal member
                 if variable == 'String':
                     obj = str
                 elif variable in local_vars:
@@ -391,75 +398,7 @@ class JSInterpreter(object):
                 argvals = [
                     self.interpret_expression(v, local_vars, allow_recursion)
                     for v in self._separate(arg_str)]
-
-                if obj == str:
-                    if member == 'fromCharCode':
-                        assertion(argvals, 'takes one or more arguments')
-                        return ''.join(map(chr, argvals))
-                    raise ExtractorError(f'Unsupported string method {member}')
-
-                if member == 'split':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(argvals == [''], 'with arguments is not implemented')
-                    return list(obj)
-                elif member == 'join':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(len(argvals) == 1, 'takes exactly one argument')
-                    return argvals[0].join(obj)
-                elif member == 'reverse':
-                    assertion(not argvals, 'does not take any arguments')
-                    obj.reverse()
-                    return obj
-                elif member == 'slice':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(len(argvals) == 1, 'takes exactly one argument')
-                    return obj[argvals[0]:]
-                elif member == 'splice':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(argvals, 'takes one or more arguments')
-                    index, howMany = map(int, (argvals + [len(obj)])[:2])
-                    if index < 0:
-                        index += len(obj)
-                    add_items = argvals[2:]
-                    res = []
-                    for i in range(index, min(index + howMany, len(obj))):
-                        res.append(obj.pop(index))
-                    for i, item in enumerate(add_items):
-                        obj.insert(index + i, item)
-                    return res
-                elif member == 'unshift':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(argvals, 'takes one or more arguments')
-                    for item in reversed(argvals):
-                        obj.insert(0, item)
-                    return obj
-                elif member == 'pop':
-                    assertion(isinstance(obj, list), 'must be applied on a list')
-                    assertion(not argvals, 'does not take any arguments')
-                    if not obj:
-                        return
-                    return obj.pop()
-                elif member == 'push':
-                    assertion(argvals, 'takes one or more arguments')
-                    obj.extend(argvals)
-                    return obj
-                elif member == 'forEach':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
-                    f, this = (argvals + [''])[:2]
-                    return [f((item, idx, obj), this=this) for idx, item in enumerate(obj)]
-                elif member == 'indexOf':
-                    assertion(argvals, 'takes one or more arguments')
-                    assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
-                    idx, start = (argvals + [0])[:2]
-                    try:
-                        return obj.index(idx, start)
-                    except ValueError:
-                        return -1
-
-                if isinstance(obj, list):
-                    member = int(member)
-                return obj[member](argvals)
+                return self._call_method(obj, member, argvals, expr)
 
             if remaining:
                 return self.interpret_expression(
@@ -483,6 +422,492 @@ class JSInterpreter(object):
         if expr:
             raise ExtractorError('Unsupported JS expression %r' % expr)
 
+    def _call_method(self, obj, member, argvals, expr):
+        def assertion(cndn, msg):
+            """ assert, but without risk of getting optimized out """
+            if not cndn:
+                raise ExtractorError(f'{member} {msg}: {expr}')
+
+        if obj == str:
+            if member == 'fromCharCode':
+                assertion(argvals, 'takes one or more arguments')
+                return ''.join(map(chr, argvals))
+            raise ExtractorError(f'Unsupported string method {member}')
+
+        if member == 'split':
+            assertion(argvals, 'takes one or more arguments')
+            assertion(argvals == [''], 'with arguments is not implemented')
+            return list(obj)
+        elif member == 'join':
+            assertion(isinstance(obj, list), 'must be applied on a list')
+            assertion(len(argvals) == 1, 'takes exactly one argument')
+            return argvals[0].join(obj)
+        elif member == 'reverse':
+            assertion(not argvals, 'does not take any arguments')
+            obj.reverse()
+            return obj
+        elif member == 'slice':
+            assertion(isinstance(obj, list), 'must be applied on a list')
+            assertion(len(argvals) == 1, 'takes exactly one argument')
+            return obj[argvals[0]:]
+        elif member == 'splice':
+            assertion(isinstance(obj, list), 'must be applied on a list')
+            assertion(argvals, 'takes one or more arguments')
+            index, howMany = map(int, (argvals + [len(obj)])[:2])
+            if index < 0:
+                index += len(obj)
+            add_items = argvals[2:]
+            res = []
+            for i in range(index, min(index + howMany, len(obj))):
+                res.append(obj.pop(index))
+            for i, item in enumerate(add_items):
+                obj.insert(index + i, item)
+            return res
+        elif member == 'unshift':
+            assertion(isinstance(obj, list), 'must be applied on a list')
+            assertion(argvals, 'takes one or more arguments')
+            for item in reversed(argvals):
+                obj.insert(0, item)
+            return obj
+        elif member == 'pop':
+            assertion(isinstance(obj, list), 'must be applied on a list')
+            assertion(not argvals, 'does not take any arguments')
+            if not obj:
+                return
+            return obj.pop()
+        elif member == 'push':
+            assertion(argvals, 'takes one or more arguments')
+            obj.extend(argvals)
+            return obj
+        elif member == 'forEach':
+            assertion(argvals, 'takes one or more arguments')
+            assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
+            f, this = (argvals + [''])[:2]
+            return [f((item, idx, obj), this=this) for idx, item in enumerate(obj)]
+        elif member == 'indexOf':
+            assertion(argvals, 'takes one or more arguments')
+            assertion(len(argvals) <= 2, 'takes at-most 2 arguments')
+            idx, start = (argvals + [0])[:2]
+            try:
+                return obj.index(idx, start)
+            except ValueError:
+                return -1
+
+        if isinstance(obj, list):
+            member = int(member)
+        return obj[member](argvals)
+
+    @staticmethod
+    def _compile_or_defer(compile_func, *args):
+        """
+        Errors found while compiling are raised when the compiled code is run,
+        since interpret_statement only fails once it reaches the faulty code
+        """
+        try:
+            return compile_func(*args)
+        except Exception as e:
+            error = e
+
+            def raise_error(local_vars):
+                raise error.with_traceback(None)
+            return raise_error
+
+    def compile_statement(self, stmt, allow_recursion=100):
+        """
+        Parse stmt once, and return a function of local_vars which
+        has the same result as interpret_statement(stmt, local_vars)
+        """
+        return self._compile_or_defer(self._compile_statement, stmt, allow_recursion)
+
+    def compile_expression(self, expr, allow_recursion=100, is_value=False):
+        """
+        Parse expr once, and return a function of local_vars which
+        has the same result as interpret_expression(expr, local_vars, ...)
+        """
+        return self._compile_or_defer(self._compile_expression, expr, allow_recursion, is_value)
+
+    def _compile_named_object(self, obj_func, outer, allow_recursion):
+        """
+        Compile the expression "<name><outer>", where <name> holds the result of obj_func;
+        interpret_expression splices the result of obj_func into the code instead
+        """
+        name = self._new_object_name()
+        rest = self.compile_expression(name + outer, allow_recursion)
+
+        def named_object(local_vars):
+            local_vars[name] = obj_func(local_vars)
+            return rest(local_vars)
+        return named_object
+
+    def _compile_statement(self, stmt, allow_recursion):
+        if allow_recursion < 0:
+            raise ExtractorError('Recursion limit reached')
+
+        sub_statements = list(self._separate(stmt, ';'))
+        stmt = (sub_statements or ['']).pop()
+        sub_statements = [
+            self.compile_statement(sub_stmt, allow_recursion - 1) for sub_stmt in sub_statements]
+
+        should_abort = False
+        stmt = stmt.lstrip()
+        stmt_m = re.match(r'var\s', stmt)
+        is_value = False
+        if stmt_m:
+            expr = stmt[len(stmt_m.group(0)):]
+        else:
+            return_m = re.match(r'return(?:\s+|$)', stmt)
+            if return_m:
+                expr = stmt[len(return_m.group(0)):]
+                should_abort = True
+                is_value = True
+            else:
+                expr = stmt
+        expr = self.compile_expression(expr, allow_recursion, is_value)
+
+        def statement(local_vars):
+            for sub_stmt in sub_statements:
+                ret, sub_should_abort = sub_stmt(local_vars)
+                if sub_should_abort:
+                    return ret
+            return expr(local_vars), should_abort
+        return statement
+
+    def _compile_expression(self, expr, allow_recursion, is_value):
+        expr = expr.strip()
+        if expr == '':  # Empty expression
+            return lambda local_vars: None
+
+        if expr.startswith('{') and not is_value:
+            inner, outer = self._separate_at_paren(expr, '}')
+            inner = self.compile_statement(inner, allow_recursion - 1)
+            if not outer:
+                return lambda local_vars: inner(local_vars)[0]
+            name = self._new_object_name()
+            rest = self.compile_expression(name + outer, allow_recursion)
+
+            def block(local_vars):
+                ret, should_abort = inner(local_vars)
+                if should_abort:
+                    return ret
+                local_vars[name] = ret
+                return rest(local_vars)
+            return block
+
+        if expr.startswith('(') and not is_value:
+            inner, outer = self._separate_at_paren(expr, ')')
+            inner = self.compile_expression(inner, allow_recursion)
+            if not outer:
+                return inner
+            return self._compile_named_object(inner, outer, allow_recursion)
+
+        if expr.startswith('[') and not is_value:
+            inner, outer = self._separate_at_paren(expr, ']')
+            items = [self.compile_expression(item, allow_recursion) for item in self._separate(inner)]
+
+            def array(local_vars):
+                return [item(local_vars) for item in items]
+            if not outer:
+                return array
+            return self._compile_named_object(array, outer, allow_recursion)
+
+        m = re.match(r'try\s*', expr)
+        if m:
+            if expr[m.end()] == '{':
+                try_expr, expr = self._separate_at_paren(expr[m.end():], '}')
+            else:
+                try_expr, expr = expr[m.end() - 1:], ''
+            try_stmt = self.compile_statement(try_expr, allow_recursion - 1)
+            rest = self.compile_statement(expr, allow_recursion - 1)
+
+            def try_block(local_vars):
+                ret, should_abort = try_stmt(local_vars)
+                if should_abort:
+                    return ret
+                return rest(local_vars)[0]
+            return try_block
+
+        m = re.match(r'catch\s*\(', expr)
+        if m:
+            # We ignore the catch block
+            _, expr = self._separate_at_paren(expr, '}')
+            rest = self.compile_statement(expr, allow_recursion - 1)
+            return lambda local_vars: rest(local_vars)[0]
+
+        m = re.match(r'for\s*\(', expr)
+        if m:
+            constructor, remaining = self._separate_at_paren(expr[m.end() - 1:], ')')
+            if remaining.startswith('{'):
+                body, expr = self._separate_at_paren(remaining, '}')
+            else:
+                m = re.match(r'switch\s*\(', remaining)  # FIXME
+                if m:
+                    switch_val, remaining = self._separate_at_paren(remaining[m.end() - 1:], ')')
+                    body, expr = self._separate_at_paren(remaining, '}')
+                    body = 'switch(%s){%s}' % (switch_val, body)
+                else:
+                    body, expr = remaining, ''
+            start, cndn, increment = self._separate(constructor, ';')
+            start = self.compile_statement(start, allow_recursion - 1)
+            cndn = self.compile_expression(cndn, allow_recursion)
+            body = self.compile_statement(body, allow_recursion - 1)
+            increment = self.compile_statement(increment, allow_recursion - 1)
+            rest = self.compile_statement(expr, allow_recursion - 1)
+
+            def for_loop(local_vars):
+                if start(local_vars)[1]:
+                    raise ExtractorError(
+                        f'Premature return in the initialization of a for loop in {constructor!r}')
+                while True:
+                    if not cndn(local_vars):
+                        break
+                    try:
+                        ret, should_abort = body(local_vars)
+                        if should_abort:
+                            return ret
+                    except JS_Break:
+                        break
+                    except JS_Continue:
+                        pass
+                    if increment(local_vars)[1]:
+                        raise ExtractorError(
+                            f'Premature return in the initialization of a for loop in {constructor!r}')
+                return rest(local_vars)[0]
+            return for_loop
+
+        m = re.match(r'switch\s*\(', expr)
+        if m:
+            switch_val, remaining = self._separate_at_paren(expr[m.end() - 1:], ')')
+            switch_val = self.compile_expression(switch_val, allow_recursion)
+            body, expr = self._separate_at_paren(remaining, '}')
+            cases = []
+            for item in body.replace('default:', 'case default:').split('case ')[1:]:
+                case, stmt = [i.strip() for i in self._separate(item, ':', 1)]
+                cases.append((
+                    case, None if case == 'default' else self.compile_expression(case, allow_recursion),
+                    self.compile_statement(stmt, allow_recursion - 1)))
+            rest = self.compile_statement(expr, allow_recursion - 1)
+
+            def switch(local_vars):
+                value = switch_val(local_vars)
+                for default in (False, True):
+                    matched = False
+                    for case, case_val, stmt in cases:
+                        if default:
+                            matched = matched or case == 'default'
+                        elif not matched:
+                            matched = case != 'default' and value == case_val(local_vars)
+                        if not matched:
+                            continue
+                        try:
+                            ret, should_abort = stmt(local_vars)
+                            if should_abort:
+                                return ret
+                        except JS_Break:
+                            break
+                    if matched:
+                        break
+                return rest(local_vars)[0]
+            return switch
+
+        # Comma seperated statements
+        sub_expressions = []
+        if not is_value:
+            sub_expressions = list(self._separate(expr))
+            expr = sub_expressions.pop().strip() if sub_expressions else ''
+            sub_expressions = [
+                self.compile_expression(sub_expr, allow_recursion) for sub_expr in sub_expressions]
+
+        updates = []
+        for m in reversed(list(re.finditer(rf'''(?x)
+                (?P<pre_sign>\+\+|--)(?P<var1>{_NAME_RE})|
+                (?P<var2>{_NAME_RE})(?P<post_sign>\+\+|--)''', expr))):
+            name = self._new_object_name()
+            sign = m.group('pre_sign') or m.group('post_sign')
+            updates.insert(0, (
+                m.group('var1') or m.group('var2'), 1 if sign[0] == '+' else -1,
+                bool(m.group('pre_sign')), name))
+            start, end = m.span()
+            expr = expr[:start] + name + expr[end:]
+
+        value = self._compile_or_defer(self._compile_value, expr, allow_recursion, is_value)
+        if not sub_expressions and not updates:
+            return value
+
+        def expression(local_vars):
+            for sub_expr in sub_expressions:
+                sub_expr(local_vars)
+            for var, step, is_pre, name in updates:
+                ret = local_vars[var]
+                local_vars[var] += step
+                if is_pre:
+                    ret = local_vars[var]
+                local_vars[name] = ret
+            return value(local_vars)
+        return expression
+
+    def _compile_value(self, expr, allow_recursion, is_value):
+        for op, opfunc in _ASSIGN_OPERATORS:
+            m = re.match(r'''(?x)
+                (?P<out>%s)(?:\[(?P<index>[^\]]+?)\])?
+                \s*%s
+                (?P<expr>.*)$''' % (_NAME_RE, re.escape(op)), expr)
+            if not m:
+                continue
+            out = m.group('out')
+            right = self.compile_expression(m.group('expr'), allow_recursion)
+
+            if m.groupdict().get('index'):
+                index = self.compile_expression(m.group('index'), allow_recursion)
+
+                def assign(local_vars):
+                    right_val = right(local_vars)
+                    lvar = local_vars[out]
+                    idx = index(local_vars)
+                    if not isinstance(idx, int):
+                        raise ExtractorError(f'List indices must be integers: {idx}')
+                    val = opfunc(lvar[idx], right_val)
+                    lvar[idx] = val
+                    return val
+            else:
+                def assign(local_vars):
+                    right_val = right(local_vars)
+                    val = opfunc(local_vars.get(out), right_val)
+                    local_vars[out] = val
+                    return val
+            return assign
+
+        if expr.isdigit():
+            value = int(expr)
+            return lambda local_vars: value
+
+        if expr == 'break':
+            def js_break(local_vars):
+                raise JS_Break()
+            return js_break
+        elif expr == 'continue':
+            def js_continue(local_vars):
+                raise JS_Continue()
+            return js_continue
+
+        var_m = re.match(
+            r'(?!if|return|true|false|null)(?P<name>%s)$' % _NAME_RE,
+            expr)
+        if var_m:
+            name = var_m.group('name')
+            return lambda local_vars: local_vars[name]
+
+        try:
+            value = json.loads(expr)
+        except ValueError:
+            pass
+        else:
+            if isinstance(value, (list, dict)):
+                # A new object on each evaluation
+                return lambda local_vars: json.loads(expr)
+            return lambda local_vars: value
+
+        operation = self._compile_or_defer(self._compile_operation, expr, allow_recursion)
+        if not is_value:
+            return operation
+
+        if expr[0] in '\'{[' or expr.startswith('function'):
+            def literal(local_vars):
+                try:
+                    return self.parse_literal(expr, local_vars)
+                except ValueError:
+                    return operation(local_vars)
+            return literal
+
+        # Otherwise, parse_literal only accepts the name of a local variable
+        def local_var_or_operation(local_vars):
+            if expr in local_vars:
+                return local_vars[expr]
+            return operation(local_vars)
+        return local_var_or_operation
+
+    def _compile_operation(self, expr, allow_recursion):
+        m = re.match(
+            r'(?P<in>%s)\[(?P<idx>.+)\]$' % _NAME_RE, expr)
+        if m:
+            name = m.group('in')
+            idx = self.compile_expression(m.group('idx'), allow_recursion)
+
+            def index(local_vars):
+                val = local_vars[name]
+                return val[idx(local_vars)]
+            return index
+
+        for op, opfunc in _OPERATORS:
+            separated = list(self._separate(expr, op))
+            if len(separated) < 2:
+                continue
+            right = self.compile_statement(separated.pop(), allow_recursion - 1)
+            left = self.compile_statement(op.join(separated), allow_recursion - 1)
+
+            def operation(local_vars):
+                left_val, should_abort = left(local_vars)
+                if should_abort:
+                    raise ExtractorError(f'Premature left-side return of {op} in {expr!r}')
+                right_val, should_abort = right(local_vars)
+                if should_abort:
+                    raise ExtractorError(f'Premature right-side return of {op} in {expr!r}')
+                return opfunc(left_val or 0, right_val)
+            return operation
+
+        m = re.match(
+            r'(?P<var>%s)(?:\.(?P<member>[^(]+)|\[(?P<member2>[^]]+)\])\s*' % _NAME_RE,
+            expr)
+        if m:
+            variable = m.group('var')
+            member = remove_quotes(m.group('member') or m.group('member2'))
+            arg_str = expr[m.end():]
+            if arg_str.startswith('('):
+                arg_str, remaining = self._separate_at_paren(arg_str, ')')
+                args = [self.compile_expression(v, allow_recursion) for v in self._separate(arg_str)]
+            else:
+                args, remaining = None, arg_str
+
+            def eval_method(local_vars):
+                if variable == 'String':
+                    obj = str
+                elif variable in local_vars:
+                    obj = local_vars[variable]
+                else:
+                    if variable not in self._objects:
+                        self._objects[variable] = self.extract_object(variable)
+                    obj = self._objects[variable]
+
+                if args is None:
+                    # Member access
+                    if member == 'length':
+                        return len(obj)
+                    return obj[member]
+
+                # Function call
+                return self._call_method(obj, member, [arg(local_vars) for arg in args], expr)
+
+            if remaining:
+                return self._compile_named_object(eval_method, remaining, allow_recursion)
+            return eval_method
+
+        m = re.match(r'^(?P<func>%s)\((?P<args>[a-zA-Z0-9_$,]*)\)$' % _NAME_RE, expr)
+        if m:
+            fname = m.group('func')
+            args = [(int(v), None) if v.isdigit() else (None, v) for v in self._separate(m.group('args'))]
+
+            def call(local_vars):
+                argvals = tuple([local_vars[name] if name else value for value, name in args])
+                if fname in local_vars:
+                    return local_vars[fname](argvals)
+                elif fname not in self._functions:
+                    self._functions[fname] = self.extract_function(fname)
+                return self._functions[fname](argvals)
+            return call
+
+        if expr:
+            raise ExtractorError('Unsupported JS expression %r' % expr)
+        return lambda local_vars: None
+
     def extract_object(self, objname):
         _FUNC_NAME_RE = r'''(?:[a-zA-Z$0-9]+|"[a-zA-Z$0-9]+"|'[a-zA-Z$0-9]+')'''
         obj = {}
@@ -547,6 +972,9 @@ class JSInterpreter(object):
     def build_function(self, argnames, code, *global_stack):
         global_stack = list(global_stack) or [{}]
         local_vars = global_stack.pop(0)
+        compiled = None
+        if self._compile_functions:
+            compiled = [self.compile_statement(stmt) for stmt in self._separate(code.replace('\n', ''), ';')]
 
         def resf(args, **kwargs):
             local_vars.update({
@@ -554,8 +982,14 @@ class JSInterpreter(object):
                 **kwargs
             })
             var_stack = LocalNameSpace(local_vars, *global_stack)
-            for stmt in self._separate(code.replace('\n', ''), ';'):
-                ret, should_abort = self.interpret_statement(stmt, var_stack)
+            if compiled is None:
+                statements = (
+                    functools.partial(self.interpret_statement, stmt)
+                    for stmt in self._separate(code.replace('\n', ''), ';'))
+            else:
+                statements = compiled
+            for stmt in statements:
+                ret, should_abort = stmt(var_stack)
                 if should_abort:
                     break
             return ret
@@ -12,27 +12,27 @@ from .compat import (
     compat_kwargs,
     compat_shlex_split,
 )
+from .downloader import EXTERNAL_DOWNLOADERS
+from .postprocessor._constants import (
+    DEFAULT_SPONSORBLOCK_CHAPTER_TITLE,
+    EXTRACT_AUDIO_EXTS,
+    SPONSORBLOCK_CATEGORIES,
+    SPONSORBLOCK_POI_CATEGORIES,
+    SUBTITLES_CONVERT_EXTS,
+    THUMBNAILS_CONVERT_EXTS,
+    VIDEO_CONVERT_EXTS,
+)
 from .utils import (
     expand_path,
     get_executable_path,
     OUTTMPL_TYPES,
     preferredencoding,
     remove_end,
+    SUPPORTED_BROWSERS,
     write_string,
 )
-from .cookies import SUPPORTED_BROWSERS
 from .version import __version__
 
-from .downloader.external import list_external_downloaders
-from .postprocessor import (
-    FFmpegExtractAudioPP,
-    FFmpegSubtitlesConvertorPP,
-    FFmpegThumbnailsConvertorPP,
-    FFmpegVideoRemuxerPP,
-    SponsorBlockPP,
-)
-from .postprocessor.modify_chapters import DEFAULT_SPONSORBLOCK_CHAPTER_TITLE
-
 
 def _hide_login_info(opts):
     PRIVATE_OPTS = set(['-p', '--password', '-u', '--username', '--video-password', '--ap-password', '--ap-username'])
@@ -381,6 +381,10 @@ def parseOpts(overrideArguments=None):
         metavar='IP', dest='source_address', default=None,
         help='Client-side IP address to bind to',
     )
+    network.add_option(
+        '--no-http-keep-alive',
+        action='store_false', dest='http_keep_alive', default=True,
+        help='Open a new connection for every HTTP request instead of reusing idle connections to the same host')
     network.add_option(
         '-4', '--force-ipv4',
         action='store_const', const='0.0.0.0', dest='source_address',
@@ -510,7 +514,14 @@ def parseOpts(overrideArguments=None):
     selection.add_option(
         '--download-archive', metavar='FILE',
         dest='download_archive',
-        help='Download only videos not listed in the archive file. Record the IDs of all downloaded videos in it')
+        help=(
+            'Download only videos not listed in the archive file. Record the IDs of all downloaded videos in it. '
+            'Files with a .db, .sqlite or .sqlite3 extension are indexed archives that are not loaded into memory; '
+            'use devscripts/convert_download_archive.py to convert an existing archive'))
+    selection.add_option(
+        '--download-archive-batch-size', metavar='N',
+        dest='download_archive_batch_size', default=None, type=int,
+        help='Record downloads in the archive N at a time instead of after each video (default is 1)')
     selection.add_option(
         '--no-download-archive',
         dest='download_archive', action="store_const", const=None,
@@ -731,6 +742,21 @@ def parseOpts(overrideArguments=None):
         '-N', '--concurrent-fragments',
         dest='concurrent_fragment_downloads', metavar='N', default=1, type=int,
         help='Number of fragments of a dash/hlsnative video that should be download concurrently (default is %default)')
+    downloader.add_option(
+        '--fragment-memory-limit',
+        dest='fragment_memory_limit', metavar='SIZE', default=None,
+        help=(
+            'Maximum size of downloaded fragments kept in memory while waiting to be written in order '
+            '(e.g. 100M) (default is 64M). Fragments over this limit are spilled to temporary files. '
+            'Use 0 to always write fragments to disk before appending them'))
+    downloader.add_option(
+        '--fragment-engine',
+        metavar='ENGINE', dest='fragment_engine', default='threads',
+        choices=('threads', 'asyncio'),
+        help=(
+            'How concurrent fragments of HLS and DASH downloads are requested. '
+            'One of threads (the default; a thread per connection) or '
+            'asyncio (all the connections on a single event loop; not used with proxies)'))
     downloader.add_option(
         '-r', '--limit-rate', '--rate-limit',
         dest='ratelimit', metavar='RATE',
@@ -781,6 +807,13 @@ def parseOpts(overrideArguments=None):
         help=(
             'Size of a chunk for chunk-based HTTP downloading (e.g. 10485760 or 10M) (default is disabled). '
             'May be useful for bypassing bandwidth throttling imposed by a webserver (experimental)'))
+    downloader.add_option(
+        '--http-connections',
+        dest='http_connections', metavar='N', default=None, type=int,
+        help=(
+            'Number of connections used to download a single file over HTTP (default is 1). '
+            'The file is split into byte ranges that are downloaded at the same time. '
+            'Only used when the server supports range requests'))
     downloader.add_option(
         '--test',
         action='store_true', dest='test', default=False,
@@ -797,6 +830,12 @@ def parseOpts(overrideArguments=None):
         '--playlist-random',
         action='store_true',
         help='Download playlist videos in random order')
+    downloader.add_option(
+        '--playlist-prefetch',
+        dest='playlist_prefetch', metavar='N', default=0, type=int,
+        help=(
+            'Number of upcoming playlist videos to extract while the current one is downloaded. '
+            'When used, the downloaded videos are post-processed in the background (default is %default)'))
     downloader.add_option(
         '--xattr-set-filesize',
         dest='xattr_set_filesize', action='store_true',
@@ -838,13 +877,13 @@ def parseOpts(overrideArguments=None):
             'You can use this option multiple times to set different downloaders for different protocols. '
             'For example, --downloader aria2c --downloader "dash,m3u8:native" will use '
             'aria2c for http/ftp downloads, and the native downloader for dash/m3u8 downloads '
-            '(Alias: --external-downloader)' % ', '.join(list_external_downloaders())))
+            '(Alias: --external-downloader)' % ', '.join(EXTERNAL_DOWNLOADERS)))
     downloader.add_option(
         '--downloader-args', '--external-downloader-args',
         metavar='NAME:ARGS', dest='external_downloader_args', default={}, type='str',
         action='callback', callback=_dict_from_options_callback,
         callback_kwargs={
-            'allowed_keys': r'ffmpeg_[io]\d*|%s' % '|'.join(list_external_downloaders()),
+            'allowed_keys': r'ffmpeg_[io]\d*|%s' % '|'.join(EXTERNAL_DOWNLOADERS),
             'default_key': 'default',
             'process': compat_shlex_split
         }, help=(
@@ -1290,6 +1329,9 @@ def parseOpts(overrideArguments=None):
     filesystem.add_option(
         '--no-cache-dir', action='store_false', dest='cachedir',
         help='Disable filesystem caching')
+    filesystem.add_option(
+        '--cache-max-size', dest='cache_max_size', metavar='SIZE', default=None,
+        help='Maximum size of the cache (e.g. 10M) (default is 64M). The least recently used entries are removed beyond it')
     filesystem.add_option(
         '--rm-cache-dir',
         action='store_true', dest='rm_cachedir',
@@ -1347,7 +1389,7 @@ def parseOpts(overrideArguments=None):
         '--audio-format', metavar='FORMAT', dest='audioformat', default='best',
         help=(
             'Specify audio format to convert the audio to when -x is used. Currently supported formats are: '
-            'best (default) or one of %s' % '|'.join(FFmpegExtractAudioPP.SUPPORTED_EXTS)))
+            'best (default) or one of %s' % '|'.join(EXTRACT_AUDIO_EXTS)))
     postproc.add_option(
         '--audio-quality', metavar='QUALITY',
         dest='audioquality', default='5',
@@ -1359,7 +1401,7 @@ def parseOpts(overrideArguments=None):
             'Remux the video into another container if necessary (currently supported: %s). '
             'If target container does not support the video/audio codec, remuxing will fail. '
             'You can specify multiple rules; Eg. "aac>m4a/mov>mp4/mkv" will remux aac to m4a, mov to mp4 '
-            'and anything else to mkv.' % '|'.join(FFmpegVideoRemuxerPP.SUPPORTED_EXTS)))
+            'and anything else to mkv.' % '|'.join(VIDEO_CONVERT_EXTS)))
     postproc.add_option(
         '--recode-video',
         metavar='FORMAT', dest='recodevideo', default=None,
@@ -1485,6 +1527,16 @@ def parseOpts(overrideArguments=None):
         '--ffmpeg-location', '--avconv-location', metavar='PATH',
         dest='ffmpeg_location',
         help='Location of the ffmpeg binary; either the path to the binary or its containing directory')
+    postproc.add_option(
+        '--fuse-postprocessors',
+        action='store_true', dest='fuse_postprocessors', default=True,
+        help=(
+            'Run consecutive postprocessors that only remux the file (fixups and embedding of '
+            'subtitles, metadata and thumbnails) as a single ffmpeg command (default)'))
+    postproc.add_option(
+        '--no-fuse-postprocessors',
+        action='store_false', dest='fuse_postprocessors',
+        help='Rewrite the file once for each postprocessor')
     postproc.add_option(
         '--exec', metavar='CMD',
         action='append', dest='exec_cmd',
@@ -1514,13 +1566,13 @@ def parseOpts(overrideArguments=None):
         metavar='FORMAT', dest='convertsubtitles', default=None,
         help=(
             'Convert the subtitles to another format (currently supported: %s) '
-            '(Alias: --convert-subtitles)' % '|'.join(FFmpegSubtitlesConvertorPP.SUPPORTED_EXTS)))
+            '(Alias: --convert-subtitles)' % '|'.join(SUBTITLES_CONVERT_EXTS)))
     postproc.add_option(
         '--convert-thumbnails',
         metavar='FORMAT', dest='convertthumbnails', default=None,
         help=(
             'Convert the thumbnails to another format '
-            '(currently supported: %s) ' % '|'.join(FFmpegThumbnailsConvertorPP.SUPPORTED_EXTS)))
+            '(currently supported: %s) ' % '|'.join(THUMBNAILS_CONVERT_EXTS)))
     postproc.add_option(
         '--split-chapters', '--split-tracks',
         dest='split_chapters', action='store_true', default=False,
@@ -1548,8 +1600,9 @@ def parseOpts(overrideArguments=None):
         action='store_true', dest='force_keyframes_at_cuts', default=False,
         help=(
             'Force keyframes around the chapters before removing/splitting them. '
-            'Requires a re-encode and thus is very slow, but the resulting video '
-            'may have fewer artifacts around the cuts'))
+            'Requires a re-encode and thus is slow, but the resulting video '
+            'may have fewer artifacts around the cuts. When removing chapters, '
+            'only the parts of the video around the cuts are re-encoded when possible'))
     postproc.add_option(
         '--no-force-keyframes-at-cuts',
         action='store_false', dest='force_keyframes_at_cuts',
@@ -1581,18 +1634,18 @@ def parseOpts(overrideArguments=None):
         '--sponsorblock-mark', metavar='CATS',
         dest='sponsorblock_mark', default=set(), action='callback', type='str',
         callback=_set_from_options_callback, callback_kwargs={
-            'allowed_values': SponsorBlockPP.CATEGORIES.keys(),
+            'allowed_values': SPONSORBLOCK_CATEGORIES.keys(),
             'aliases': {'default': ['all']}
         }, help=(
             'SponsorBlock categories to create chapters for, separated by commas. '
-            f'Available categories are all, default(=all), {", ".join(SponsorBlockPP.CATEGORIES.keys())}. '
+            f'Available categories are all, default(=all), {", ".join(SPONSORBLOCK_CATEGORIES.keys())}. '
             'You can prefix the category with a "-" to exempt it. See [1] for description of the categories. '
             'Eg: --sponsorblock-mark all,-preview [1] https://wiki.sponsor.ajay.app/w/Segment_Categories'))
     sponsorblock.add_option(
         '--sponsorblock-remove', metavar='CATS',
         dest='sponsorblock_remove', default=set(), action='callback', type='str',
         callback=_set_from_options_callback, callback_kwargs={
-            'allowed_values': set(SponsorBlockPP.CATEGORIES.keys()) - set(SponsorBlockPP.POI_CATEGORIES.keys()),
+            'allowed_values': set(SPONSORBLOCK_CATEGORIES.keys()) - set(SPONSORBLOCK_POI_CATEGORIES.keys()),
             # Note: From https://wiki.sponsor.ajay.app/w/Types:
             # The filler category is very aggressive.
             # It is strongly recommended to not use this in a client by default.
@@ -1602,7 +1655,7 @@ def parseOpts(overrideArguments=None):
             'If a category is present in both mark and remove, remove takes precedence. '
             'The syntax and available categories are the same as for --sponsorblock-mark '
             'except that "default" refers to "all,-filler" '
-            f'and {", ".join(SponsorBlockPP.POI_CATEGORIES.keys())} is not available'))
+            f'and {", ".join(SPONSORBLOCK_POI_CATEGORIES.keys())} is not available'))
     sponsorblock.add_option(
         '--sponsorblock-chapter-title', metavar='TEMPLATE',
         default=DEFAULT_SPONSORBLOCK_CHAPTER_TITLE, dest='sponsorblock_chapter_title',
@@ -1,45 +1,52 @@
 # flake8: noqa: F401
 
-from ..utils import load_plugins
+import sys
+
+from ..utils import lazy_module_attributes, load_plugins
 
 from .common import PostProcessor
-from .embedthumbnail import EmbedThumbnailPP
-from .exec import ExecPP, ExecAfterDownloadPP
-from .ffmpeg import (
-    FFmpegPostProcessor,
-    FFmpegEmbedSubtitlePP,
-    FFmpegExtractAudioPP,
-    FFmpegFixupDuplicateMoovPP,
-    FFmpegFixupDurationPP,
-    FFmpegFixupStretchedPP,
-    FFmpegFixupTimestampPP,
-    FFmpegFixupM3u8PP,
-    FFmpegFixupM4aPP,
-    FFmpegMergerPP,
-    FFmpegMetadataPP,
-    FFmpegSubtitlesConvertorPP,
-    FFmpegThumbnailsConvertorPP,
-    FFmpegSplitChaptersPP,
-    FFmpegVideoConvertorPP,
-    FFmpegVideoRemuxerPP,
-)
-from .metadataparser import (
-    MetadataFromFieldPP,
-    MetadataFromTitlePP,
-    MetadataParserPP,
-)
-from .modify_chapters import ModifyChaptersPP
-from .movefilesafterdownload import MoveFilesAfterDownloadPP
-from .sponskrub import SponSkrubPP
-from .sponsorblock import SponsorBlockPP
-from .xattrpp import XAttrMetadataPP
-
-_PLUGIN_CLASSES = load_plugins('postprocessor', 'PP', globals())
+
+# The postprocessors are only imported when they are first used
+_POSTPROCESSOR_MODULES = {
+    'EmbedThumbnailPP': '.embedthumbnail',
+    'ExecPP': '.exec',
+    'ExecAfterDownloadPP': '.exec',
+    'FFmpegPostProcessor': '.ffmpeg',
+    'FFmpegEmbedSubtitlePP': '.ffmpeg',
+    'FFmpegExtractAudioPP': '.ffmpeg',
+    'FFmpegFixupDuplicateMoovPP': '.ffmpeg',
+    'FFmpegFixupDurationPP': '.ffmpeg',
+    'FFmpegFixupStretchedPP': '.ffmpeg',
+    'FFmpegFixupTimestampPP': '.ffmpeg',
+    'FFmpegFixupM3u8PP': '.ffmpeg',
+    'FFmpegFixupM4aPP': '.ffmpeg',
+    'FFmpegMergerPP': '.ffmpeg',
+    'FFmpegMetadataPP': '.ffmpeg',
+    'FFmpegPipelinePP': '.ffmpeg',
+    'FFmpegSubtitlesConvertorPP': '.ffmpeg',
+    'FFmpegThumbnailsConvertorPP': '.ffmpeg',
+    'FFmpegSplitChaptersPP': '.ffmpeg',
+    'FFmpegVideoConvertorPP': '.ffmpeg',
+    'FFmpegVideoRemuxerPP': '.ffmpeg',
+    'MetadataFromFieldPP': '.metadataparser',
+    'MetadataFromTitlePP': '.metadataparser',
+    'MetadataParserPP': '.metadataparser',
+    'ModifyChaptersPP': '.modify_chapters',
+    'MoveFilesAfterDownloadPP': '.movefilesafterdownload',
+    'SponSkrubPP': '.sponskrub',
+    'SponsorBlockPP': '.sponsorblock',
+    'XAttrMetadataPP': '.xattrpp',
+}
+lazy_module_attributes(__name__, _POSTPROCESSOR_MODULES)
+
+# Built-in postprocessors take precedence over plugins of the same name
+_PLUGIN_CLASSES = load_plugins('postprocessor', 'PP', dict(globals(), **_POSTPROCESSOR_MODULES))
+globals().update(_PLUGIN_CLASSES)
 
 
 def get_postprocessor(key):
-    return globals()[key + 'PP']
+    return getattr(sys.modules[__name__], key + 'PP')
 
 
-__all__ = [name for name in globals().keys() if name.endswith('PP')]
+__all__ = [name for name in (*globals().keys(), *_POSTPROCESSOR_MODULES) if name.endswith('PP')]
 __all__.extend(('PostProcessor', 'FFmpegPostProcessor'))
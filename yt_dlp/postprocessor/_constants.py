@@ -0,0 +1,29 @@
+# Constants of the postprocessors that are needed without importing them (e.g. by the options)
+import re
+
+EXTRACT_AUDIO_EXTS = ('best', 'aac', 'flac', 'mp3', 'm4a', 'opus', 'vorbis', 'wav', 'alac')
+
+VIDEO_CONVERT_EXTS = ('mp4', 'mkv', 'flv', 'webm', 'mov', 'avi', 'mp3', 'mka', 'm4a', 'ogg', 'opus')
+VIDEO_CONVERT_FORMAT_RE = re.compile(r'{0}(?:/{0})*$'.format(r'(?:\w+>)?(?:%s)' % '|'.join(VIDEO_CONVERT_EXTS)))
+
+SUBTITLES_CONVERT_EXTS = ('srt', 'vtt', 'ass', 'lrc')
+
+THUMBNAILS_CONVERT_EXTS = ('jpg', 'png')
+
+# https://wiki.sponsor.ajay.app/w/Types
+SPONSORBLOCK_POI_CATEGORIES = {
+    'poi_highlight': 'Highlight',
+}
+SPONSORBLOCK_CATEGORIES = {
+    'sponsor': 'Sponsor',
+    'intro': 'Intermission/Intro Animation',
+    'outro': 'Endcards/Credits',
+    'selfpromo': 'Unpaid/Self Promotion',
+    'preview': 'Preview/Recap',
+    'filler': 'Filler Tangent',
+    'interaction': 'Interaction Reminder',
+    'music_offtopic': 'Non-Music Section',
+    **SPONSORBLOCK_POI_CATEGORIES,
+}
+
+DEFAULT_SPONSORBLOCK_CHAPTER_TITLE = '[SponsorBlock]: %(category_names)l'
@@ -142,6 +142,14 @@ class PostProcessor(metaclass=PostProcessorMetaClass):
         """
         return [], information  # by default, keep file and do nothing
 
+    def prefetch(self, entries):
+        """Prepare for the given playlist entries before they are processed.
+
+        The entries may be incomplete (url results). This is only a hint:
+        run() must work without it
+        """
+        pass
+
     def try_utime(self, path, atime, mtime, errnote='Cannot update utime of file'):
         try:
             self._downloader.utime(path, (atime, mtime))
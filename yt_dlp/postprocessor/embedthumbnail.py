@@ -63,23 +63,20 @@ class EmbedThumbnailPP(FFmpegPostProcessor):
     def _report_run(self, exe, filename):
         self.to_screen('%s: Adding thumbnail to "%s"' % (exe, filename))
 
-    @PostProcessor._restrict_to(images=False)
-    def run(self, info):
-        filename = info['filepath']
-        temp_filename = prepend_extension(filename, 'temp')
-
+    def _prepare_thumbnail(self, info):
+        """Return (index, original filename, filename) of the thumbnail to embed, or None"""
         if not info.get('thumbnails'):
             self.to_screen('There aren\'t any thumbnails to embed')
-            return [], info
+            return None
 
         idx = next((-i for i, t in enumerate(info['thumbnails'][::-1], 1) if t.get('filepath')), None)
         if idx is None:
             self.to_screen('There are no thumbnails on disk')
-            return [], info
+            return None
         thumbnail_filename = info['thumbnails'][idx]['filepath']
         if not os.path.exists(encodeFilename(thumbnail_filename)):
             self.report_warning('Skipping embedding the thumbnail because the file is missing.')
-            return [], info
+            return None
 
         # Correct extension for WebP file with wrong extension (see #25687, #25717)
         convertor = FFmpegThumbnailsConvertorPP(self._downloader)
@@ -91,10 +88,58 @@ class EmbedThumbnailPP(FFmpegPostProcessor):
         # Original behavior was to convert to JPG, but since JPG is a lossy
         # format, there will be some additional data loss.
         # PNG, on the other hand, is lossless.
-        thumbnail_ext = os.path.splitext(thumbnail_filename)[1][1:]
-        if thumbnail_ext not in ('jpg', 'jpeg', 'png'):
+        if os.path.splitext(thumbnail_filename)[1][1:] not in ('jpg', 'jpeg', 'png'):
             thumbnail_filename = convertor.convert_thumbnail(thumbnail_filename, 'png')
-            thumbnail_ext = 'png'
+        return idx, original_thumbnail, thumbnail_filename
+
+    def _files_to_delete(self, original_thumbnail, thumbnail_filename):
+        files_to_delete = [thumbnail_filename]
+        if self._already_have_thumbnail:
+            if original_thumbnail == thumbnail_filename:
+                files_to_delete = []
+        elif original_thumbnail != thumbnail_filename:
+            files_to_delete.append(original_thumbnail)
+        return files_to_delete
+
+    def _plan_ffmpeg(self, info, plan):
+        if info['ext'] in ['m4a', 'mp4', 'mov']:
+            # mutagen and AtomicParsley are preferred over ffmpeg
+            if has_mutagen or 'embed-thumbnail-atomicparsley' in self.get_param('compat_opts', []):
+                return None
+        elif info['ext'] not in ['mkv', 'mka']:
+            return None
+
+        thumbnail = self._prepare_thumbnail(info)
+        if thumbnail is None:
+            return []
+        _, original_thumbnail, thumbnail_filename = thumbnail
+        thumbnail_ext = os.path.splitext(thumbnail_filename)[1][1:]
+
+        if info['ext'] in ['mkv', 'mka']:
+            mimetype = 'image/%s' % ('png' if thumbnail_ext == 'png' else 'jpeg')
+            old_stream = plan.find_stream(('tags', 'mimetype'), mimetype)
+            if old_stream is not None:
+                plan.remove_stream(old_stream)
+            plan.attach(
+                thumbnail_filename,
+                ('metadata:s', 'mimetype=%s' % mimetype), ('metadata:s', 'filename=cover.%s' % thumbnail_ext))
+        else:
+            old_stream = plan.find_stream(('disposition', 'attached_pic'), 1)
+            if old_stream is not None:
+                plan.remove_stream(old_stream)
+            plan.add_stream('%d' % plan.add_input(thumbnail_filename), ('disposition', 'attached_pic'))
+        return self._files_to_delete(original_thumbnail, thumbnail_filename)
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        filename = info['filepath']
+        temp_filename = prepend_extension(filename, 'temp')
+
+        thumbnail = self._prepare_thumbnail(info)
+        if thumbnail is None:
+            return [], info
+        idx, original_thumbnail, thumbnail_filename = thumbnail
+        thumbnail_ext = os.path.splitext(thumbnail_filename)[1][1:]
 
         mtime = os.stat(encodeFilename(filename)).st_mtime
 
@@ -226,10 +271,4 @@ class EmbedThumbnailPP(FFmpegPostProcessor):
 
         self.try_utime(filename, mtime, mtime)
 
-        files_to_delete = [thumbnail_filename]
-        if self._already_have_thumbnail:
-            if original_thumbnail == thumbnail_filename:
-                files_to_delete = []
-        elif original_thumbnail != thumbnail_filename:
-            files_to_delete.append(original_thumbnail)
-        return files_to_delete, info
+        return self._files_to_delete(original_thumbnail, thumbnail_filename), info
@@ -1,9 +1,15 @@
 from __future__ import unicode_literals
 
+import concurrent.futures
+import copy
+import csv
+import hashlib
 import io
 import itertools
 import os
+import shutil
 import subprocess
+import threading
 import time
 import re
 import json
@@ -11,6 +17,13 @@ import json
 from ..longname import split_longname_str
 from .common import AudioConversionError, PostProcessor
 from ._attachments import RunsFFmpeg, ShowsProgress
+from ._constants import (
+    EXTRACT_AUDIO_EXTS,
+    SUBTITLES_CONVERT_EXTS,
+    THUMBNAILS_CONVERT_EXTS,
+    VIDEO_CONVERT_EXTS,
+    VIDEO_CONVERT_FORMAT_RE,
+)
 
 from ..compat import compat_str
 from ..utils import (
@@ -71,6 +84,20 @@ class FFmpegPostProcessor(PostProcessor, RunsFFmpeg, ShowsProgress):
     #      (yt-dlp contributors only)
     _NATIVE_PROGRESS_ENABLED = False
 
+    # Capabilities of the executables, shared by all the instances in the process and
+    # kept in the cache directory. They are keyed by the path, mtime and size of the
+    # executable file, so that they are probed again when it is replaced
+    _CAPABILITIES = {}  # (path, mtime, size) -> capabilities
+    _CAPABILITIES_LOCK = threading.Lock()
+    _CAPABILITIES_CACHE_SECTION = 'ffmpeg-capabilities'
+    _CAPABILITIES_CACHE_TTL = 30 * 24 * 60 * 60
+
+    # ffprobe results of the files, shared by the postprocessors of a chain. They are
+    # keyed by the identity of the file, which changes whenever it is rewritten
+    _PROBES = {}  # (path, inode, size, mtime, ctime) -> ffprobe output
+    _PROBES_LOCK = threading.Lock()
+    _PROBES_MAX = 64
+
     def __init__(self, downloader=None):
         ShowsProgress.__init__(self, downloader)
         PostProcessor.__init__(self, downloader)
@@ -105,41 +132,98 @@ class FFmpegPostProcessor(PostProcessor, RunsFFmpeg, ShowsProgress):
 
     @staticmethod
     def get_versions(downloader=None):
-        return FFmpegPostProcessor.get_version_and_features(downloader)[0]
+        return FFmpegPostProcessor.get_versions_and_features(downloader)[0]
+
+    @staticmethod
+    def _executable_identity(path):
+        """Return (path, mtime, size) of the file that runs for path, or None if there is none"""
+        resolved = shutil.which(path)
+        if not resolved:
+            return None
+        try:
+            stat = os.stat(resolved)
+        except OSError:
+            return None
+        return os.path.realpath(resolved), stat.st_mtime_ns, stat.st_size
+
+    def _capability_cache(self):
+        ydl = getattr(self._downloader, 'ydl', self._downloader)
+        return getattr(ydl, 'cache', None)
+
+    def _get_capabilities(self, path, prog):
+        """
+        Return the capabilities of an executable: a dict with its version and, for ffmpeg,
+        its features and filters. They are shared by the whole process and kept in the
+        cache directory, so that the executables are run only once per version of them
+        """
+        identity = self._executable_identity(path)
+        if identity is None:
+            return {'version': False}
+        with self._CAPABILITIES_LOCK:
+            if identity in self._CAPABILITIES:
+                return self._CAPABILITIES[identity]
+
+        cache = self._capability_cache()
+        cache_key = hashlib.sha1(repr(identity).encode('utf-8')).hexdigest()
+        capabilities = cache.load(self._CAPABILITIES_CACHE_SECTION, cache_key) if cache else None
+        if not capabilities or capabilities.get('path') != identity[0]:
+            capabilities = self._probe_capabilities(identity[0], prog)
+            if cache and capabilities['version']:
+                cache.store(
+                    self._CAPABILITIES_CACHE_SECTION, cache_key, capabilities, ttl=self._CAPABILITIES_CACHE_TTL)
+        with self._CAPABILITIES_LOCK:
+            return self._CAPABILITIES.setdefault(identity, capabilities)
+
+    def _probe_capabilities(self, path, prog):
+        out = _get_exe_version_output(path, ['-bsfs'])
+        ver = detect_exe_version(out) if out else False
+        if ver:
+            regexs = [
+                r'(?:\d+:)?([0-9.]+)-[0-9]+ubuntu[0-9.]+$',  # Ubuntu, see [1]
+                r'n([0-9.]+)$',  # Arch Linux
+                # 1. http://www.ducea.com/2006/06/17/ubuntu-package-version-naming-explanation/
+            ]
+            for regex in regexs:
+                mobj = re.match(regex, ver)
+                if mobj:
+                    ver = mobj.group(1)
+        capabilities = {'path': path, 'version': ver}
+        if prog != 'ffmpeg' or not out:
+            return capabilities
+
+        mobj = re.search(r'(?m)^\s+libavformat\s+(?:[0-9. ]+)\s+/\s+(?P<runtime>[0-9. ]+)', out)
+        lavf_runtime_version = mobj.group('runtime').replace(' ', '') if mobj else None
+        capabilities['features'] = {
+            'fdk': '--enable-libfdk-aac' in out,
+            'setts': 'setts' in out.splitlines(),
+            'needs_adtstoasc': is_outdated_version(lavf_runtime_version, '57.56.100', False),
+        }
+        out = _get_exe_version_output(path, ['-hide_banner', '-filters'])
+        capabilities['filters'] = re.findall(r'(?m)^\s*[A-Z.|]{2,3}\s+(\w+)\s+\S*->\S*\s', out or '')
+        return capabilities
+
+    @property
+    def available_filters(self):
+        """The names of the filters supported by ffmpeg"""
+        if self.basename != 'ffmpeg':
+            return []
+        return self._capabilities['ffmpeg'].get('filters') or []
 
     def _determine_executables(self):
         programs = ['avprobe', 'avconv', 'ffmpeg', 'ffprobe']
 
         def get_ffmpeg_version(path, prog):
-            out = _get_exe_version_output(path, ['-bsfs'])
-            ver = detect_exe_version(out) if out else False
-            if ver:
-                regexs = [
-                    r'(?:\d+:)?([0-9.]+)-[0-9]+ubuntu[0-9.]+$',  # Ubuntu, see [1]
-                    r'n([0-9.]+)$',  # Arch Linux
-                    # 1. http://www.ducea.com/2006/06/17/ubuntu-package-version-naming-explanation/
-                ]
-                for regex in regexs:
-                    mobj = re.match(regex, ver)
-                    if mobj:
-                        ver = mobj.group(1)
-            self._versions[prog] = ver
-            if prog != 'ffmpeg' or not out:
-                return
-
-            mobj = re.search(r'(?m)^\s+libavformat\s+(?:[0-9. ]+)\s+/\s+(?P<runtime>[0-9. ]+)', out)
-            lavf_runtime_version = mobj.group('runtime').replace(' ', '') if mobj else None
-            self._features = {
-                'fdk': '--enable-libfdk-aac' in out,
-                'setts': 'setts' in out.splitlines(),
-                'needs_adtstoasc': is_outdated_version(lavf_runtime_version, '57.56.100', False),
-            }
+            capabilities = self._capabilities[prog] = self._get_capabilities(path, prog)
+            self._versions[prog] = capabilities['version']
+            if 'features' in capabilities:
+                self._features = dict(capabilities['features'])
 
         self.basename = None
         self.probe_basename = None
         self._paths = None
         self._versions = None
         self._features = {}
+        self._capabilities = {}
 
         prefer_ffmpeg = self.get_param('prefer_ffmpeg', True)
         location = self.get_param('ffmpeg_location')
@@ -214,6 +298,12 @@ class FFmpegPostProcessor(PostProcessor, RunsFFmpeg, ShowsProgress):
     def get_audio_codec(self, path):
         if not self.probe_available and not self.available:
             raise PostProcessingError('ffprobe and ffmpeg not found. Please install or provide the path using --ffmpeg-location')
+        if self.probe_basename == 'ffprobe':
+            try:
+                streams = self.get_metadata_object(path)['streams']
+            except (PostProcessingError, IOError, OSError, KeyError, ValueError):
+                return None
+            return next((s.get('codec_name') for s in streams if s.get('codec_type') == 'audio'), None)
         try:
             if self.probe_available:
                 cmd = [
@@ -249,11 +339,51 @@ class FFmpegPostProcessor(PostProcessor, RunsFFmpeg, ShowsProgress):
                 return mobj.group(1)
         return None
 
+    @staticmethod
+    def _file_identity(path):
+        """Return (path, inode, size, mtime, ctime) of a file, or None if it does not exist"""
+        try:
+            stat = os.stat(encodeFilename(path))
+        except OSError:
+            return None
+        # The mtime is restored after the file is rewritten, but the ctime and inode are not
+        return os.path.realpath(path), stat.st_ino, stat.st_size, stat.st_mtime_ns, stat.st_ctime_ns
+
+    @classmethod
+    def _forget_probe(cls, path):
+        """Invalidate the ffprobe results of a file that has been rewritten"""
+        path = os.path.realpath(path)
+        with cls._PROBES_LOCK:
+            for identity in [k for k in cls._PROBES if k[0] == path]:
+                del cls._PROBES[identity]
+
     def get_metadata_object(self, path, opts=[]):
+        """
+        Return the output of ffprobe for a file, with its format, streams and chapters.
+        Without opts, the result is shared by all the postprocessors until the file changes
+        """
         if self.probe_basename != 'ffprobe':
             if self.probe_available:
                 self.report_warning('Only ffprobe is supported for metadata extraction')
             raise PostProcessingError('ffprobe not found. Please install or provide the path using --ffmpeg-location')
+        if opts:
+            return self._run_ffprobe(path, opts)
+
+        identity = self._file_identity(path)
+        with self._PROBES_LOCK:
+            metadata = self._PROBES.get(identity)
+        if metadata is None:
+            metadata = self._run_ffprobe(path, ['-show_chapters'])
+            if identity is not None and identity == self._file_identity(path):
+                with self._PROBES_LOCK:
+                    while len(self._PROBES) >= self._PROBES_MAX:
+                        del self._PROBES[next(iter(self._PROBES))]
+                    self._PROBES[identity] = metadata
+        else:
+            self.write_debug(f'Using cached ffprobe output of "{path}"')
+        return copy.deepcopy(metadata)
+
+    def _run_ffprobe(self, path, opts):
         self.check_version()
 
         cmd = [
@@ -361,6 +491,7 @@ class FFmpegPostProcessor(PostProcessor, RunsFFmpeg, ShowsProgress):
 
         for out_path, _ in output_path_opts:
             if out_path:
+                self._forget_probe(out_path)
                 self.try_utime(out_path, oldest_mtime, oldest_mtime)
         return stderr
 
@@ -457,7 +588,7 @@ class FFmpegPostProcessor(PostProcessor, RunsFFmpeg, ShowsProgress):
 
 class FFmpegExtractAudioPP(FFmpegPostProcessor):
     COMMON_AUDIO_EXTS = ('wav', 'flac', 'm4a', 'aiff', 'mp3', 'ogg', 'mka', 'opus', 'wma')
-    SUPPORTED_EXTS = ('best', 'aac', 'flac', 'mp3', 'm4a', 'opus', 'vorbis', 'wav', 'alac')
+    SUPPORTED_EXTS = EXTRACT_AUDIO_EXTS
 
     def __init__(self, downloader=None, preferredcodec=None, preferredquality=None, nopostoverwrites=False):
         FFmpegPostProcessor.__init__(self, downloader)
@@ -590,8 +721,8 @@ class FFmpegExtractAudioPP(FFmpegPostProcessor):
 
 
 class FFmpegVideoConvertorPP(FFmpegPostProcessor):
-    SUPPORTED_EXTS = ('mp4', 'mkv', 'flv', 'webm', 'mov', 'avi', 'mp3', 'mka', 'm4a', 'ogg', 'opus')
-    FORMAT_RE = re.compile(r'{0}(?:/{0})*$'.format(r'(?:\w+>)?(?:%s)' % '|'.join(SUPPORTED_EXTS)))
+    SUPPORTED_EXTS = VIDEO_CONVERT_EXTS
+    FORMAT_RE = VIDEO_CONVERT_FORMAT_RE
     _ACTION = 'converting'
 
     def __init__(self, downloader=None, preferedformat=None):
@@ -644,17 +775,15 @@ class FFmpegEmbedSubtitlePP(FFmpegPostProcessor):
         super(FFmpegEmbedSubtitlePP, self).__init__(downloader)
         self._already_have_subtitle = already_have_subtitle
 
-    @PostProcessor._restrict_to(images=False)
-    def run(self, info):
+    def _get_subtitles(self, info):
+        """Return the languages, names and files of the subtitles to embed"""
         if info['ext'] not in ('mp4', 'webm', 'mkv'):
             self.to_screen('Subtitles can only be embedded in mp4, webm or mkv files')
-            return [], info
+            return [], [], []
         subtitles = info.get('requested_subtitles')
         if not subtitles:
             self.to_screen('There aren\'t any subtitles to embed')
-            return [], info
-
-        filename = info['filepath']
+            return [], [], []
 
         # Disabled temporarily. There needs to be a way to overide this
         # in case of duration actually mismatching in extractor
@@ -689,10 +818,22 @@ class FFmpegEmbedSubtitlePP(FFmpegPostProcessor):
             if not mp4_ass_warn and ext == 'mp4' and sub_ext == 'ass':
                 mp4_ass_warn = True
                 self.report_warning('ASS subtitles cannot be properly embedded in mp4 files; expect issues')
+        return sub_langs, sub_names, sub_filenames
 
+    @staticmethod
+    def _stream_options(lang, name):
+        yield 'metadata:s', 'language=%s' % (ISO639Utils.short2long(lang) or lang)
+        if name:
+            yield 'metadata:s', 'handler_name=%s' % name
+            yield 'metadata:s', 'title=%s' % name
+
+    @PostProcessor._restrict_to(images=False)
+    def run(self, info):
+        sub_langs, sub_names, sub_filenames = self._get_subtitles(info)
         if not sub_langs:
             return [], info
 
+        filename = info['filepath']
         input_files = [filename] + sub_filenames
 
         opts = [
@@ -708,11 +849,8 @@ class FFmpegEmbedSubtitlePP(FFmpegPostProcessor):
             opts += ['-c:s', 'mov_text']
         for i, (lang, name) in enumerate(zip(sub_langs, sub_names)):
             opts.extend(['-map', '%d:0' % (i + 1)])
-            lang_code = ISO639Utils.short2long(lang) or lang
-            opts.extend(['-metadata:s:s:%d' % i, 'language=%s' % lang_code])
-            if name:
-                opts.extend(['-metadata:s:s:%d' % i, 'handler_name=%s' % name,
-                             '-metadata:s:s:%d' % i, 'title=%s' % name])
+            for option, value in self._stream_options(lang, name):
+                opts.extend(['-%s:s:%d' % (option, i), value])
 
         temp_filename = prepend_extension(filename, 'temp')
         self.to_screen('Embedding subtitles in "%s"' % filename)
@@ -722,6 +860,19 @@ class FFmpegEmbedSubtitlePP(FFmpegPostProcessor):
         files_to_delete = [] if self._already_have_subtitle else sub_filenames
         return files_to_delete, info
 
+    def _plan_ffmpeg(self, info, plan):
+        sub_langs, sub_names, sub_filenames = self._get_subtitles(info)
+        if not sub_langs:
+            return []
+        if info['ext'] == 'mp4' and not plan.set_option('c:s', 'mov_text'):
+            return None
+        # Same as "-map -0:s" in run()
+        for stream in [s for s in plan.streams if s['probe'] and s['probe'].get('codec_type') == 'subtitle']:
+            plan.remove_stream(stream)
+        for lang, name, sub_filename in zip(sub_langs, sub_names, sub_filenames):
+            plan.add_stream('%d:0' % plan.add_input(sub_filename), *self._stream_options(lang, name))
+        return [] if self._already_have_subtitle else sub_filenames
+
 
 class FFmpegMetadataPP(FFmpegPostProcessor):
 
@@ -832,27 +983,40 @@ class FFmpegMetadataPP(FFmpegPostProcessor):
         for name, value in metadata.items():
             yield ('-metadata', f'{name}={value}')
 
+        for stream_idx, lang in self._stream_languages(info):
+            yield ('-metadata:s:%d' % stream_idx, 'language=%s' % lang)
+
+    @staticmethod
+    def _stream_languages(info):
+        """Yield (index of the stream in the file, language) for the streams of the requested formats"""
         stream_idx = 0
         for fmt in info.get('requested_formats') or []:
             stream_count = 2 if 'none' not in (fmt.get('vcodec'), fmt.get('acodec')) else 1
             if fmt.get('language'):
                 lang = ISO639Utils.short2long(fmt['language']) or fmt['language']
                 for i in range(stream_count):
-                    yield ('-metadata:s:%d' % (stream_idx + i), 'language=%s' % lang)
+                    yield stream_idx + i, lang
             stream_idx += stream_count
 
-    def _get_infojson_opts(self, info, infofn):
+    def _write_infojson(self, info, infofn):
+        """Return the info-json file to attach, writing a temporary one if needed"""
         if not infofn or not os.path.exists(infofn):
             if self._add_infojson is not True:
-                return
+                return None
             infofn = infofn or '%s.temp' % (
                 self._downloader.prepare_filename(info, 'infojson')
                 or replace_extension(self._downloader.prepare_filename(info), 'info.json', info['ext']))
             if not self._downloader._ensure_dir_exists(infofn):
-                return
+                return None
             self.write_debug(f'Writing info-json to: {infofn}')
             write_json_file(self._downloader.sanitize_info(info, self.get_param('clean_infojson', True)), infofn)
             info['infojson_filename'] = infofn
+        return infofn
+
+    def _get_infojson_opts(self, info, infofn):
+        infofn = self._write_infojson(info, infofn)
+        if not infofn:
+            return
 
         old_stream, new_stream = self.get_stream_number(info['filepath'], ('tags', 'mimetype'), 'application/json')
         if old_stream is not None:
@@ -862,6 +1026,52 @@ class FFmpegMetadataPP(FFmpegPostProcessor):
         yield ('-attach', infofn,
                '-metadata:s:%d' % new_stream, 'mimetype=application/json')
 
+    def _plan_ffmpeg(self, info, plan):
+        # The options for m4a files drop the video streams
+        if info['ext'] == 'm4a':
+            return None
+        add_chapters = self._add_chapters and info.get('chapters')
+        if add_chapters and 'map_metadata' in plan.options:
+            return None
+
+        added = False
+        if add_chapters:
+            metadata_filename = replace_extension(info['filepath'], 'meta')
+            list(self._get_chapter_opts(info['chapters'], metadata_filename))
+            plan.set_option('map_metadata', str(plan.add_input(metadata_filename)))
+            plan.files_to_remove.append(metadata_filename)
+            added = True
+        if self._add_metadata:
+            for name, value in self._get_metadata_opts(info):
+                # The output indices of the streams are only known when the command is built
+                if name.startswith('-metadata:s:'):
+                    continue
+                plan.extra_options.extend((name, value))
+                added = True
+            for stream_idx, lang in self._stream_languages(info):
+                plan.add_stream_options(stream_idx, ('metadata:s', 'language=%s' % lang))
+                added = True
+
+        if self._add_infojson:
+            if info['ext'] in ('mkv', 'mka'):
+                had_infojson = info.get('infojson_filename')
+                infojson_filename = self._write_infojson(info, had_infojson)
+                if infojson_filename:
+                    old_stream = plan.find_stream(('tags', 'mimetype'), 'application/json')
+                    if old_stream:
+                        plan.remove_stream(old_stream)
+                    plan.attach(infojson_filename, ('metadata:s', 'mimetype=application/json'))
+                    added = True
+                    if not had_infojson:
+                        plan.files_to_remove.append(infojson_filename)
+                        plan.info_backup.setdefault('infojson_filename', had_infojson)
+            elif self._add_infojson is True:
+                self.to_screen('The info-json can only be attached to mkv/mka files')
+
+        if not added:
+            self.to_screen('There isn\'t any metadata to add')
+        return []
+
 
 class FFmpegMergerPP(FFmpegPostProcessor):
     _NATIVE_PROGRESS_ENABLED = True
@@ -922,6 +1132,12 @@ class FFmpegFixupStretchedPP(FFmpegFixupPostProcessor):
                 '-c', 'copy', '-map', '0', '-dn', '-aspect', '%f' % stretched_ratio])
         return [], info
 
+    def _plan_ffmpeg(self, info, plan):
+        stretched_ratio = info.get('stretched_ratio')
+        if info.get('vcodec') == 'none' or stretched_ratio in (None, 1):
+            return []
+        return [] if plan.set_option('aspect', '%f' % stretched_ratio) else None
+
 
 class FFmpegFixupM4aPP(FFmpegFixupPostProcessor):
     @PostProcessor._restrict_to(images=False, video=False)
@@ -931,6 +1147,11 @@ class FFmpegFixupM4aPP(FFmpegFixupPostProcessor):
                 '-c', 'copy', '-map', '0', '-dn', '-f', 'mp4'])
         return [], info
 
+    def _plan_ffmpeg(self, info, plan):
+        if info.get('vcodec') != 'none' or info.get('container') != 'm4a_dash':
+            return []
+        return [] if plan.set_option('f', 'mp4') else None
+
 
 class FFmpegFixupM3u8PP(FFmpegFixupPostProcessor):
     def _needs_fixup(self, info):
@@ -951,6 +1172,11 @@ class FFmpegFixupM3u8PP(FFmpegFixupPostProcessor):
                 '-c', 'copy', '-map', '0', '-dn', '-f', 'mp4', '-bsf:a', 'aac_adtstoasc'])
         return [], info
 
+    def _plan_ffmpeg(self, info, plan):
+        if not all(self._needs_fixup(info)):
+            return []
+        return [] if plan.set_option('f', 'mp4') and plan.set_option('bsf:a', 'aac_adtstoasc') else None
+
 
 class FFmpegFixupTimestampPP(FFmpegFixupPostProcessor):
 
@@ -981,6 +1207,10 @@ class FFmpegCopyStreamPostProcessor(FFmpegFixupPostProcessor):
         self._fixup(self.MESSAGE, info['filepath'], ['-c', 'copy', '-map', '0', '-dn'])
         return [], info
 
+    def _plan_ffmpeg(self, info, plan):
+        # Any fused command copies the streams
+        return []
+
 
 class FFmpegFixupDurationPP(FFmpegCopyStreamPostProcessor):
     MESSAGE = 'Fixing video duration'
@@ -991,7 +1221,7 @@ class FFmpegFixupDuplicateMoovPP(FFmpegCopyStreamPostProcessor):
 
 
 class FFmpegSubtitlesConvertorPP(FFmpegPostProcessor):
-    SUPPORTED_EXTS = ('srt', 'vtt', 'ass', 'lrc')
+    SUPPORTED_EXTS = SUBTITLES_CONVERT_EXTS
 
     def __init__(self, downloader=None, format=None):
         super(FFmpegSubtitlesConvertorPP, self).__init__(downloader)
@@ -1067,9 +1297,11 @@ class FFmpegSubtitlesConvertorPP(FFmpegPostProcessor):
 
 
 class FFmpegSplitChaptersPP(FFmpegPostProcessor):
-    def __init__(self, downloader, force_keyframes=False):
+    def __init__(self, downloader, force_keyframes=False, workers=None):
         FFmpegPostProcessor.__init__(self, downloader)
         self._force_keyframes = force_keyframes
+        # Encoders are multi-threaded, so only a few chapters are re-encoded at once
+        self._workers = workers or min(4, os.cpu_count() or 1)
 
     def _prepare_filename(self, number, chapter, info):
         info = info.copy()
@@ -1093,6 +1325,79 @@ class FFmpegSplitChaptersPP(FFmpegPostProcessor):
             ['-ss', compat_str(chapter['start_time']),
              '-t', compat_str(chapter['end_time'] - chapter['start_time'])])
 
+    def _report_chapters_progress(self, done, total, started, info):
+        now = time.time()
+        self._hook_progress({
+            'status': 'processing',
+            'fragment_index': done,
+            'fragment_count': total,
+            'elapsed': now - started,
+            'eta': self.calc_eta(started, now, total, done),
+        }, self._copy_infodict(info))
+
+    @staticmethod
+    def _are_contiguous(chapters):
+        return all(abs(a['end_time'] - b['start_time']) < 0.001 for a, b in zip(chapters, chapters[1:]))
+
+    def _split_one_by_one(self, in_file, jobs, info):
+        started = time.time()
+        for done, (destination, opts) in enumerate(jobs, 1):
+            self.real_run_ffmpeg([(in_file, opts)], [(destination, ['-c', 'copy'])])
+            self._report_chapters_progress(done, len(jobs), started, info)
+
+    def _split_in_parallel(self, in_file, jobs, info):
+        """Re-encode the chapters on a pool of threads, with accurate cuts"""
+        started, done = time.time(), 0
+        with concurrent.futures.ThreadPoolExecutor(self._workers) as pool:
+            futures = [
+                pool.submit(self.real_run_ffmpeg, [(in_file, opts)], [(destination, [])])
+                for destination, opts in jobs]
+            try:
+                for future in concurrent.futures.as_completed(futures):
+                    future.result()
+                    done += 1
+                    self._report_chapters_progress(done, len(jobs), started, info)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    def _split_with_segments(self, in_file, jobs, chapters, info):
+        """
+        Cut all the chapters in a single pass over the file with the segment muxer.
+        The segments are cut at the first keyframe after the start of each chapter
+        """
+        times = [c['start_time'] for c in chapters[1:]] + [chapters[-1]['end_time']]
+        first = 0
+        if chapters[0]['start_time'] > 0:
+            times.insert(0, chapters[0]['start_time'])
+            first = 1
+        # The segment muxer expands %d in the output name
+        pattern = prepend_extension(in_file.replace('%', '%%'), 'chapter%05d.temp')
+        segments = [pattern % i for i in range(len(times) + 1)]
+        list_file = replace_extension(in_file, 'segments.temp.csv')
+        started = time.time()
+        try:
+            self.real_run_ffmpeg([(in_file, [])], [(pattern, [
+                '-c', 'copy', '-f', 'segment', '-reset_timestamps', '1',
+                '-segment_times', ','.join('%f' % t for t in times),
+                '-segment_list', self._ffmpeg_filename_argument(list_file), '-segment_list_type', 'csv'])])
+            # A chapter without keyframes is merged into the previous segment, which shifts all the next ones
+            with open(encodeFilename(list_file), newline='') as f:
+                starts = [float(row[1]) for row in csv.reader(f) if row]
+            for idx, chapter in enumerate(chapters, first):
+                if (idx >= len(starts) or not os.path.exists(encodeFilename(segments[idx]))
+                        or not chapter['start_time'] - 0.001 <= starts[idx] < chapter['end_time']):
+                    raise PostProcessingError('Some chapters have no keyframe')
+            for (destination, _), segment in zip(jobs, segments[first:]):
+                os.replace(segment, destination)
+            self._report_chapters_progress(len(jobs), len(jobs), started, info)
+        finally:
+            # Including the segments before the first chapter and after the last one
+            for fn in segments + [list_file]:
+                if os.path.exists(encodeFilename(fn)):
+                    os.remove(encodeFilename(fn))
+
     @PostProcessor._restrict_to(images=False)
     def run(self, info):
         chapters = info.get('chapters') or []
@@ -1101,19 +1406,24 @@ class FFmpegSplitChaptersPP(FFmpegPostProcessor):
             return [], info
 
         in_file = info['filepath']
-        if self._force_keyframes and len(chapters) > 1:
-            in_file = self.force_keyframes(in_file, (c['start_time'] for c in chapters))
         self.to_screen('Splitting video by chapters; %d chapters found' % len(chapters))
-        for idx, chapter in enumerate(chapters):
-            destination, opts = self._ffmpeg_args_for_chapter(idx + 1, chapter, info)
-            self.real_run_ffmpeg([(in_file, opts)], [(destination, ['-c', 'copy'])])
-        if in_file != info['filepath']:
-            os.remove(in_file)
+        jobs = [self._ffmpeg_args_for_chapter(idx + 1, chapter, info) for idx, chapter in enumerate(chapters)]
+        if self._force_keyframes and len(chapters) > 1:
+            self._split_in_parallel(in_file, jobs, info)
+            return [], info
+
+        if len(chapters) > 1 and self._are_contiguous(chapters):
+            try:
+                self._split_with_segments(in_file, jobs, chapters, info)
+                return [], info
+            except PostProcessingError as e:
+                self.report_warning(f'Unable to split the file in a single pass; splitting it chapter by chapter: {e.msg}')
+        self._split_one_by_one(in_file, jobs, info)
         return [], info
 
 
 class FFmpegThumbnailsConvertorPP(FFmpegPostProcessor):
-    SUPPORTED_EXTS = ('jpg', 'png')
+    SUPPORTED_EXTS = THUMBNAILS_CONVERT_EXTS
 
     def __init__(self, downloader=None, format=None):
         super(FFmpegThumbnailsConvertorPP, self).__init__(downloader)
@@ -1179,3 +1489,221 @@ class FFmpegThumbnailsConvertorPP(FFmpegPostProcessor):
         if not has_thumbnail:
             self.to_screen('There aren\'t any thumbnails to convert')
         return files_to_delete, info
+
+
+class FFmpegPlan(object):
+    """
+    Options of several postprocessors, to be applied to a file in a single ffmpeg
+    command that copies all its streams (input 0).
+
+    The output streams are only numbered when the command line is built, so that
+    the postprocessors can add and remove streams in any order
+    """
+
+    def __init__(self, filename, streams):
+        self.filename = filename
+        self.inputs = [filename]
+        # Data streams are not copied (-dn)
+        self.streams = [
+            {'spec': '0:%d' % stream['index'], 'probe': stream, 'options': []}
+            for stream in streams if stream.get('codec_type') != 'data']
+        self._file_streams = list(self.streams)
+        self.attachments = []
+        self.options = {}
+        self.extra_options = []
+        self.files_to_delete = []
+        self.files_to_remove = []
+        # Original values of the fields of the info dict that were changed while planning
+        self.info_backup = {}
+        self._removed = []
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+    def add_input(self, path):
+        self.inputs.append(path)
+        return len(self.inputs) - 1
+
+    def find_stream(self, keys, value):
+        """Return the first stream of the file whose ffprobe field at keys is value"""
+        return next((
+            stream for stream in self.streams
+            if stream['probe'] and traverse_obj(stream['probe'], keys, casesense=False) == value), None)
+
+    def remove_stream(self, stream):
+        self.streams.remove(stream)
+        if stream['probe']:
+            self._removed.append(stream['spec'])
+
+    def add_stream_options(self, index, *options):
+        """
+        Add per-stream options to a stream of the file, if it is still copied
+        @param index     Index of the stream in the file, not counting the data streams
+                         (i.e. its index in the output of "ffmpeg -i file -map 0 -dn")
+        """
+        if index >= len(self._file_streams):
+            return
+        stream = self._file_streams[index]
+        if any(stream is s for s in self.streams):
+            stream['options'].extend(options)
+
+    def add_stream(self, spec, *options):
+        """
+        Map the stream spec of another input to the output
+        @param options   (name, value) of per-stream options, e.g. ('metadata:s', 'language=eng')
+        """
+        self.streams.append({'spec': spec, 'probe': None, 'options': list(options)})
+
+    def attach(self, path, *options):
+        self.attachments.append({'path': path, 'options': list(options)})
+
+    def set_option(self, name, value):
+        """Set an output option that can only be given once. Return False if it has another value"""
+        if self.options.get(name, value) != value:
+            return False
+        self.options[name] = value
+        return True
+
+    def build(self):
+        """Return the inputs and the output options of the ffmpeg command"""
+        opts = ['-c', 'copy', '-map', '0', '-dn']
+        for spec in self._removed:
+            opts.extend(['-map', '-' + spec])
+        for stream in self.streams:
+            if not stream['probe']:
+                opts.extend(['-map', stream['spec']])
+        for name, value in self.options.items():
+            opts.extend(['-' + name, value])
+        opts.extend(self.extra_options)
+        for i, stream in enumerate(itertools.chain(self.streams, self.attachments)):
+            if 'path' in stream:
+                opts.extend(['-attach', stream['path']])
+            for name, value in stream['options']:
+                opts.extend(['-%s:%d' % (name, i), value])
+        return self.inputs, opts
+
+
+class FFmpegPipelinePP(FFmpegPostProcessor):
+    """
+    Run consecutive postprocessors that only remux the file (fixups and the embedding
+    of subtitles, metadata and thumbnails) as a single ffmpeg command, so that the
+    file is rewritten once instead of once per postprocessor.
+
+    Postprocessors that can be fused describe their work in an FFmpegPlan with
+    _plan_ffmpeg(info, plan), which returns the files to delete, or None if they have
+    to be run on their own for this file. If the fused command fails, the
+    postprocessors are run one by one
+    """
+
+    def __init__(self, downloader, pps):
+        FFmpegPostProcessor.__init__(self, downloader)
+        self._pps = pps
+
+    @staticmethod
+    def can_fuse(pp):
+        if getattr(pp, '_plan_ffmpeg', None) is None or not pp.available:
+            return False
+        # Arguments given to the postprocessor can not be passed to a fused command
+        key = pp.pp_key().lower()
+        return not any(
+            (k[0] if isinstance(k, tuple) else k.split('+')[0]) == key
+            for k in pp.get_param('postprocessor_args') or {})
+
+    @classmethod
+    def fuse(cls, downloader, pps):
+        """Replace the runs of postprocessors that can be fused with FFmpegPipelinePP"""
+        result, group = [], []
+        for pp in itertools.chain(pps, [None]):
+            if pp is not None and cls.can_fuse(pp):
+                group.append(pp)
+                continue
+            if len(group) > 1:
+                result.append(cls(downloader, group))
+            else:
+                result.extend(group)
+            group = []
+            if pp is not None:
+                result.append(pp)
+        return result
+
+    def _new_plan(self, filename):
+        try:
+            return FFmpegPlan(filename, self.get_metadata_object(filename)['streams'])
+        except (PostProcessingError, KeyError, ValueError) as e:
+            self.write_debug(f'Unable to plan a single ffmpeg command: {e}')
+            return None
+
+    def _run_plan(self, plan, pps, info):
+        """Run the fused pps and return (files to delete, info)"""
+        if len(pps) < 2:
+            for pp in pps:
+                info = self._downloader.run_pp(pp, info)
+            return [], info
+
+        names = ', '.join(pp.pp_key() for pp in pps)
+        filename = info['filepath']
+        temp_filename = prepend_extension(filename, 'temp')
+        mtime = os.stat(encodeFilename(filename)).st_mtime
+        for pp in pps:
+            pp._hook_progress({'status': 'started'}, self._copy_infodict(info))
+
+        self.to_screen(f'Running {names} in a single pass on "{filename}"')
+        inputs, opts = plan.build()
+
+        def remove_files():
+            for file in filter(None, plan.files_to_remove):
+                if os.path.exists(encodeFilename(file)):
+                    os.remove(encodeFilename(file))  # Don't obey --keep-files
+
+        try:
+            self.run_ffmpeg_multiple_files(inputs, temp_filename, opts)
+        except PostProcessingError as e:
+            self.report_warning(f'Unable to run {names} in a single pass; running them one by one: {e.msg}')
+            if os.path.exists(encodeFilename(temp_filename)):
+                os.remove(encodeFilename(temp_filename))
+            # The postprocessors write their temporary files again
+            remove_files()
+            for key, value in plan.info_backup.items():
+                if value is None:
+                    info.pop(key, None)
+                else:
+                    info[key] = value
+            for pp in pps:
+                info = self._downloader.run_pp(pp, info)
+            return [], info
+
+        remove_files()
+        os.replace(temp_filename, filename)
+        self.try_utime(filename, mtime, mtime)
+        for pp in pps:
+            pp._hook_progress({'status': 'finished'}, self._copy_infodict(info))
+        return plan.files_to_delete, info
+
+    def run(self, info):
+        if info.get('vcodec') == 'none' and info.get('acodec') == 'none':  # images
+            for pp in self._pps:
+                info = self._downloader.run_pp(pp, info)
+            return [], info
+
+        files_to_delete, fused, plan = [], [], None
+        for pp in self._pps:
+            plan = plan or self._new_plan(info['filepath'])
+            step = None
+            if plan is not None:
+                backup = plan.copy()
+                step = pp._plan_ffmpeg(info, plan)
+            if step is None:
+                self.write_debug(f'{pp.pp_key()} can not be run in a single pass with the other postprocessors')
+                if plan is not None:
+                    deleted, info = self._run_plan(backup, fused, info)
+                    files_to_delete.extend(deleted)
+                info = self._downloader.run_pp(pp, info)
+                fused, plan = [], None
+                continue
+            fused.append(pp)
+            plan.files_to_delete.extend(step)
+
+        if plan is not None:
+            deleted, info = self._run_plan(plan, fused, info)
+            files_to_delete.extend(deleted)
+        return files_to_delete, info
@@ -2,6 +2,7 @@ import copy
 import heapq
 import os
 
+from ._constants import DEFAULT_SPONSORBLOCK_CHAPTER_TITLE
 from .common import PostProcessor
 from .ffmpeg import (
     FFmpegPostProcessor,
@@ -9,25 +10,37 @@ from .ffmpeg import (
 )
 from .sponsorblock import SponsorBlockPP
 from ..utils import (
+    float_or_none,
     orderedSet,
     PostProcessingError,
     prepend_extension,
+    traverse_obj,
 )
 
 
 _TINY_CHAPTER_DURATION = 1
-DEFAULT_SPONSORBLOCK_CHAPTER_TITLE = '[SponsorBlock]: %(category_names)l'
 
 
 class ModifyChaptersPP(FFmpegPostProcessor):
+    # Encoders and their options to re-encode the partial GOPs with, by video codec
+    _SMART_CUT_ENCODERS = {
+        'h264': ['-c:v:0', 'libx264', '-crf', '18'],
+        'hevc': ['-c:v:0', 'libx265', '-crf', '20'],
+        'vp8': ['-c:v:0', 'libvpx', '-crf', '10', '-b:v:0', '0'],
+        'vp9': ['-c:v:0', 'libvpx-vp9', '-crf', '24', '-b:v:0', '0'],
+        'av1': ['-c:v:0', 'libaom-av1', '-crf', '24', '-b:v:0', '0'],
+    }
+
     def __init__(self, downloader, remove_chapters_patterns=None, remove_sponsor_segments=None, remove_ranges=None,
-                 *, sponsorblock_chapter_title=DEFAULT_SPONSORBLOCK_CHAPTER_TITLE, force_keyframes=False):
+                 *, sponsorblock_chapter_title=DEFAULT_SPONSORBLOCK_CHAPTER_TITLE, force_keyframes=False,
+                 smart_cut=True):
         FFmpegPostProcessor.__init__(self, downloader)
         self._remove_chapters_patterns = set(remove_chapters_patterns or [])
         self._remove_sponsor_segments = set(remove_sponsor_segments or []) - set(SponsorBlockPP.POI_CATEGORIES.keys())
         self._ranges_to_remove = set(remove_ranges or [])
         self._sponsorblock_chapter_title = sponsorblock_chapter_title
         self._force_keyframes = force_keyframes
+        self._smart_cut = smart_cut
 
     @PostProcessor._restrict_to(images=False)
     def run(self, info):
@@ -314,6 +327,11 @@ class ModifyChaptersPP(FFmpegPostProcessor):
     def remove_chapters(self, filename, ranges_to_cut, concat_opts, force_keyframes=False):
         in_file = filename
         out_file = prepend_extension(in_file, 'temp')
+        if force_keyframes and self._smart_cut:
+            try:
+                return self._smart_cut_chapters(filename, out_file, concat_opts)
+            except PostProcessingError as e:
+                self.report_warning(f'Unable to re-encode only the cuts; re-encoding the whole file: {e.msg}')
         if force_keyframes:
             in_file = self.force_keyframes(in_file, (t for c in ranges_to_cut for t in (c['start_time'], c['end_time'])))
         self.to_screen(f'Removing chapters from {filename}')
@@ -322,6 +340,74 @@ class ModifyChaptersPP(FFmpegPostProcessor):
             os.remove(in_file)
         return out_file
 
+    @staticmethod
+    def _smart_cut_pieces(concat_opts, keyframes, duration):
+        """
+        Split the kept parts of the file into pieces that start and end at keyframes, which
+        can be copied, and the partial GOPs around the cuts, which have to be re-encoded.
+        Return a list of (copy, start, end); end is None for the end of the file
+        """
+        pieces = []
+        for opts in concat_opts:
+            start = float(opts.get('inpoint', 0))
+            end = float(opts['outpoint']) if 'outpoint' in opts else None
+            first = next((k for k in keyframes if k >= start - 0.001), None)
+            last = end if end is None else next((k for k in reversed(keyframes) if k <= end + 0.001), None)
+            if first is None or (end is not None and (last is None or last <= first)):
+                pieces.append((False, start, end if end is not None else duration))
+                continue
+            if first - start > 0.001:
+                pieces.append((False, start, first))
+            pieces.append((True, first, last))
+            if end is not None and end - last > 0.001:
+                pieces.append((False, last, end))
+        return pieces
+
+    def _smart_cut_chapters(self, filename, out_file, concat_opts):
+        """Remove the chapters by copying the whole GOPs and re-encoding only the partial GOPs at the cuts"""
+        metadata = self.get_metadata_object(
+            filename, ['-select_streams', 'v:0', '-show_entries', 'packet=pts_time,flags'])
+        video = traverse_obj(metadata, ('streams', 0)) or {}
+        encoder_opts = self._SMART_CUT_ENCODERS.get(video.get('codec_name'))
+        if video.get('codec_type') != 'video' or not encoder_opts:
+            raise PostProcessingError(f'Cuts in {video.get("codec_name") or "this"} video can not be re-encoded separately')
+        if video.get('pix_fmt'):
+            encoder_opts = encoder_opts + ['-pix_fmt:v:0', video['pix_fmt']]
+        time_base = (video.get('time_base') or '').partition('/')[2]
+        if time_base and filename.rpartition('.')[-1] in ('mp4', 'mov', 'm4v'):
+            encoder_opts = encoder_opts + ['-video_track_timescale', time_base]
+        # The cuts are relative to the start of the file
+        offset = float_or_none(traverse_obj(metadata, ('format', 'start_time'))) or 0
+        keyframes = sorted(
+            float(packet['pts_time']) - offset for packet in metadata.get('packets') or []
+            if 'K' in packet.get('flags', '') and float_or_none(packet.get('pts_time')) is not None)
+        duration = float_or_none(traverse_obj(metadata, ('format', 'duration')))
+        if not keyframes or not duration:
+            raise PostProcessingError('Unable to find the keyframes of the video')
+
+        self.to_screen(f'Removing chapters from {filename}')
+        in_files, opts, parts = [], [], []
+        try:
+            for copy_piece, start, end in self._smart_cut_pieces(concat_opts, keyframes, duration):
+                if copy_piece:
+                    in_files.append(filename)
+                    opts.append({'inpoint': f'{start:.6f}', **({'outpoint': f'{end:.6f}'} if end is not None else {})})
+                    continue
+                part = prepend_extension(out_file, 'part%d' % len(parts))
+                parts.append(part)
+                self.write_debug(f'Re-encoding {start:.6f}-{end:.6f} of "{filename}"')
+                self.real_run_ffmpeg(
+                    [(filename, ['-ss', f'{start:.6f}', '-t', f'{end - start:.6f}'])],
+                    [(part, ['-map', '0', '-dn', '-c', 'copy', *encoder_opts])])
+                in_files.append(part)
+                opts.append({})
+            self.concat_files(in_files, out_file, opts)
+        finally:
+            for part in parts:
+                if os.path.exists(part):
+                    os.remove(part)
+        return out_file
+
     @staticmethod
     def _make_concat_opts(chapters_to_remove, duration):
         opts = [{}]
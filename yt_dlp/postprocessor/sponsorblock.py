@@ -1,12 +1,14 @@
+import concurrent.futures
 from hashlib import sha256
 import itertools
 import json
 import re
 import time
 
+from ._constants import SPONSORBLOCK_CATEGORIES, SPONSORBLOCK_POI_CATEGORIES
 from .ffmpeg import FFmpegPostProcessor
 from ..compat import compat_urllib_parse_urlencode, compat_HTTPError
-from ..utils import PostProcessingError, network_exceptions, sanitized_Request
+from ..utils import PostProcessingError, error_to_compat_str, network_exceptions, sanitized_Request
 
 
 class SponsorBlockPP(FFmpegPostProcessor):
@@ -14,25 +16,47 @@ class SponsorBlockPP(FFmpegPostProcessor):
     EXTRACTORS = {
         'Youtube': 'YouTube',
     }
-    POI_CATEGORIES = {
-        'poi_highlight': 'Highlight',
-    }
-    CATEGORIES = {
-        'sponsor': 'Sponsor',
-        'intro': 'Intermission/Intro Animation',
-        'outro': 'Endcards/Credits',
-        'selfpromo': 'Unpaid/Self Promotion',
-        'preview': 'Preview/Recap',
-        'filler': 'Filler Tangent',
-        'interaction': 'Interaction Reminder',
-        'music_offtopic': 'Non-Music Section',
-        **POI_CATEGORIES,
-    }
+    POI_CATEGORIES = SPONSORBLOCK_POI_CATEGORIES
+    CATEGORIES = SPONSORBLOCK_CATEGORIES
+
+    # The responses of the API are cached by hash prefix, so that all the videos
+    # sharing a prefix are answered by a single request
+    _CACHE_SECTION = 'sponsorblock'
+    _CACHE_TTL = 24 * 60 * 60
+    # The API does not accept shorter prefixes
+    _HASH_PREFIX_LENGTH = 4
+    _PREFETCH_WORKERS = 4
 
     def __init__(self, downloader, categories=None, api='https://sponsor.ajay.app'):
         FFmpegPostProcessor.__init__(self, downloader)
         self._categories = tuple(categories or self.CATEGORIES.keys())
         self._API_URL = api if re.match('^https?://', api) else 'https://' + api
+        # The cache keys must also identify the API and the categories of the query
+        self._cache_id = sha256(json.dumps([self._API_URL, sorted(self._categories)]).encode('utf-8')).hexdigest()[:16]
+
+    def prefetch(self, entries):
+        """Fetch the segments of the videos of a playlist, one request per hash prefix"""
+        queries = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            service = self.EXTRACTORS.get(entry.get('extractor_key') or entry.get('ie_key'))
+            if service and entry.get('id'):
+                prefix = self._hash_prefix(entry['id'])
+                if self._load_cached(prefix, service) is None:
+                    queries[prefix, service] = True
+        if not queries:
+            return
+        self.to_screen(f'Fetching SponsorBlock segments of {len(queries)} hash prefixes')
+        with concurrent.futures.ThreadPoolExecutor(min(self._PREFETCH_WORKERS, len(queries))) as pool:
+            futures = [pool.submit(self._query_prefix, prefix, service) for prefix, service in queries]
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    future.result()
+                except Exception as e:
+                    # The segments are queried again when the video is processed,
+                    # so a failed prefetch must not abort the playlist
+                    self.write_debug(f'Unable to prefetch SponsorBlock segments: {error_to_compat_str(e)}')
 
     def run(self, info):
         extractor = info['extractor_key']
@@ -83,15 +107,37 @@ class SponsorBlockPP(FFmpegPostProcessor):
             self.to_screen(f'Found {len(sponsor_chapters)} segments in the SponsorBlock database')
         return sponsor_chapters
 
-    def _get_sponsor_segments(self, video_id, service):
-        hash = sha256(video_id.encode('ascii')).hexdigest()
-        # SponsorBlock API recommends using first 4 hash characters.
-        url = f'{self._API_URL}/api/skipSegments/{hash[:4]}?' + compat_urllib_parse_urlencode({
+    def _hash_prefix(self, video_id):
+        return sha256(video_id.encode('ascii')).hexdigest()[:self._HASH_PREFIX_LENGTH]
+
+    def _cache_key(self, prefix, service):
+        return f'{service}-{prefix}-{self._cache_id}'
+
+    def _load_cached(self, prefix, service):
+        cache = getattr(self._downloader, 'cache', None)
+        return cache.load(self._CACHE_SECTION, self._cache_key(prefix, service)) if cache else None
+
+    def _query_prefix(self, prefix, service):
+        """Return the segments of all the videos whose hash starts with prefix"""
+        url = f'{self._API_URL}/api/skipSegments/{prefix}?' + compat_urllib_parse_urlencode({
             'service': service,
             'categories': json.dumps(self._categories),
         })
         self.write_debug(f'SponsorBlock query: {url}')
-        for d in self._get_json(url):
+        videos = self._get_json(url)
+        cache = getattr(self._downloader, 'cache', None)
+        if cache:
+            cache.store(self._CACHE_SECTION, self._cache_key(prefix, service), videos, ttl=self._CACHE_TTL)
+        return videos
+
+    def _get_sponsor_segments(self, video_id, service):
+        prefix = self._hash_prefix(video_id)
+        videos = self._load_cached(prefix, service)
+        if videos is None:
+            videos = self._query_prefix(prefix, service)
+        else:
+            self.write_debug(f'Using cached SponsorBlock segments of hash prefix {prefix}')
+        for d in videos:
             if d['videoID'] == video_id:
                 return d['segments']
         return []
@@ -8,6 +8,7 @@ import binascii
 import calendar
 import codecs
 import collections
+import concurrent.futures
 import contextlib
 import ctypes
 import datetime
@@ -34,6 +35,7 @@ import ssl
 import subprocess
 import sys
 import tempfile
+import threading
 import time
 import traceback
 import xml.etree.ElementTree
@@ -153,6 +155,10 @@ KNOWN_EXTENSIONS = (
     'wav',
     'f4f', 'f4m', 'm3u8', 'smil')
 
+# Browsers supported by --cookies-from-browser (see cookies.py)
+CHROMIUM_BASED_BROWSERS = {'brave', 'chrome', 'chromium', 'edge', 'opera', 'vivaldi'}
+SUPPORTED_BROWSERS = CHROMIUM_BASED_BROWSERS | {'firefox', 'safari'}
+
 # needed for sanitizing filenames in restricted mode
 ACCENT_CHARS = dict(zip('ÂÃÄÀÁÅÆÇÈÉÊËÌÍÎÏÐÑÒÓÔÕÖŐØŒÙÚÛÜŰÝÞßàáâãäåæçèéêëìíîïðñòóôõöőøœùúûüűýþÿ',
                         itertools.chain('AAAAAA', ['AE'], 'CEEEEIIIIDNOOOOOOO', ['OE'], 'UUUUUY', ['TH', 'ss'],
@@ -1206,6 +1212,112 @@ def handle_youtubedl_headers(headers):
     return filtered_headers
 
 
+class HTTPConnectionPool(object):
+    """
+    Idle persistent HTTP(S) connections, keyed by (scheme, host:port, proxy).
+
+    A connection is given back to the pool once the body of its response has been
+    read completely, and is reused by the next request to the same key.
+    Connections that stayed idle for longer than idle_timeout are discarded,
+    and at most max_per_host idle connections are kept for each key.
+    """
+
+    def __init__(self, max_per_host=8, idle_timeout=30):
+        self._lock = threading.Lock()
+        self._idle = collections.defaultdict(list)
+        self._max_per_host = max_per_host
+        self._idle_timeout = idle_timeout
+        self.hits = self.misses = 0
+
+    def acquire(self, key):
+        with self._lock:
+            idle, now = self._idle[key], time.time()
+            while idle:
+                conn, released = idle.pop()
+                if now - released <= self._idle_timeout and conn.sock is not None:
+                    self.hits += 1
+                    return conn
+                conn.close()
+            self.misses += 1
+        return None
+
+    def release(self, key, conn, reusable=True):
+        with self._lock:
+            idle = self._idle[key]
+            if reusable and conn.sock is not None and len(idle) < self._max_per_host:
+                idle.append((conn, time.time()))
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, collections.defaultdict(list)
+        for conn, _ in itertools.chain.from_iterable(idle.values()):
+            conn.close()
+
+
+class _PooledHTTPResponse(compat_http_client.HTTPResponse):
+    """Gives the connection back to the pool once the body has been read completely"""
+    _release = None
+    _closed_early = False
+
+    def close(self):
+        self._closed_early = self.fp is not None and self.length != 0
+        super(_PooledHTTPResponse, self).close()
+
+    def _close_conn(self):
+        super(_PooledHTTPResponse, self)._close_conn()
+        release, self._release = self._release, None
+        if release:
+            release(not self.will_close and not self._closed_early)
+
+
+def _pooled_do_open(handler, http_class, req, socks_proxy=None, **http_conn_args):
+    """Like AbstractHTTPHandler.do_open, but with connections from handler._connection_pool"""
+    host = req.host
+    if not host:
+        raise compat_urllib_error.URLError('no host given')
+
+    headers = dict(req.unredirected_hdrs)
+    headers.update((k, v) for k, v in req.headers.items() if k not in headers)
+    headers = dict((name.title(), val) for name, val in headers.items())
+    # Unlike urllib, do not send "Connection: close"
+    headers.pop('Connection', None)
+
+    pool = handler._connection_pool
+    key = (req.type, host, socks_proxy)
+    while True:
+        h = pool.acquire(key)
+        reused = h is not None
+        if reused:
+            h.timeout = req.timeout
+            h.sock.settimeout(req.timeout)
+        else:
+            h = http_class(host, timeout=req.timeout, **http_conn_args)
+            h.response_class = _PooledHTTPResponse
+            h.set_debuglevel(handler._debuglevel)
+        try:
+            try:
+                h.request(req.get_method(), req.selector, req.data, headers,
+                          encode_chunked=req.has_header('Transfer-encoding'))
+            except OSError as err:
+                raise compat_urllib_error.URLError(err)
+            r = h.getresponse()
+        except Exception as err:
+            h.close()
+            # The server may have closed an idle connection in the meantime
+            if reused and isinstance(getattr(err, 'reason', err), (
+                    compat_http_client.RemoteDisconnected, ConnectionError)):
+                continue
+            raise
+        break
+
+    r._release = functools.partial(pool.release, key, h)
+    r.url = req.get_full_url()
+    r.msg = r.reason
+    return r
+
+
 class YoutubeDLHandler(compat_urllib_request.HTTPHandler):
     """Handler for HTTP requests and responses.
 
@@ -1224,9 +1336,10 @@ class YoutubeDLHandler(compat_urllib_request.HTTPHandler):
     public domain.
     """
 
-    def __init__(self, params, *args, **kwargs):
+    def __init__(self, params, *args, connection_pool=None, **kwargs):
         compat_urllib_request.HTTPHandler.__init__(self, *args, **kwargs)
         self._params = params
+        self._connection_pool = connection_pool
 
     def http_open(self, req):
         conn_class = compat_http_client.HTTPConnection
@@ -1236,9 +1349,10 @@ class YoutubeDLHandler(compat_urllib_request.HTTPHandler):
             conn_class = make_socks_conn_class(conn_class, socks_proxy)
             del req.headers['Ytdl-socks-proxy']
 
-        return self.do_open(functools.partial(
-            _create_http_connection, self, conn_class, False),
-            req)
+        conn_factory = functools.partial(_create_http_connection, self, conn_class, False)
+        if self._connection_pool is not None and not req._tunnel_host:
+            return _pooled_do_open(self, conn_factory, req, socks_proxy)
+        return self.do_open(conn_factory, req)
 
     @staticmethod
     def deflate(data):
@@ -1375,10 +1489,11 @@ def make_socks_conn_class(base_class, socks_proxy):
 
 
 class YoutubeDLHTTPSHandler(compat_urllib_request.HTTPSHandler):
-    def __init__(self, params, https_conn_class=None, *args, **kwargs):
+    def __init__(self, params, https_conn_class=None, *args, connection_pool=None, **kwargs):
         compat_urllib_request.HTTPSHandler.__init__(self, *args, **kwargs)
         self._https_conn_class = https_conn_class or compat_http_client.HTTPSConnection
         self._params = params
+        self._connection_pool = connection_pool
 
     def https_open(self, req):
         kwargs = {}
@@ -1394,9 +1509,10 @@ class YoutubeDLHTTPSHandler(compat_urllib_request.HTTPSHandler):
             conn_class = make_socks_conn_class(conn_class, socks_proxy)
             del req.headers['Ytdl-socks-proxy']
 
-        return self.do_open(functools.partial(
-            _create_http_connection, self, conn_class, True),
-            req, **kwargs)
+        conn_factory = functools.partial(_create_http_connection, self, conn_class, True)
+        if self._connection_pool is not None and not req._tunnel_host:
+            return _pooled_do_open(self, conn_factory, req, socks_proxy, **kwargs)
+        return self.do_open(conn_factory, req, **kwargs)
 
 
 class YoutubeDLCookieJar(compat_cookiejar.MozillaCookieJar):
@@ -2577,30 +2693,49 @@ def get_exe_version(exe, args=['--version'],
 
 class LazyList(collections.abc.Sequence):
     ''' Lazy immutable list from an iterable
-    Note that slices of a LazyList are lists and not LazyList'''
+    Note that slices of a LazyList are lists and not LazyList
+    It is safe to read from several threads; the iterable is only advanced by one at a time'''
 
     class IndexError(IndexError):
         pass
 
-    def __init__(self, iterable, *, reverse=False, _cache=None):
+    def __init__(self, iterable, *, reverse=False, _cache=None, _lock=None):
         self.__iterable = iter(iterable)
         self.__cache = [] if _cache is None else _cache
         self.__reversed = reverse
+        self.__lock = _lock or threading.RLock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_LazyList__lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.__lock = threading.RLock()
 
     def __iter__(self):
         if self.__reversed:
             # We need to consume the entire iterable to iterate in reverse
             yield from self.exhaust()
             return
-        yield from self.__cache
-        for item in self.__iterable:
-            self.__cache.append(item)
-            yield item
+        for i in itertools.count():
+            if i >= len(self.__cache) and not self.__fetch(i + 1):
+                return
+            yield self.__cache[i]
+
+    def __fetch(self, n):
+        ''' Extend the cache to n items; returns whether there are as many '''
+        with self.__lock:
+            if n > len(self.__cache):
+                self.__cache.extend(itertools.islice(self.__iterable, n - len(self.__cache)))
+            return n <= len(self.__cache)
 
     def __exhaust(self):
-        self.__cache.extend(self.__iterable)
-        # Discard the emptied iterable to make it pickle-able
-        self.__iterable = []
+        with self.__lock:
+            self.__cache.extend(self.__iterable)
+            # Discard the emptied iterable to make it pickle-able
+            self.__iterable = []
         return self.__cache
 
     def exhaust(self):
@@ -2632,9 +2767,7 @@ class LazyList(collections.abc.Sequence):
                 return self.__cache[idx]
             except IndexError as e:
                 raise self.IndexError(e) from e
-        n = max(start or 0, stop or 0) - len(self.__cache) + 1
-        if n > 0:
-            self.__cache.extend(itertools.islice(self.__iterable, n))
+        self.__fetch(max(start or 0, stop or 0) + 1)
         try:
             return self.__cache[idx]
         except IndexError as e:
@@ -2652,10 +2785,10 @@ class LazyList(collections.abc.Sequence):
         return len(self.__cache)
 
     def __reversed__(self):
-        return type(self)(self.__iterable, reverse=not self.__reversed, _cache=self.__cache)
+        return type(self)(self.__iterable, reverse=not self.__reversed, _cache=self.__cache, _lock=self.__lock)
 
     def __copy__(self):
-        return type(self)(self.__iterable, reverse=self.__reversed, _cache=self.__cache)
+        return type(self)(self.__iterable, reverse=self.__reversed, _cache=self.__cache, _lock=self.__lock)
 
     def __repr__(self):
         # repr and str should mimic a list. So we exhaust the iterable
@@ -2666,6 +2799,14 @@ class LazyList(collections.abc.Sequence):
 
 
 class PagedList:
+    """
+    A list that is fetched a page at a time with pagefunc(pagenum)
+
+    With prefetch, up to that many pages are fetched in the background, ahead of
+    the pages being read. max_cached_pages limits the number of pages kept in the
+    cache; the least recently used ones are fetched again when needed.
+    The list is safe to read from several threads, and a page is only fetched by one at a time
+    """
 
     class IndexError(IndexError):
         pass
@@ -2674,19 +2815,69 @@ class PagedList:
         # This is only useful for tests
         return len(self.getslice())
 
-    def __init__(self, pagefunc, pagesize, use_cache=True):
+    def __init__(self, pagefunc, pagesize, use_cache=True, *, prefetch=0, max_cached_pages=None):
         self._pagefunc = pagefunc
         self._pagesize = pagesize
         self._use_cache = use_cache
-        self._cache = {}
+        self._prefetch = prefetch
+        self._max_cached_pages = max_cached_pages
+        self._cache = collections.OrderedDict()
+        # pagenum -> future of the page while it is being fetched,
+        # and until it is read when the cache is disabled
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def _fetch(self, pagenum, future):
+        try:
+            page_results = list(self._pagefunc(pagenum))
+        except BaseException as e:
+            with self._lock:
+                self._pending.pop(pagenum, None)
+            future.set_exception(e)
+            return
+        with self._lock:
+            if self._use_cache:
+                self._pending.pop(pagenum, None)
+                self._cache[pagenum] = page_results
+                while self._max_cached_pages and len(self._cache) > self._max_cached_pages:
+                    self._cache.popitem(last=False)
+        future.set_result(page_results)
+
+    def prefetch_pages(self, pagenums):
+        """Start fetching the pages in the background, if prefetch is enabled"""
+        if not self._prefetch:
+            return
+        if self._max_cached_pages:
+            # Do not fetch pages that would be evicted before they are read
+            pagenums = itertools.islice(pagenums, self._max_cached_pages - 1)
+        with self._lock:
+            if self._pool is None:
+                self._pool = concurrent.futures.ThreadPoolExecutor(self._prefetch)
+            for pagenum in pagenums:
+                if pagenum not in self._cache and pagenum not in self._pending:
+                    self._pending[pagenum] = future = concurrent.futures.Future()
+                    self._pool.submit(self._fetch, pagenum, future)
 
     def getpage(self, pagenum):
-        page_results = self._cache.get(pagenum)
-        if page_results is None:
-            page_results = list(self._pagefunc(pagenum))
-        if self._use_cache:
-            self._cache[pagenum] = page_results
-        return page_results
+        with self._lock:
+            page_results = self._cache.get(pagenum)
+            if page_results is not None:
+                self._cache.move_to_end(pagenum)
+                return page_results
+            future = self._pending.get(pagenum)
+            fetch = future is None
+            if fetch:
+                self._pending[pagenum] = future = concurrent.futures.Future()
+        if fetch:
+            self._fetch(pagenum, future)
+        try:
+            return future.result()
+        finally:
+            if not self._use_cache:
+                with self._lock:
+                    if self._pending.get(pagenum) is future:
+                        del self._pending[pagenum]
 
     def getslice(self, start=0, end=None):
         return list(self._getslice(start, end))
@@ -2698,6 +2889,9 @@ class PagedList:
         # NOTE: cache must be enabled if this is used
         if not isinstance(idx, int) or idx < 0:
             raise TypeError('indices must be non-negative integers')
+        # The items are usually read one after another
+        pagenum = idx // self._pagesize
+        self.prefetch_pages(range(pagenum + 1, pagenum + 1 + self._prefetch))
         entries = self.getslice(idx, idx + 1)
         if not entries:
             raise self.IndexError()
@@ -2721,6 +2915,10 @@ class OnDemandPagedList(PagedList):
                 if (end is not None and firstid <= end <= nextfirstid)
                 else None)
 
+            prefetch_end = pagenum + 1 + self._prefetch
+            if end is not None:
+                prefetch_end = min(prefetch_end, (end - 1) // self._pagesize + 1)
+            self.prefetch_pages(range(pagenum + 1, prefetch_end))
             page_results = self.getpage(pagenum)
             if startv != 0 or endv is not None:
                 page_results = page_results[startv:endv]
@@ -2740,9 +2938,17 @@ class OnDemandPagedList(PagedList):
 
 
 class InAdvancePagedList(PagedList):
-    def __init__(self, pagefunc, pagecount, pagesize):
+    """
+    A PagedList with a known number of pages
+    With prefetch, all the pages of a slice are fetched in parallel on that many threads
+    """
+
+    def __init__(self, pagefunc, pagecount, pagesize, *, prefetch=0, max_cached_pages=None):
         self._pagecount = pagecount
-        PagedList.__init__(self, pagefunc, pagesize, True)
+        PagedList.__init__(self, pagefunc, pagesize, True, prefetch=prefetch, max_cached_pages=max_cached_pages)
+
+    def prefetch_pages(self, pagenums):
+        PagedList.prefetch_pages(self, (pagenum for pagenum in pagenums if pagenum < self._pagecount))
 
     def _getslice(self, start, end):
         start_page = start // self._pagesize
@@ -2751,6 +2957,7 @@ class InAdvancePagedList(PagedList):
         skip_elems = start - start_page * self._pagesize
         only_more = None if end is None else end - start
         for pagenum in range(start_page, end_page):
+            self.prefetch_pages(range(pagenum + 1, min(end_page, self._pagecount)))
             page_results = self.getpage(pagenum)
             if skip_elems:
                 page_results = page_results[skip_elems:]
@@ -4947,6 +5154,29 @@ def load_plugins(name, suffix, namespace):
     return classes
 
 
+def lazy_module_attributes(module_name, attributes):
+    """
+    Import the given attributes of a module from its submodules only when they are first used
+    @param attributes    Dictionary of attribute name -> submodule, relative to the module (eg: '.ffmpeg')
+    """
+    module = sys.modules[module_name]
+
+    # Module level __getattr__ needs Python 3.7
+    class LazyModule(type(module)):
+        def __getattr__(self, name):
+            submodule = attributes.get(name)
+            if submodule is None:
+                raise AttributeError('module %r has no attribute %r' % (module_name, name))
+            value = getattr(importlib.import_module(submodule, module_name), name)
+            setattr(self, name, value)
+            return value
+
+        def __dir__(self):
+            return sorted(set(super().__dir__()) | set(attributes))
+
+    module.__class__ = LazyModule
+
+
 def traverse_obj(
         obj, *path_list, default=None, expected_type=None, get_all=True,
         casesense=True, is_user_input=False, traverse_string=False):